@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+bench_classifier.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Compare FilenameClassifier with the regex functions it replaced on a
+synthetic corpus of archive paths. Runs without a database.
+
+    python benchmarks/bench_classifier.py [number of books]
+
+"""
+
+import random
+import re
+import sys
+import time
+
+from libgutenberg.GutenbergFiles import (ENC_CASES, EXTENSION_ALIASES, FilenameClassifier,
+                                         get_diskstatus, get_ebook_id)
+
+FILETYPES = ['txt', 'txt.utf-8', 'html', 'epub.images', 'epub.noimages', 'cover.small',
+             'cover.medium', 'md', 'index', 'readme', 'license', 'pageimages', 'jpg', 'png',
+             'zip', 'rdf', 'mp3', 'ogg', 'mid', 'pdf', 'tex', 'xml', 'css', 'gif', 'svg']
+COMPRESSIONS = ['none', 'zip']
+
+
+def legacy_guess_filetype(filename, filetypes):
+    """ guess_filetype as of 0.10.36 """
+    filetype = enc = None
+    base = ext = ""
+    base_after_hyphen = ""
+
+    matches = re.search(r'^(.*)\.(.*)$', filename)
+    if matches:
+        base = matches.group(1).lower()
+        ext = matches.group(2).lower()
+
+    post10k = re.search(r'^\d{5}(-|$)', base)
+    matches = re.search(r"-(.*)$", base)
+    if matches:
+        base_after_hyphen = matches.group(1)
+
+    ext = EXTENSION_ALIASES.get(ext, ext)
+
+    if ext in filetypes:
+        filetype = ext
+    if re.search(r'[-_]index\.html?$', filename, flags=re.I):
+        filetype = "index"
+    if re.search(r'readme\.txt$', filename, flags=re.I):
+        filetype = "readme"
+    if re.search(r'license\.txt$', filename, flags=re.I):
+        filetype = "license"
+    if re.search(r'page-images', filename, flags=re.I):
+        filetype = "pageimages"
+
+    if ext == "txt":
+        if post10k:
+            enc = ENC_CASES.get(base_after_hyphen, enc)
+        if enc is None:
+            enc = "utf-8"
+    return filetype, enc
+
+
+def legacy_get_compression(filename, compressions):
+    """ get_compression as of 0.10.36 """
+    compression = 'none'
+    compression_match = re.search(r"^(.*)\.(.*)$", filename)
+    if compression_match and (compression_match.group(2).lower() in compressions):
+        compression = compression_match.group(2).lower()
+    return compression
+
+
+def legacy_get_obsoleted(filedir):
+    if re.search("old(/|$)", filedir):
+        return 1
+    if "-src" in filedir:
+        return 1
+    return 0
+
+
+def legacy_classify(path):
+    filedir, filename = path.rsplit('/', 1)
+    id_ = get_ebook_id(filedir)
+    # get_filetypes() and get_compressions() hit the database on every call
+    filetype, enc = legacy_guess_filetype(path, list(FILETYPES))
+    return (filetype, enc, legacy_get_compression(filename, list(COMPRESSIONS)),
+            get_diskstatus(id_, filedir, filetype), legacy_get_obsoleted(filedir))
+
+
+def corpus(books):
+    """ archive paths of books ebooks in both directory layouts """
+    rnd = random.Random(42)
+    names = ['%d.txt', '%d-0.txt', '%d-8.txt', '%d-h.htm', '%d-h.zip', '%d.epub',
+             '%d-h/%d-h.htm', '%d-h/images/cover.jpg', '%d-h/images/p%d.png', 'readme.txt',
+             'LICENSE.txt', '%d-index.html', 'page-images/p%d.jpg', 'old/%d-5.txt',
+             '%d-src/%d.tex', '%d-0.txt.zip', '%d.md', 'music/%d.mid', 'Notes.doc', 'noext']
+    paths = []
+    for _ in range(books):
+        ebook = rnd.randint(1, 75000)
+        if ebook < 10:
+            top = '0/%d' % ebook
+        else:
+            top = '/'.join(str(ebook)[:-1]) + '/%d' % ebook
+        top = rnd.choice([top, str(ebook)])
+        for name in rnd.sample(names, 8):
+            paths.append('%s/%s' % (top, name.replace('%d', str(ebook))))
+    return paths
+
+
+def bench(label, func, paths):
+    start = time.perf_counter()
+    result = func(paths)
+    elapsed = time.perf_counter() - start
+    print('%-22s %8.3f s  %10.0f paths/s' % (label, elapsed, len(paths) / elapsed))
+    return result
+
+
+def main():
+    books = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    paths = corpus(books)
+    print('%d paths' % len(paths))
+
+    classifier = FilenameClassifier(FILETYPES, COMPRESSIONS)
+    legacy = bench('legacy functions', lambda paths: [legacy_classify(p) for p in paths], paths)
+    new = bench('classify_many', classifier.classify_many, paths)
+    assert legacy == new, 'results differ'
+
+
+if __name__ == '__main__':
+    main()
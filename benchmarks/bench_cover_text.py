@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+bench_cover_text.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Compare Cover.Image.text, which measures the text once with TextLayout, with
+the text_extents loop it replaced, on long Latin and CJK titles. Needs cairo.
+
+    python benchmarks/bench_cover_text.py [repetitions]
+
+"""
+
+import sys
+import time
+
+from libgutenberg import Cover
+
+LATIN = ("The Life and Strange Surprizing Adventures of Robinson Crusoe, of York, Mariner: "
+         "Who lived Eight and Twenty Years, all alone in an un-inhabited Island on the Coast "
+         "of America, near the Mouth of the Great River of Oroonoque")
+LONG_WORD = "Pneumonoultramicroscopicsilicovolcanoconiosis" * 4
+CJK = "紅樓夢一名石頭記又名情僧錄風月寶鑑金陵十二釵" * 8
+
+
+def legacy_text(image, text, x, y, width, height, color, font):
+    """ Image.text as of 0.10.36 """
+    def _join(s, tail):
+        return " ".join((s, tail)) if s else tail
+
+    def chop(word):
+        total_str = ""
+        for c in word:
+            _, _, total_width, _, _, _ = image.context.text_extents(total_str + c + "…")
+            if total_width >= width:
+                return total_str + "…"
+            total_str += c
+        assert not "Should not be here, else 'word' fit into the bounding box"
+    image.context.set_source_rgb(*color)
+    font_name, (font_size, font_slant, font_weight) = (font)
+    image.context.select_font_face(font_name, font_slant, font_weight)
+    image.context.set_font_size(font_size)
+    image.context.set_antialias(Cover.cairo.ANTIALIAS_DEFAULT)
+    font_asc, _, font_height, _, _ = image.context.font_extents()
+    width, height = image.tx(width), image.ty(height)
+    w_x, w_y = image.tx(x), font_asc + image.ty(y)
+    line = ""
+    nlines = 1
+    for word in text.split(" "):
+        _, _, line_width, _, _, _ = image.context.text_extents(_join(line, word))
+        if line_width < width:
+            line = _join(line, word)
+        else:
+            if not line:
+                image.context.move_to(w_x, w_y)
+                image.context.show_text(chop(word))
+                return nlines, font_height
+            image.context.move_to(w_x, w_y)
+            image.context.show_text(line)
+            line = word
+            w_y += font_height
+            if w_y > height:
+                return nlines, font_height
+            nlines += 1
+    image.context.move_to(w_x, w_y)
+    image.context.show_text(line)
+    return nlines, font_height
+
+
+def bench(label, func, repetitions):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        result = func()
+    elapsed = time.perf_counter() - start
+    print('%-28s %8.3f s  %10.0f calls/s' % (label, elapsed, repetitions / elapsed))
+    return result
+
+
+def main():
+    if not hasattr(Cover, 'cairo'):
+        sys.exit('cairo is not available')
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    image = Cover.Image(400, 600)
+    cairo = Cover.cairo
+    for label, family, text in (('latin', 'Noto Sans', LATIN),
+                                ('long word', 'Noto Sans', LONG_WORD),
+                                ('cjk', 'Noto Sans CJK SC', CJK)):
+        font = image.font(family, (32, cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD))
+        args = (text, 8, 24, 384, 150, (0.2, 0.2, 0.2), font)
+        print('%s: %d characters' % (label, len(text)))
+        legacy = bench('  legacy text_extents loop', lambda: legacy_text(image, *args),
+                       repetitions)
+        new = bench('  Image.text', lambda: image.text(*args), repetitions)
+        print('  lines: legacy %d, new %d' % (legacy[0], new[0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+bench_language.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Time language_map lookups against pycountry, and the import of
+libgutenberg.DublinCore.
+
+    python benchmarks/bench_language.py
+
+"""
+
+import subprocess
+import sys
+import time
+
+CODES = ['en', 'de', 'fr', 'la', 'grc', 'enm', 'nai', 'zh', 'fi']
+NAMES = ['English', 'german', 'French', 'Latin', 'Ancient Greek (to 1453)', 'Farsi',
+         'Middle English (1100-1500)', 'Chinese', 'Finnish']
+
+
+def per_call(label, func, args, rounds=10000):
+    start = time.perf_counter()
+    for arg in args:
+        func(arg)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for arg in args:
+            func(arg)
+    warm = (time.perf_counter() - start) / (rounds * len(args))
+    print('%-24s first %8.2f ms   then %8.3f us/call' % (label, first * 1000, warm * 1e6))
+
+
+def import_time(module):
+    """ Return the cumulative import time of module in a fresh interpreter, in ms. """
+    cmd = [sys.executable, '-X', 'importtime', '-c', 'import %s' % module]
+    stderr = subprocess.run(cmd, capture_output=True, text=True, check=True).stderr
+    for line in stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000
+    return None
+
+
+def main():
+    for module in ('pycountry', 'libgutenberg.GutenbergGlobals', 'libgutenberg.DublinCore'):
+        times = sorted(import_time(module) for _ in range(5))
+        print('import %-30s %8.1f ms (median of 5)' % (module, times[2]))
+
+    from libgutenberg.GutenbergGlobals import language_map
+    per_call('language_map.get', language_map.get, CODES)
+    per_call('language_map.inverse', language_map.inverse, NAMES)
+    # misses fall back to pycountry
+    per_call('language_map.get miss', language_map.get, ['xx', 'qqq'])
+
+    import pycountry
+    per_call('pycountry alpha_2/3', lambda code: pycountry.languages.get(
+        **{'alpha_%d' % len(code): code}), CODES)
+    per_call('pycountry name', lambda name: pycountry.languages.get(name=name), NAMES)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+bench_loading.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Compare loading Book.files and Book.authors through the relationships, whose
+File and BookAuthor column_properties are correlated subqueries, with the
+joins of load_book_files and load_book_authors: query plans and timing.
+Needs a database.
+
+    python benchmarks/bench_loading.py [--plans] [ebook ...]
+
+"""
+
+import sys
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import joinedload, selectinload
+
+from libgutenberg import DBUtils
+from libgutenberg.CommonOptions import Options
+from libgutenberg.DublinCoreMapping import (book_authors_select, book_files_select,
+                                            load_book_authors, load_book_files)
+from libgutenberg.Models import Author, Book, BookAuthor, File
+
+Options().config = None
+
+
+def relationship_files_select(ebooks):
+    """ what selectinload(Book.files) runs """
+    return (select(File)
+            .where(File.fk_books.in_(ebooks), File.obsoleted == 0, File.diskstatus == 0)
+            .order_by(File.fk_books, File.ftsortorder, File.encsortorder, File.fk_filetypes,
+                      File.fk_encodings, File.compression, File.archive_path))
+
+
+def relationship_authors_select(ebooks):
+    """ what selectinload(Book.authors).joinedload(BookAuthor.author) runs """
+    return (select(BookAuthor)
+            .where(BookAuthor.fk_books.in_(ebooks))
+            .order_by(BookAuthor.fk_books, BookAuthor.heading, BookAuthor.role, BookAuthor.name)
+            .options(joinedload(BookAuthor.author)))
+
+
+def explain(session, label, query):
+    sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    print('--- %s' % label)
+    for line, in session.execute(text('EXPLAIN (ANALYZE, BUFFERS) ' + sql)):
+        print(line)
+
+
+def bench(label, load, ebooks, rounds=5):
+    best = None
+    for _ in range(rounds):
+        session = DBUtils.check_session(None)
+        try:
+            books = session.execute(select(Book).where(Book.pk.in_(ebooks))).scalars().all()
+            start = time.perf_counter()
+            load(session, books)
+            elapsed = time.perf_counter() - start
+        finally:
+            session.close()
+        best = elapsed if best is None else min(best, elapsed)
+    print('%-36s %8.1f ms   %7.0f books/s' % (label, best * 1e3, len(ebooks) / best))
+
+
+def touch_files(session, books):
+    for book in books:
+        for file_ in book.files:
+            file_.ftsortorder, file_.encsortorder, file_.hr_filetype
+
+
+def touch_authors(session, books):
+    for book in books:
+        for author in book.authors:
+            author.role, author.name, author.name_and_dates, list(author.aliases)
+
+
+def selectin_files(session, books):
+    """ the loader of DublinCoreObject.load_many before the joins """
+    session.execute(select(Book).where(Book.pk.in_([book.pk for book in books]))
+                    .options(selectinload(Book.files))).scalars().all()
+    touch_files(session, books)
+
+
+def selectin_authors(session, books):
+    session.execute(select(Book).where(Book.pk.in_([book.pk for book in books]))
+                    .options(selectinload(Book.authors).joinedload(BookAuthor.author)
+                             .selectinload(Author.webpages))).scalars().all()
+    touch_authors(session, books)
+
+
+def main():
+    args = sys.argv[1:]
+    plans = '--plans' in args
+    ebooks = [int(arg) for arg in args if arg != '--plans']
+    session = DBUtils.check_session(None)
+    if not ebooks:
+        ebooks = list(session.execute(select(Book.pk).order_by(Book.pk).limit(5000)).scalars())
+    print('%d books' % len(ebooks))
+
+    if plans:
+        explain(session, 'files by relationship', relationship_files_select(ebooks))
+        explain(session, 'files by join', book_files_select(ebooks))
+        explain(session, 'authors by relationship', relationship_authors_select(ebooks))
+        explain(session, 'authors by join', book_authors_select(ebooks))
+    session.close()
+
+    bench('files by relationship', selectin_files, ebooks)
+    bench('files by join', lambda session, books: (load_book_files(session, books),
+                                                    touch_files(session, books)), ebooks)
+    bench('authors by relationship', selectin_authors, ebooks)
+    bench('authors by join', lambda session, books: (load_book_authors(session, books),
+                                                      touch_authors(session, books)), ebooks)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+bench_pgheader.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Time PG header parsing on the sample files in libgutenberg/tests.
+
+    python benchmarks/bench_pgheader.py [iterations]
+
+"""
+
+import logging
+import os
+import sys
+import time
+
+from libgutenberg.DublinCore import GutenbergDublinCore
+from libgutenberg import DublinCore
+
+TESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'libgutenberg', 'tests')
+SAMPLES = ['99999-h.htm', '99999.json']
+
+
+def bench(label, func, n):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print('%-28s %8.3f s  %8.0f headers/s' % (label, elapsed, n / elapsed))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    # the json sample has empty creators; don't time the warnings
+    logging.disable(logging.WARNING)
+    for sample in SAMPLES:
+        with open(os.path.join(TESTS, sample), encoding='utf-8') as f:
+            data = f.read()
+
+        def load():
+            for _ in range(iterations):
+                GutenbergDublinCore().load_from_pgheader(data)
+        bench('%s load_from_pgheader' % sample, load, iterations)
+
+        parser = getattr(DublinCore, 'pgheader_parser', None)
+        if parser is not None:
+            bench('%s parse_many' % sample,
+                  lambda: list(parser.parse_many([data] * iterations)), iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+bench_rows.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Compare wrapping rows in xl and copying them into Structs, as the raw-SQL
+GutenbergDatabaseDublinCore did, with row_factory rows and Snapshot records:
+memory and throughput on a synthetic files result set. No database needed.
+
+    python benchmarks/bench_rows.py [rows]
+
+"""
+
+import datetime
+import sys
+import time
+import tracemalloc
+
+from libgutenberg.GutenbergDatabase import row_factory, xl
+from libgutenberg.GutenbergGlobals import Struct
+from libgutenberg.Snapshot import FileRecord
+
+COLUMNS = ('fk_books', 'pk', 'filename', 'filetype', 'mediatype', 'filesize', 'filemtime',
+           'fk_filetypes', 'fk_encodings', 'fk_compressions', 'generated')
+
+
+class Cursor(object):
+    """ just enough of a DB-API cursor """
+    description = [(name, None, None, None, None, None, None) for name in COLUMNS]
+
+
+def synthetic_rows(n):
+    mtime = datetime.datetime(2020, 1, 1)
+    return [(i // 20, i, 'cache/epub/%d/pg%d-%d.epub' % (i // 20, i // 20, i), 'EPUB',
+             'application/epub+zip', 100000 + i, mtime, 'epub.images', None, 'none', True)
+            for i in range(n)]
+
+
+def with_xl(cursor, rows):
+    files = []
+    for row in [xl(cursor, row) for row in rows]:
+        file_ = Struct()
+        file_.archive_path = row.filename
+        file_.filename = row.filename
+        file_.url = row.filename
+        file_.id = row.pk
+        file_.extent = row.filesize
+        file_.hr_extent = ''
+        file_.modified = row.filemtime
+        file_.filetype = row.fk_filetypes
+        file_.hr_filetype = row.filetype
+        file_.encoding = row.fk_encodings
+        file_.compression = row.fk_compressions
+        file_.generated = row.generated
+        file_.mediatypes = []
+        files.append(file_)
+    return files
+
+
+def with_records(cursor, rows):
+    files = []
+    for row in list(map(row_factory(cursor), rows)):
+        files.append(FileRecord(row.pk, row.filename, row.filename, row.filename, row.filesize,
+                                '', row.filemtime, row.fk_filetypes, row.filetype,
+                                row.fk_encodings, row.fk_compressions, row.generated,
+                                row.mediatype, [], 0, 0))
+    return files
+
+
+def bench(label, convert, rows):
+    cursor = Cursor()
+    tracemalloc.start()
+    files = convert(cursor, rows)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del files
+
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        convert(cursor, rows)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print('%-22s %8.0f rows/s   kept %7.1f MB   peak %7.1f MB' % (
+        label, len(rows) / best, size / 2 ** 20, peak / 2 ** 20))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    rows = synthetic_rows(n)
+    print('%d rows' % n)
+    bench('xl + Struct', with_xl, rows)
+    bench('row_factory + records', with_records, rows)
+
+
+if __name__ == '__main__':
+    main()
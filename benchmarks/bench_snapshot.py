@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+bench_snapshot.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Compare DublinCore snapshots (to_bytes/from_bytes) with pickling the live
+DublinCoreObjects loaded by the ORM. Needs a database.
+
+    python benchmarks/bench_snapshot.py [ebook ...]
+
+"""
+
+import pickle
+import sys
+import time
+
+from libgutenberg.CommonOptions import Options
+from libgutenberg.DublinCoreMapping import DublinCoreObject
+
+Options().config = None
+
+
+def live_state(dc):
+    """ what pickle has to write for a live object: everything but the session """
+    return {key: value for key, value in dc.__dict__.items() if key != 'session'}
+
+
+def bench(label, dumps, loads, dcs, rounds=20):
+    datas = [dumps(dc) for dc in dcs]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for dc in dcs:
+            dumps(dc)
+    dump_time = (time.perf_counter() - start) / (rounds * len(dcs))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for data in datas:
+            loads(data)
+    load_time = (time.perf_counter() - start) / (rounds * len(dcs))
+    size = sum(len(data) for data in datas) / len(datas)
+    print('%-28s %8.0f bytes   dump %8.1f us (%6.0f/s)   load %8.1f us (%6.0f/s)' % (
+        label, size, dump_time * 1e6, 1 / dump_time, load_time * 1e6, 1 / load_time))
+
+
+def main():
+    ebooks = [int(arg) for arg in sys.argv[1:]] or list(range(1, 201)) + [2600]
+    dcs = list(DublinCoreObject.load_many(ebooks).values())
+    if not dcs:
+        sys.exit('no books found')
+    print('%d books' % len(dcs))
+
+    protocol = pickle.HIGHEST_PROTOCOL
+    bench('pickle live objects', lambda dc: pickle.dumps(live_state(dc), protocol),
+          pickle.loads, dcs)
+    bench('pickle without book', lambda dc: pickle.dumps(
+        {key: value for key, value in live_state(dc).items() if key != 'book'}, protocol),
+          pickle.loads, dcs)
+    bench('snapshot', DublinCoreObject.to_bytes, DublinCoreObject.from_bytes, dcs)
+    snapshots = [DublinCoreObject.from_bytes(dc.to_bytes()) for dc in dcs]
+    bench('pickle of snapshot objects', lambda dc: pickle.dumps(dc, protocol),
+          pickle.loads, snapshots)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+ArchiveScanner.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Reconcile the files table with the archive on disk.
+
+    scanner = ArchiveScanner([GutenbergFiles.FTP], index_path='scan-index.json')
+    changes = scanner.reconcile()
+    for line in changes.lines():
+        print(line)
+    scanner.apply(changes)
+
+reconcile() walks the archive tree, computes the rows the files table should
+have and compares them to the table: files missing from the table are
+inserted, rows whose size or mtime differ are updated and rows of files that
+are gone are deleted. Updates only touch size and mtime; filetypes set by hand
+are left alone.
+
+With an index_path, the mtime of every directory is remembered after apply().
+On the next run directories whose mtime hasn't changed are not examined. A
+directory mtime only changes when files are added, removed or renamed, so use
+full=True to catch files rewritten in place.
+
+"""
+
+import datetime
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from sqlalchemy import delete, select, update
+
+from . import DBUtils
+from . import DCCache
+from . import GutenbergFiles
+from .Logger import debug, info, warning
+from .Models import Book, File
+
+CHUNK = 1000  # rows per INSERT statement
+
+
+class Changes(object):
+    """ The difference between the archive and the files table. """
+
+    def __init__(self):
+        self.inserts = []  # file_values dicts
+        self.updates = []  # dicts with id, archive_path, extent, modified
+        self.deletes = []  # (id, archive_path)
+
+    def __len__(self):
+        return len(self.inserts) + len(self.updates) + len(self.deletes)
+
+    def books(self):
+        """ Return the ebook numbers whose files change. """
+        ebooks = {row['fk_books'] for row in self.inserts}
+        ebooks.update(GutenbergFiles.get_ebook_id(os.path.dirname(row['archive_path']))
+                      for row in self.updates)
+        ebooks.update(GutenbergFiles.get_ebook_id(os.path.dirname(archive_path))
+                      for id_, archive_path in self.deletes)
+        ebooks.discard(None)
+        return ebooks
+
+    def lines(self):
+        """ Describe the changes, one line each. """
+        for row in self.inserts:
+            yield 'insert %s' % row['archive_path']
+        for row in self.updates:
+            yield 'update %s' % row['archive_path']
+        for id_, archive_path in self.deletes:
+            yield 'delete %s' % archive_path
+
+
+class ArchiveScanner(object):
+    """ Walk archive roots and compare them to the files table. """
+
+    def __init__(self, roots=None, index_path=None, workers=8, full=False):
+        self.roots = roots or [GutenbergFiles.FTP]
+        self.index_path = index_path
+        self.workers = workers
+        self.full = full
+        self.index = {}
+        if index_path and os.path.exists(index_path):
+            with open(index_path) as f:
+                self.index = json.load(f)
+        self.mtimes = {}       # realpath of directory: mtime_ns, for the next index
+        self.paths = {}        # filedir: realpath of directory
+        self.expected = {}     # archive_path: file_values dict
+        self.visited = set()   # filedirs seen on disk
+        self.examined = set()  # filedirs whose files were looked at
+
+
+    def _list(self, path, mtime_ns):
+        """ List one directory. Runs in a worker thread.
+
+        Returns path, mtime_ns, subdirectories with their mtimes and, unless
+        the directory is unchanged, its files with their stats. """
+        skip = not self.full and self.index.get(path) == mtime_ns
+        dirs = []
+        files = None if skip else []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        dirs.append((os.path.realpath(entry.path), entry.stat().st_mtime_ns))
+                    elif files is not None and entry.is_file():
+                        files.append((entry.path, entry.stat()))
+                except OSError:
+                    warning("Cannot stat %s", entry.path)
+        return path, mtime_ns, dirs, files
+
+
+    def _add_dir(self, path, mtime_ns, files):
+        """ Compute the expected rows for the files of one directory. """
+        filedir = GutenbergFiles.parse_filename(os.path.join(path, ''))[0]
+        self.mtimes[path] = mtime_ns
+        self.paths[filedir] = path
+        self.visited.add(filedir)
+        if files is None:
+            return
+        id_ = GutenbergFiles.get_ebook_id(filedir)
+        if id_ is None:
+            # etext90/ etc.: without an ebook number the rows can't be checked
+            return
+        self.examined.add(filedir)
+        for filename, statinfo in files:
+            type_, encoding, check_type = GutenbergFiles.resolve_filetype(filename, None, None)
+            values = GutenbergFiles.file_values(id_, filename, type_, encoding, statinfo,
+                                                filedir=filedir)
+            self.expected[values['archive_path']] = values
+
+
+    def scan(self):
+        """ Walk the roots with a pool of threads. """
+        seen = set()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+            for root in self.roots:
+                root = os.path.realpath(root)
+                seen.add(root)
+                pending.add(pool.submit(self._list, root, os.stat(root).st_mtime_ns))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, mtime_ns, dirs, files = future.result()
+                    self._add_dir(path, mtime_ns, files)
+                    for subdir, sub_mtime_ns in dirs:
+                        # symlinked book directories may be reached twice
+                        if subdir not in seen:
+                            seen.add(subdir)
+                            pending.add(pool.submit(self._list, subdir, sub_mtime_ns))
+        info("Scanned %d directories, examined %d, found %d files",
+             len(self.visited), len(self.examined), len(self.expected))
+
+
+    def _in_scope(self, archive_path):
+        """ Whether a row of the files table should exist on disk as far as we know. """
+        filedir = os.path.dirname(archive_path)
+        if filedir in self.examined:
+            return True
+        if filedir in self.visited:
+            return False
+        # the directory is gone; orphaned if a visited ancestor was examined
+        while filedir:
+            filedir = os.path.dirname(filedir)
+            if filedir in self.visited:
+                return filedir in self.examined
+        return False
+
+
+    @DBUtils.managed_session
+    def diff(self, session=None):
+        """ Compare the scanned archive with the files table. """
+        changes = Changes()
+        books = set(session.execute(select(Book.pk)).scalars())
+        rows = session.execute(select(File.id, File.archive_path, File.extent, File.modified))
+
+        found = set()
+        for id_, archive_path, extent, modified in rows:
+            values = self.expected.get(archive_path)
+            if values is None:
+                if self._in_scope(archive_path):
+                    changes.deletes.append((id_, archive_path))
+                continue
+            found.add(archive_path)
+            mtime = datetime.datetime.fromisoformat(values['modified'])
+            if extent != values['extent'] or modified != mtime:
+                changes.updates.append({'id': id_, 'archive_path': archive_path,
+                                        'extent': values['extent'], 'modified': mtime})
+
+        for archive_path, values in self.expected.items():
+            if archive_path in found:
+                continue
+            if values['fk_books'] not in books:
+                debug("Book %s is not in database, skipping %s", values['fk_books'], archive_path)
+                # look at the directory again next time
+                self.mtimes.pop(self.paths[os.path.dirname(archive_path)], None)
+                continue
+            changes.inserts.append(values)
+        info("%d inserts, %d updates, %d deletes",
+             len(changes.inserts), len(changes.updates), len(changes.deletes))
+        return changes
+
+
+    def reconcile(self, session=None):
+        """ Scan the archive and return the Changes. """
+        self.scan()
+        return self.diff(session=session)
+
+
+    @DBUtils.managed_session
+    def apply(self, changes, session=None):
+        """ Write changes to the files table in one transaction and save the index. """
+        for start in range(0, len(changes.inserts), CHUNK):
+            GutenbergFiles.upsert_files(changes.inserts[start:start + CHUNK], session)
+        if changes.updates:
+            session.execute(update(File), [
+                {'id': row['id'], 'extent': row['extent'], 'modified': row['modified']}
+                for row in changes.updates])
+        if changes.deletes:
+            session.execute(delete(File).where(File.id.in_([id_ for id_, _ in changes.deletes])))
+        session.commit()
+        for ebook in changes.books():
+            DCCache.invalidate(ebook)
+        self.save_index()
+
+
+    def save_index(self):
+        """ Remember directory mtimes for the next run. """
+        if not self.index_path:
+            return
+        self.index.update(self.mtimes)
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
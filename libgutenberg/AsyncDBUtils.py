@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+AsyncDBUtils.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+asyncio counterparts of the DBUtils lookups and of
+DublinCoreObject.load_from_database, using SQLAlchemy's asyncio extension
+with asyncpg (pip install libgutenberg[async]).
+
+    from libgutenberg import AsyncDBUtils
+
+    if await AsyncDBUtils.ebook_exists(2600):
+        dc = await AsyncDBUtils.load_dc(2600)
+
+    dcs = await asyncio.gather(*[AsyncDBUtils.load_dc(ebook) for ebook in ebooks])
+
+Every call borrows a connection from the pool of the running event loop,
+unless a session from AsyncDBUtils.get_session() is passed in. Dublin Core
+objects are loaded by the synchronous DublinCoreObject.load_many, run on the
+async connection with AsyncSession.run_sync; they come back detached, to be
+read, not saved.
+
+"""
+
+import asyncio
+import functools
+import weakref
+
+from sqlalchemy import not_
+from sqlalchemy import select
+from sqlalchemy.sql import func
+
+from . import GutenbergDatabase as gdb
+from . import Models
+from .Logger import debug, exception, info
+
+
+def get_async_url():
+    """ The connection string of get_sqlalchemy_url() for asyncpg. """
+    return gdb.get_sqlalchemy_url().replace('postgresql://', 'postgresql+asyncpg://', 1)
+
+
+class AsyncEngineRegistry(object):
+    """ Lazily created async engines, one per event loop.
+
+    asyncpg connections belong to the event loop that opened them, so each
+    loop gets its own pool. Pool settings default to GutenbergDatabase.POOL_SETTINGS.
+    """
+
+    def __init__(self, **settings):
+        self.settings = dict(gdb.POOL_SETTINGS, **settings)
+        self._engines = weakref.WeakKeyDictionary()  # event loop: (engine, sessionmaker)
+
+
+    def configure(self, **settings):
+        """ Change the pool settings for engines created from now on. """
+        self.settings.update(settings)
+        self._engines = weakref.WeakKeyDictionary()
+
+
+    def _entry(self):
+        loop = asyncio.get_running_loop()
+        entry = self._engines.get(loop)
+        if entry is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            engine = create_async_engine(get_async_url(), echo=False, **self.settings)
+            entry = self._engines[loop] = (engine, async_sessionmaker(engine))
+            debug("Created async engine with %s", self.settings)
+        return entry
+
+
+    def get_engine(self):
+        """ Return the engine of the running event loop. """
+        return self._entry()[0]
+
+
+    def get_session(self):
+        """ Return a new AsyncSession borrowing connections from the pool. """
+        return self._entry()[1]()
+
+
+    async def dispose(self):
+        """ Close the connections of the running event loop. """
+        entry = self._engines.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[0].dispose()
+
+
+engines = AsyncEngineRegistry()
+
+
+def get_session():
+    """ Return a new AsyncSession, use as async context manager. """
+    return engines.get_session()
+
+
+def managed_session(func):
+    """ Pass a new session, closed afterwards, unless the caller passed one. """
+    @functools.wraps(func)
+    async def sessionize(*args, session=None, **kwargs):
+        if session is not None:
+            return await func(*args, session=session, **kwargs)
+        async with engines.get_session() as session:
+            return await func(*args, session=session, **kwargs)
+    return sessionize
+
+
+@managed_session
+async def ebook_exists(ebook, session=None):
+    ebook = int(ebook)
+    try:
+        in_db = await session.get(Models.Book, ebook)
+
+    except Exception:
+        exception("Error checking for book.")
+        return False
+
+    if in_db:
+        return True
+    info("No ebook #%d in database.", ebook)
+    return False
+
+@managed_session
+async def author_exists(author, session=None):
+    return (await session.execute(
+        select(Models.Author).where(Models.Author.name == author).limit(1))).scalars().first()
+
+@managed_session
+async def filetype_books(filetype, session=None):
+    return (await session.execute(select(Models.File.fk_books).where(
+            not_(Models.File.archive_path.regexp_match('^cache/')),
+            Models.File.fk_filetypes == filetype,
+        ).distinct())).scalars().all()
+
+@managed_session
+async def last_ebook(session=None):
+    last = (await session.execute(select(func.max(Models.Book.pk)))).scalars().first()
+    debug("Last ebook: #%d" % last)
+    return last
+
+@managed_session
+async def recent_books(interval, session=None):
+    return (await session.execute(select(Models.File.fk_books).where(
+            not_(Models.File.archive_path.regexp_match('^cache/')),
+            Models.File.modified >= interval,
+        ).distinct())).scalars().all()
+
+@managed_session
+async def top_books(options_top, session=None):
+    return (await session.execute(select(Models.Book.pk).order_by(
+            Models.Book.downloads.desc()).limit(options_top))).scalars().all()
+
+@managed_session
+async def load_many(ebooks, load_files=True, chunk=500, session=None):
+    """ Like DublinCoreObject.load_many: return a dict ebook number -> DublinCoreObject. """
+    # DublinCoreMapping pulls in DBUtils and the sync engine registry
+    from .DublinCoreMapping import DublinCoreObject
+
+    def load(sync_session):
+        return DublinCoreObject.load_many(ebooks, session=sync_session,
+                                          load_files=load_files, chunk=chunk)
+    return await session.run_sync(load)
+
+async def load_dc(ebook, load_files=True, session=None):
+    """ Like DublinCoreObject.load_from_database: return the DublinCoreObject or None. """
+    dcs = await load_many([ebook], load_files=load_files, session=session)
+    return dcs.get(int(ebook))
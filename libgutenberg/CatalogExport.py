@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+CatalogExport.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Run a per-book callback (render RDF, covers, ...) over the whole catalog with
+several worker processes.
+
+    for ebook, rdf in export_catalog(make_rdf, workers=8):
+        ...
+
+The callback gets a loaded DublinCoreObject and runs in a worker process; its
+return value must be picklable. Each worker gets its own database connections.
+
+"""
+
+import multiprocessing
+import os
+import queue
+import traceback
+
+from sqlalchemy import select
+
+from . import DBUtils
+from . import GutenbergDatabase
+from . import Logger
+from .DublinCoreMapping import DublinCoreObject
+from .Logger import debug, exception, info
+from .Models import Book
+
+DONE = None  # sentinel on the task and result queues
+
+
+def partition(first, last, size):
+    """ split the ebook numbers first..last into ranges of at most size """
+    return [(start, min(start + size, last + 1)) for start in range(first, last + 1, size)]
+
+
+def reset_engines():
+    """ drop the connections inherited from the parent process
+
+    SQLAlchemy engines aren't fork-safe; dispose(close=False) makes the engine
+    open fresh connections in this process without closing the parent's.
+    GutenbergDatabase.engines does this by itself, this is for an unpooled
+    GutenbergDatabase.OB.
+    """
+    ob = GutenbergDatabase.OB
+    if ob is not None and not ob.pooled:
+        ob.engine.dispose(close=False)
+
+
+def _worker(tasks, results, callback, load_files):
+    """ load the books of each range from tasks and put (ebook, result) on results
+
+    If a range cannot be loaded, put (start, stop, traceback) on results instead.
+    """
+    reset_engines()
+    session = DBUtils.check_session(None)
+    try:
+        while True:
+            task = tasks.get()
+            if task is DONE:
+                break
+            start, stop = task
+            try:
+                ebooks = session.execute(select(Book.pk).where(
+                    Book.pk >= start, Book.pk < stop).order_by(Book.pk)).scalars().all()
+                dcs = DublinCoreObject.load_many(ebooks, session=session,
+                                                 load_files=load_files)
+            except Exception:
+                exception("Error loading ebooks %d to %d", start, stop - 1)
+                results.put((start, stop, traceback.format_exc()))
+                session.rollback()
+                continue
+            for ebook, dc in dcs.items():
+                Logger.ebook = ebook
+                try:
+                    results.put((ebook, callback(dc)))
+                except Exception:
+                    exception("Error exporting ebook %d", ebook)
+                DBUtils.expunge_book(dc.book, session)
+            session.rollback()
+    finally:
+        session.close()
+        results.put(DONE)
+
+
+def export_catalog(callback, workers=None, first=1, last=None, chunk=1000, load_files=True):
+    """ generate (ebook, callback(dc)) for every book numbered first..last
+
+    The ebook number range is partitioned into chunks that are handed out to
+    `workers` processes (default: one per cpu). Results are streamed back as
+    soon as they are ready, so they don't arrive in ebook order.
+
+    Raises RuntimeError after the last result if the books of some ranges
+    could not be loaded.
+    """
+    workers = workers or os.cpu_count() or 1
+    if last is None:
+        last = DBUtils.last_ebook()
+
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue(maxsize=chunk * workers)
+    for task in partition(first, last, chunk):
+        tasks.put(task)
+    for _ in range(workers):
+        tasks.put(DONE)
+    # don't wait at exit for tasks nobody will pick up if the caller stops early
+    tasks.cancel_join_thread()
+
+    processes = [multiprocessing.Process(target=_worker,
+                                         args=(tasks, results, callback, load_files),
+                                         daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    info("Exporting ebooks %d to %d with %d workers", first, last, workers)
+
+    running = workers
+    failed = []
+    try:
+        while running:
+            try:
+                result = results.get(timeout=5)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError('export workers died')
+                continue
+            if result is DONE:
+                running -= 1
+                continue
+            if len(result) == 3:
+                failed.append(result)
+                continue
+            yield result
+    finally:
+        for process in processes:
+            if process.is_alive() and running:
+                process.terminate()
+            process.join()
+        debug("Export workers finished.")
+    if failed:
+        raise RuntimeError('cannot export ebooks %s' % ', '.join(
+            '%d to %d (%s)' % (start, stop - 1, exc_text.strip().splitlines()[-1])
+            for start, stop, exc_text in sorted(failed)))
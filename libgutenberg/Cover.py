@@ -25,39 +25,156 @@ from __future__ import division
 from __future__ import print_function
 
 import argparse
+import bisect
+import collections
 import itertools
 import json
 import math
+import multiprocessing
 import os
 import sys
+import time
 
 
+import functools
+import io
+
+from libgutenberg.Logger import warning
+
 # Applications should be able to test for cairo like this:
 # from libgutenberg import Cover
 # cairo_is_ok = hasattr(Cover, 'cairo')
+#
+# cairocffi is slow to load, so it is imported on first use.
+
+@functools.lru_cache(maxsize=1)
+def _load_cairo():
+    """
+    Import cairocffi into the module as 'cairo'. Return None if it is not
+    available.
+    """
+    global cairo
+    try:
+        import cairocffi
+    except ImportError:
+        # cairocffi not available
+        return None
+    except OSError:
+        # cairo not installed
+        return None
+    cairo = cairocffi
+    return cairocffi
+
+
+def __getattr__(name):
+    if name == 'cairo' and _load_cairo() is not None:
+        return _load_cairo()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
-try:
-    import cairocffi as cairo
-except ImportError:
-    # cairocffi not available
-    pass
-except OSError:
-    # cairo not installed
-    pass
+
+def __dir__():
+    _load_cairo()
+    return sorted(globals())
+
+# The formats Image.encode() writes, by file extension.
+IMAGE_FORMATS = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG", "webp": "WEBP"}
+
+# Bump when a change to the drawing changes the covers, this invalidates the
+# images in a CoverCache.
+RENDERER_VERSION = 1
 
 PY2 = sys.version_info[0] == 2
 if PY2:
     FileNotFoundError = IOError
 #
-# Private helper functions.
+# The TextLayout class measures a string once and breaks it into lines.
 #
 
-def _join(s, tail):
+class TextLayout(object):
     """
-    Return the concatenation of s + ' ' + tail if s is a truthy string, or tail
-    only otherwise.
+    The glyphs of a string in a Cairo ScaledFont, with the advance of every
+    prefix of the string, so that the width of any substring is a subtraction
+    and line breaks and ellipsis cuts are binary searches. The toy font API
+    maps every character to one glyph, so glyph i is character i.
     """
-    return " ".join((s, tail)) if s else tail
+
+    ELLIPSIS = "…"
+
+    def __init__(self, scaled_font, text):
+        """
+        Constructor. Convert the text to glyphs and compute the prefix widths.
+        """
+        self.text = text
+        self.glyphs = scaled_font.text_to_glyphs(0, 0, text, False)
+        self.prefix = [x for _, x, _ in self.glyphs]
+        self.prefix.append(self._advance(scaled_font, self.glyphs))
+        self.breaks = [i for i, c in enumerate(text) if c == " "]
+        self.breaks.append(len(text))
+        self.ellipsis = scaled_font.text_to_glyphs(0, 0, self.ELLIPSIS, False)
+        self.ellipsis_width = self._advance(scaled_font, self.ellipsis)
+
+
+    @staticmethod
+    def _advance(scaled_font, glyphs):
+        """
+        Return the x coordinate of the point following the glyphs.
+        """
+        if not glyphs:
+            return 0.0
+        return glyphs[-1][1] + scaled_font.glyph_extents(glyphs[-1:])[4]
+
+
+    def width(self, start, end):
+        """
+        Return the width of text[start:end].
+        """
+        return self.prefix[end] - self.prefix[start]
+
+
+    def fit(self, start, width):
+        """
+        Return the largest end so that text[start:end] is narrower than width.
+        """
+        end = bisect.bisect_left(self.prefix, self.prefix[start] + width, start) - 1
+        return max(end, start)
+
+
+    def lines(self, width):
+        """
+        Break the text at spaces into lines narrower than width. Generate
+        (start, end, chopped) for each line. A word too wide for a line of its
+        own is chopped off so that it fits with an ellipsis, and ends the text.
+        """
+        text, length = self.text, len(self.text)
+        start = 0
+        while True:
+            while start < length and text[start] == " ":
+                start += 1
+            if start == length:
+                yield start, start, False
+                return
+            i = bisect.bisect_right(self.breaks, self.fit(start, width)) - 1
+            if i < 0 or self.breaks[i] <= start:
+                yield start, self.fit(start, width - self.ellipsis_width), True
+                return
+            end = self.breaks[i]
+            yield start, end, False
+            if end == length:
+                return
+            start = end + 1
+
+
+    def glyphs_at(self, start, end, x, y, chopped=False):
+        """
+        Return the glyphs of text[start:end], and an ellipsis if chopped, for
+        show_glyphs() with the first glyph's origin at x, y.
+        """
+        dx = x - self.prefix[start]
+        glyphs = [(index, gx + dx, gy + y) for index, gx, gy in self.glyphs[start:end]]
+        if chopped:
+            dx = x + self.width(start, end)
+            glyphs.extend((index, gx + dx, gy + y) for index, gx, gy in self.ellipsis)
+        return glyphs
 
 #
 # The Image class wraps Cairo functionality into a Processing inspired interface.
@@ -77,19 +194,42 @@ class Image(object):
     porting the original Processing code easier.
     """
 
-    def __init__(self, width, height):
+    def __init__(self, width, height, recording=False):
         """
         Constructor. Create a Cairo image surface and a render context, and disables
-        anti-aliasing for the image to keep the lines sharp.
+        anti-aliasing for the image to keep the lines sharp. With recording=True,
+        create a recording surface that keeps the drawing operations, so that
+        they can be replayed at other sizes by scaled().
         """
+        _load_cairo()
         self.width = width
         self.height = height
-        self.surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        self.recording = recording
+        if recording:
+            self.surface = cairo.RecordingSurface(cairo.CONTENT_COLOR_ALPHA,
+                                                  (0, 0, width, height))
+        else:
+            self.surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
         self.context = cairo.Context(self.surface)
         self.context.scale(width, height)
         self.context.set_antialias(cairo.ANTIALIAS_NONE)
 
 
+    def clear(self):
+        """
+        Clear the surface to transparent and reset the render context to the
+        state the constructor leaves it in, so that the Image can be reused for
+        another cover of the same size.
+        """
+        self.context.identity_matrix()
+        self.context.new_path()
+        self.context.set_operator(cairo.OPERATOR_CLEAR)
+        self.context.paint()
+        self.context.set_operator(cairo.OPERATOR_OVER)
+        self.context.scale(self.width, self.height)
+        self.context.set_antialias(cairo.ANTIALIAS_NONE)
+
+
     def tx(self, x):
         """
         Transform the given X coordinate from a pixel value [0..width] to a
@@ -164,73 +304,141 @@ class Image(object):
         self.context.restore()
 
 
+    def shapes(self, shapes, color):
+        """
+        Draw many shapes of the same color at once: the rects, triangles and
+        ellipses are filled as one path, the arcs stroked as one path per size.
+        shapes are (kind, args) tuples with kind one of RECT, TRIANGLE, ELLIPSE
+        or ARC and args as taken by the method of the same name, without the
+        color. Shapes of one color should not overlap with opposite windings.
+        """
+        context = self.context
+        context.set_source_rgb(*color)
+        arcs = {}
+        for kind, args in shapes:
+            if kind == RECT:
+                x, y, width, height = args
+                context.rectangle(self.tx(x), self.ty(y), self.tx(width), self.ty(height))
+            elif kind == TRIANGLE:
+                x1, y1, x2, y2, x3, y3 = args
+                context.move_to(self.tx(x1), self.ty(y1))
+                context.line_to(self.tx(x2), self.ty(y2))
+                context.line_to(self.tx(x3), self.ty(y3))
+                context.close_path()
+            elif kind == ELLIPSE:
+                x, y, width, height = args
+                context.new_sub_path()
+                context.save()
+                context.translate(self.tx(x + (width / 2.0)), self.ty(y + (height / 2.0)))
+                context.scale(self.tx(width / 2.0), self.ty(height / 2.0))
+                context.arc(0.0, 0.0, 1.0, 0.0, 2 * math.pi)
+                context.restore()
+                context.close_path()
+            elif kind == ARC:
+                arcs.setdefault((args[2], args[3], args[6]), []).append(args)
+        context.fill()
+        # The line width of arc() is relative to the scale of each arc, so all
+        # arcs of the same size and thickness are stroked at once.
+        for (width, height, thick), group in arcs.items():
+            thick *= 4
+            for x, y, _, _, start, end, _ in group:
+                context.new_sub_path()
+                context.save()
+                context.translate(self.tx(x+(width/2)), self.ty(y+(height/2)))
+                context.scale(self.tx(width/2), self.ty(height/2))
+                context.arc(0.0, 0.0, 1.0 - (self.tx(thick)/2),
+                    (2*math.pi*start)/360,
+                    (2*math.pi*end)/360
+                )
+                context.restore()
+            context.save()
+            context.scale(self.tx(width/2), self.ty(height/2))
+            context.set_line_width(self.tx(thick))
+            context.stroke()
+            context.restore()
+
+
     def text(self, text, x, y, width, height, color, font):
         """
         See the Processing function text():
         https://processing.org/reference/text_.html
 
         Consider using Pango in addition to Cairo here.
+
+        The text is converted to glyphs and measured once, see TextLayout.
         """
-        # Helper function.
-        def chop(word):
-            """
-            Take a word longer than the bounding box's width and chop off as many
-            letters in the beginning as fit, followed by an ellipsis.
-            """
-            total_str = ""
-            for c in word:
-                _, _, total_width, _, _, _ = self.context.text_extents(total_str + c + "…")
-                if total_width >= width:
-                    return total_str + "…"
-                total_str += c
-            assert not "Should not be here, else 'word' fit into the bounding box"
         # Prepare the context for text rendering.
+        scaled_font = self.scaled_font(font)
         self.context.set_source_rgb(*color)
-        font_name, (font_size, font_slant, font_weight) = (font)
-        self.context.select_font_face(font_name, font_slant, font_weight)
-        self.context.set_font_size(font_size)
+        self.context.set_scaled_font(scaled_font)
         self.context.set_antialias(cairo.ANTIALIAS_DEFAULT)
         # Get some font metrics.
-        font_asc, _, font_height, _, _ = self.context.font_extents()
+        font_asc, _, font_height, _, _ = scaled_font.extents()
         # Initialize text cursor to the baseline of the font.
         width, height = self.tx(width), self.ty(height)
         w_x, w_y = self.tx(x), font_asc + self.ty(y)
         # Draw the text one line at a time and ensure the bounding box.
-        line = ""
-        nlines = 1
-        for word in text.split(" "):
-            _, _, line_width, _, _, _ = self.context.text_extents(_join(line, word))
-            if line_width < width:
-                line = _join(line, word)
-            else:
-                if not line:
-                    # First word of the line extends beyond the line: chop and done.
-                    self.context.move_to(w_x, w_y)
-                    self.context.show_text(chop(word))
+        layout = TextLayout(scaled_font, text)
+        nlines = 0
+        for start, end, chopped in layout.lines(width):
+            if nlines:
+                # Filled a line, move on to the next line.
+                w_y += font_height
+                if w_y > height:
                     return nlines, font_height
-                else:
-                    # Filled a line, render it, and move on to the next line.
-                    self.context.move_to(w_x, w_y)
-                    self.context.show_text(line)
-                    line = word
-                    w_y += font_height
-
-                    if w_y > height:
-                        return nlines, font_height
-                    nlines += 1
-        self.context.move_to(w_x, w_y)
-        self.context.show_text(line)
+            nlines += 1
+            self.context.show_glyphs(layout.glyphs_at(start, end, w_x, w_y, chopped))
         return nlines, font_height
 
 
     def save(self, filename=None):
         """
         Save this Image instance as PNG to the given filename. It is assumed
-        that the filename extension is .png!
+        that the filename extension is .png! Without a filename, return the
+        PNG as bytes.
         """
         return self.surface.write_to_png(filename)
 
 
+    def scaled(self, width, height):
+        """
+        Return a new Image of the given size with this Image painted onto it.
+        A recording Image replays its drawing operations at the new size.
+        """
+        image = Image(width, height)
+        image.context.identity_matrix()
+        image.context.scale(width / self.width, height / self.height)
+        image.context.set_source_surface(self.surface)
+        image.context.paint()
+        image.context.identity_matrix()
+        image.context.scale(width, height)
+        return image
+
+
+    def encode(self, fmt="png", quality=90):
+        """
+        Return this Image as PNG, JPEG or WebP bytes, encoded in memory.
+        JPEG and WebP need Pillow. A recording Image is rendered first.
+        """
+        image_format = IMAGE_FORMATS.get(fmt.lower().lstrip("."))
+        if image_format is None:
+            raise ValueError("Unsupported image file format '" + fmt + "', use " +
+                             ", ".join(sorted(set(IMAGE_FORMATS.values()))))
+        image = self.scaled(self.width, self.height) if self.recording else self
+        if image_format == "PNG":
+            return image.save()
+        from PIL import Image as PILImage
+        image.surface.flush()
+        # FORMAT_ARGB32 pixels are native endian 32 bit words; the covers are opaque
+        rawmode = "BGRX" if sys.byteorder == "little" else "XRGB"
+        pil_image = PILImage.frombuffer(
+            "RGB", (image.width, image.height), bytes(image.surface.get_data()),
+            "raw", rawmode, image.surface.get_stride(), 1)
+        buf = io.BytesIO()
+        pil_image.save(buf, image_format, quality=quality)
+        return buf.getvalue()
+
+
     def font(self, name, properties):
         """
         Return a tuple that contains font properties required for rendering.
@@ -239,6 +447,16 @@ class Image(object):
         return (name, (self.ty(size), slant, weight))
 
 
+    def scaled_font(self, font):
+        """
+        Return the Cairo ScaledFont for a font tuple as returned by font(). The
+        ScaledFont objects are shared by all Images of the same size.
+        """
+        font_name, (font_size, font_slant, font_weight) = (font)
+        return _scaled_font(font_name, font_size, font_slant, font_weight,
+                            self.width, self.height)
+
+
     @staticmethod
     def colorHSB(h, s, b):
         """
@@ -284,6 +502,19 @@ class Image(object):
 # Private helper functions.
 #
 
+@functools.lru_cache(maxsize=64)
+def _scaled_font(name, size, slant, weight, width, height):
+    """
+    Create a ScaledFont for the given font face and size, as used on an Image
+    of the given width and height. Selecting the font face by name for every
+    text() call is comparatively slow, so the fonts are cached.
+    """
+    font_face = cairo.ToyFontFace(name, slant, weight)
+    font_matrix = cairo.Matrix(xx=size, yy=size)
+    ctm = cairo.Matrix(xx=width, yy=height)
+    return cairo.ScaledFont(font_face, font_matrix, ctm)
+
+
 def _map(value, istart, istop, ostart, ostop):
     """
     Helper function that implements the Processing function map(). For more
@@ -300,6 +531,101 @@ def _clip(value, lower, upper):
     return lower if value < lower else upper if value > upper else value
 
 
+#
+# The PETSCII shapes drawn into the cells of the cover artwork. Every title
+# character maps to its shapes in the cell at x, y of size s with the line
+# thickness t, in the shape color (SHAPE) or over it in the base color (BASE).
+#
+
+C64_LETTERS = " qQwWeErRtTyYuUiIoOpPaAsSdDfFgGhHjJkKlL:zZxXcCvVbBnNmM,;?<>@[]1234567890.=-+*/"
+
+RECT, TRIANGLE, ELLIPSE, ARC = "rect", "triangle", "ellipse", "arc"
+SHAPE, BASE = 0, 1
+
+_PETSCII_SHAPES = {
+    "qQ": [(SHAPE, ELLIPSE, lambda x, y, s, t: (x, y, s, s))],
+    "wW": [(SHAPE, ELLIPSE, lambda x, y, s, t: (x, y, s, s)),
+           (BASE, ELLIPSE, lambda x, y, s, t: (x+t, y+t, s-(t*2), s-(t*2)))],
+    "eE": [(SHAPE, RECT, lambda x, y, s, t: (x, y+t, s, t))],
+    "rR": [(SHAPE, RECT, lambda x, y, s, t: (x, y+s-(t*2), s, t))],
+    "tT": [(SHAPE, RECT, lambda x, y, s, t: (x+t, y, t, s))],
+    "yY": [(SHAPE, RECT, lambda x, y, s, t: (x+s-(t*2), y, t, s))],
+    "uU": [(SHAPE, ARC, lambda x, y, s, t: (x, y, 2*s, 2*s, 180, 270, t))],
+    "iI": [(SHAPE, ARC, lambda x, y, s, t: (x-s, y, 2*s, 2*s, 270, 360, t))],
+    "oO": [(SHAPE, RECT, lambda x, y, s, t: (x, y, s, t)),
+           (SHAPE, RECT, lambda x, y, s, t: (x, y, t, s))],
+    "pP": [(SHAPE, RECT, lambda x, y, s, t: (x, y, s, t)),
+           (SHAPE, RECT, lambda x, y, s, t: (x+s-t, y, t, s))],
+    "aA": [(SHAPE, TRIANGLE, lambda x, y, s, t: (x, y+s, x+(s/2), y, x+s, y+s))],
+    "sS": [(SHAPE, TRIANGLE, lambda x, y, s, t: (x, y, x+(s/2), y+s, x+s, y))],
+    "dD": [(SHAPE, RECT, lambda x, y, s, t: (x, y+(t*2), s, t))],
+    "fF": [(SHAPE, RECT, lambda x, y, s, t: (x, y+s-(t*3), s, t))],
+    "gG": [(SHAPE, RECT, lambda x, y, s, t: (x+(t*2), y, t, s))],
+    "hH": [(SHAPE, RECT, lambda x, y, s, t: (x+s-(t*3), y, t, s))],
+    "jJ": [(SHAPE, ARC, lambda x, y, s, t: (x, y-s, 2*s, 2*s, 90, 180, t))],
+    "kK": [(SHAPE, ARC, lambda x, y, s, t: (x-s, y-s, 2*s, 2*s, 0, 90, t))],
+    "lL": [(SHAPE, RECT, lambda x, y, s, t: (x, y, t, s)),
+           (SHAPE, RECT, lambda x, y, s, t: (x, y+s-t, s, t))],
+    ":": [(SHAPE, RECT, lambda x, y, s, t: (x+s-t, y, t, s)),
+          (SHAPE, RECT, lambda x, y, s, t: (x, y+s-t, s, t))],
+    "zZ": [(SHAPE, TRIANGLE, lambda x, y, s, t: (x, y+(s/2), x+(s/2), y, x+s, y+(s/2))),
+           (SHAPE, TRIANGLE, lambda x, y, s, t: (x, y+(s/2), x+(s/2), y+s, x+s, y+(s/2)))],
+    "xX": [(SHAPE, ELLIPSE, lambda x, y, s, t: (x+(s/2), y+(s/3), t*2, t*2)),
+           (SHAPE, ELLIPSE, lambda x, y, s, t: (x+(s/3), y+s-(s/3), t*2, t*2)),
+           (SHAPE, ELLIPSE, lambda x, y, s, t: (x+s-(s/3), y+s-(s/3), t*2, t*2))],
+    "cC": [(SHAPE, RECT, lambda x, y, s, t: (x, y+(t*3), s, t))],
+    "vV": [(SHAPE, RECT, lambda x, y, s, t: (x, y, s, s)),
+           (BASE, TRIANGLE, lambda x, y, s, t: (x+t, y, x+(s/2), y+(s/2)-t, x+s-t, y)),
+           (BASE, TRIANGLE, lambda x, y, s, t: (x, y+t, x+(s/2)-t, y+(s/2), x, y+s-t)),
+           (BASE, TRIANGLE, lambda x, y, s, t: (x+t, y+s, x+(s/2), y+(s/2)+t, x+s-t, y+s)),
+           (BASE, TRIANGLE, lambda x, y, s, t: (x+s, y+t, x+s, y+s-t, x+(s/2)+t, y+(s/2)))],
+    "bB": [(SHAPE, RECT, lambda x, y, s, t: (x+(t*3), y, t, s))],
+    "nN": [(SHAPE, RECT, lambda x, y, s, t: (x, y, s, s)),
+           (BASE, TRIANGLE, lambda x, y, s, t: (x, y, x+s-t, y, x, y+s-t)),
+           (BASE, TRIANGLE, lambda x, y, s, t: (x+t, y+s, x+s, y+s, x+s, y+t))],
+    "mM": [(SHAPE, RECT, lambda x, y, s, t: (x, y, s, s)),
+           (BASE, TRIANGLE, lambda x, y, s, t: (x+t, y, x+s, y, x+s, y+s-t)),
+           (BASE, TRIANGLE, lambda x, y, s, t: (x, y+t, x, y+s, x+s-t, y + s))],
+    ",": [(SHAPE, RECT, lambda x, y, s, t: (x+(s/2), y+(s/2), s/2, s/2))],
+    ";": [(SHAPE, RECT, lambda x, y, s, t: (x, y+(s/2), s/2, s/2))],
+    "?": [(SHAPE, RECT, lambda x, y, s, t: (x, y, s/2, s/2)),
+          (SHAPE, RECT, lambda x, y, s, t: (x+(s/2), y+(s/2), s/2, s/2))],
+    "<": [(SHAPE, RECT, lambda x, y, s, t: (x+(s/2), y, s/2, s/2))],
+    ">": [(SHAPE, RECT, lambda x, y, s, t: (x, y, s/2, s/2))],
+    "@": [(SHAPE, RECT, lambda x, y, s, t: (x, y+(s/2)-(t/2), s, t))],
+    "[": [(SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y, t, s))],
+    "]": [(SHAPE, RECT, lambda x, y, s, t: (x, y+(s/2)-(t/2), s, t)),
+          (SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y, t, s))],
+    "0": [(SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y+(s/2)-(t/2), t, s/2+t/2)),
+          (SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y+(s/2)-(t/2), s/2+t/2, t))],
+    "1": [(SHAPE, RECT, lambda x, y, s, t: (x, y+(s/2)-(t/2), s, t)),
+          (SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y, t, s/2+t/2))],
+    "2": [(SHAPE, RECT, lambda x, y, s, t: (x, y+(s/2)-(t/2), s, t)),
+          (SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y+(s/2)-(t/2), t, s/2+t/2))],
+    "3": [(SHAPE, RECT, lambda x, y, s, t: (x, y+(s/2)-(t/2), s/2+t/2, t)),
+          (SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y, t, s))],
+    "4": [(SHAPE, RECT, lambda x, y, s, t: (x, y, t*2, s))],
+    "5": [(SHAPE, RECT, lambda x, y, s, t: (x, y, t*3, s))],
+    "6": [(SHAPE, RECT, lambda x, y, s, t: (x+s-(t*3), y, t*3, s))],
+    "7": [(SHAPE, RECT, lambda x, y, s, t: (x, y, s, t*2))],
+    "8": [(SHAPE, RECT, lambda x, y, s, t: (x, y, s, t*3))],
+    "9": [(SHAPE, RECT, lambda x, y, s, t: (x, y+s-(t*3), s, t*3))],
+    ".": [(SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y+(s/2)-(t/2), t, s/2+t/2)),
+          (SHAPE, RECT, lambda x, y, s, t: (x, y+(s/2)-(t/2), s/2+t/2, t))],
+    "=": [(SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y, t, s/2+t/2)),
+          (SHAPE, RECT, lambda x, y, s, t: (x, y+(s/2)-(t/2), s/2, t))],
+    "-": [(SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y, t, s/2+t/2)),
+          (SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y+(s/2)-(t/2), s/2+t/2, t))],
+    "+": [(SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y+(s/2)-(t/2), s/2+t/2, t)),
+          (SHAPE, RECT, lambda x, y, s, t: (x+(s/2)-(t/2), y, t, s))],
+    "*": [(SHAPE, RECT, lambda x, y, s, t: (x+s-(t*2), y, t*2, s))],
+    "/": [(SHAPE, RECT, lambda x, y, s, t: (x, y+s-(t*2), s, t*2))],
+    " ": [(BASE, RECT, lambda x, y, s, t: (x, y, s, s))],
+}
+
+PETSCII_SHAPES = {c: shapes for chars, shapes in _PETSCII_SHAPES.items() for c in chars}
+
+
 #
 # The draw() function creates an Image instance and draws the cover. Returns
 # an Image instance which is a composition of different Cairo functionality.
@@ -310,12 +636,43 @@ def draw(dc, cover_width=400, cover_height=600, branding="Project Gutenberg"):
     Main drawing function, which generates a cover of the given dimension and
     renders title, author, and graphics.
     """
-    
     # pull cover strings from DublinCore object
-    title = dc.title_no_subtitle
-    subtitle = dc.subtitle
-    author = dc.authors_short()
-    
+    return draw_cover(dc.title_no_subtitle, dc.subtitle, dc.authors_short(),
+                      cover_width, cover_height, branding)
+
+
+def draw_formats(dc, outputs, branding="Project Gutenberg", quality=90):
+    """
+    Draw the cover once and return a dict of the encoded images for all
+    (width, height, fmt) tuples in outputs, fmt being png, jpeg or webp. The
+    cover is recorded at the largest size and replayed at each size, so all
+    images have the layout of the largest one and should have its aspect ratio.
+    """
+    outputs = list(outputs)
+    width, height = max(((w, h) for w, h, _ in outputs), key=lambda size: size[0] * size[1])
+    recording = draw_cover(dc.title_no_subtitle, dc.subtitle, dc.authors_short(),
+                           width, height, branding,
+                           cover_image=Image(width, height, recording=True))
+    images = {}
+    encoded = {}
+    for output in outputs:
+        size = output[:2]
+        if size not in images:
+            images[size] = recording.scaled(*size)
+        encoded[output] = images[size].encode(output[2], quality)
+    return encoded
+
+
+def draw_cover(title, subtitle, author, cover_width=400, cover_height=600,
+               branding="Project Gutenberg", cover_image=None):
+    """
+    Generate a cover from the title, subtitle and author strings. If an Image
+    of the given dimension is passed in cover_image, it is cleared and the
+    cover drawn into it instead of into a new Image.
+    """
+    _load_cairo()
+    subtitle = subtitle or ""
+
     # Based on some initial constants and the title+author strings, generate a base
     # background color and a shape color to draw onto the background. Try to keep
     # these two colors somewhat compatible with each other by varying only their hue.
@@ -358,12 +715,20 @@ def draw(dc, cover_width=400, cover_height=600, branding="Project Gutenberg"):
         cover_image.rect(0, 0, cover_width, cover_height * cover_margin / 100, base_color)
         cover_image.rect(0, 0 + artwork_start_y, cover_width, cover_width, base_color)
         c64_title = c64Convert()
+        shape_thickness = 10
+        thick = int(grid_size * shape_thickness / 100)
+        # Collect the shapes of all cells by color and draw each color at once;
+        # the shapes of a cell never reach into other cells.
+        layers = ([], [])
         for c, i in zip(itertools.cycle(c64_title), range(0, grid_total)):
             grid_x = int(i % grid_count)
             grid_y = int(i / grid_count)
             x = grid_x * grid_size + artwork_start_x
             y = grid_y * grid_size + artwork_start_y
-            drawShape(c, x, y, grid_size)
+            for layer, kind, shape in PETSCII_SHAPES[c]:
+                layers[layer].append((kind, shape(x, y, grid_size, thick)))
+        cover_image.shapes(layers[SHAPE], shape_color)
+        cover_image.shapes(layers[BASE], base_color)
 
 
     # Compute the graphics grid size based on the length of the book title.
@@ -382,7 +747,7 @@ def draw(dc, cover_width=400, cover_height=600, branding="Project Gutenberg"):
     # that only a certain range is used for the title; characters outside of
     # that range are replaced with a somewhat random character.
     def c64Convert():
-        c64_letters = " qQwWeErRtTyYuUiIoOpPaAsSdDfFgGhHjJkKlL:zZxXcCvVbBnNmM,;?<>@[]1234567890.=-+*/"
+        c64_letters = C64_LETTERS
         c64_title = ""
         for c in title:
             if c in c64_letters:
@@ -392,145 +757,6 @@ def draw(dc, cover_width=400, cover_height=600, branding="Project Gutenberg"):
         return c64_title
 
 
-    # Given an alphabetic character from the book's title string and the x, y
-    # coordinates and size of the cell within the cover grid, draw a PETSCII
-    # shape into that cell.
-    def drawShape(c, x, y, s):
-        shape_thickness = 10
-        thick = int(s * shape_thickness / 100)
-        if c in "qQ":
-            cover_image.ellipse(x, y, s, s, shape_color)
-        elif c in "wW":
-            cover_image.ellipse(x, y, s, s, shape_color)
-            cover_image.ellipse(x+thick, y+thick, s-(thick*2), s-(thick*2), base_color)
-        elif c in "eE":
-            cover_image.rect(x, y+thick, s, thick, shape_color)
-        elif c in "rR":
-            cover_image.rect(x, y+s-(thick*2), s, thick, shape_color)
-        elif c in "tT":
-            cover_image.rect(x+thick, y, thick, s, shape_color)
-        elif c in "yY":
-            cover_image.rect(x+s-(thick*2), y, thick, s, shape_color)
-        elif c in "uU":
-            cover_image.arc(x, y, 2*s, 2*s, 180, 270, shape_color, thick)
-        elif c in "iI":
-            cover_image.arc(x-s, y, 2*s, 2*s, 270, 360, shape_color, thick)
-        elif c in "oO":
-            cover_image.rect(x, y, s, thick, shape_color)
-            cover_image.rect(x, y, thick, s, shape_color)
-        elif c in "pP":
-            cover_image.rect(x, y, s, thick, shape_color)
-            cover_image.rect(x+s-thick, y, thick, s, shape_color)
-        elif c in "aA":
-            cover_image.triangle(x, y+s, x+(s/2), y, x+s, y+s, shape_color)
-        elif c in "sS":
-            cover_image.triangle(x, y, x+(s/2), y+s, x+s, y, shape_color)
-        elif c in "dD":
-            cover_image.rect(x, y+(thick*2), s, thick, shape_color)
-        elif c in "fF":
-            cover_image.rect(x, y+s-(thick*3), s, thick, shape_color)
-        elif c in "gG":
-            cover_image.rect(x+(thick*2), y, thick, s, shape_color)
-        elif c in "hH":
-            cover_image.rect(x+s-(thick*3), y, thick, s, shape_color)
-        elif c in "jJ":
-            cover_image.arc(x, y-s, 2*s, 2*s, 90, 180, shape_color, thick)
-        elif c in "kK":
-            cover_image.arc(x-s, y-s, 2*s, 2*s, 0, 90, shape_color, thick)
-        elif c in "lL":
-            cover_image.rect(x, y, thick, s, shape_color)
-            cover_image.rect(x, y+s-thick, s, thick, shape_color)
-        elif c == ":":
-            cover_image.rect(x+s-thick, y, thick, s, shape_color)
-            cover_image.rect(x, y+s-thick, s, thick, shape_color)
-        elif c in "zZ":
-            cover_image.triangle(x, y+(s/2), x+(s/2), y, x+s, y+(s/2), shape_color)
-            cover_image.triangle(x, y+(s/2), x+(s/2), y+s, x+s, y+(s/2), shape_color)
-        elif c in "xX":
-            cover_image.ellipse(x+(s/2), y+(s/3), thick*2, thick*2, shape_color)
-            cover_image.ellipse(x+(s/3), y+s-(s/3), thick*2, thick*2, shape_color)
-            cover_image.ellipse(x+s-(s/3), y+s-(s/3), thick*2, thick*2, shape_color)
-        elif c in "cC":
-            cover_image.rect(x, y+(thick*3), s, thick, shape_color)
-        elif c in "vV":
-            cover_image.rect(x, y, s, s, shape_color)
-            cover_image.triangle(x+thick, y, x+(s/2), y+(s/2)-thick, x+s-thick, y, base_color)
-            cover_image.triangle(x, y+thick, x+(s/2)-thick, y+(s/2), x, y+s-thick, base_color)
-            cover_image.triangle(x+thick, y+s, x+(s/2), y+(s/2)+thick, x+s-thick, y+s, base_color)
-            cover_image.triangle(x+s, y+thick, x+s, y+s-thick, x+(s/2)+thick, y+(s/2), base_color)
-        elif c in "bB":
-            cover_image.rect(x+(thick*3), y, thick, s, shape_color)
-        elif c in "nN":
-            cover_image.rect(x, y, s, s, shape_color)
-            cover_image.triangle(x, y, x+s-thick, y, x, y+s-thick, base_color)
-            cover_image.triangle(x+thick, y+s, x+s, y+s, x+s, y+thick, base_color)
-        elif c in "mM":
-            cover_image.rect(x, y, s, s, shape_color)
-            cover_image.triangle(x+thick, y, x+s, y, x+s, y+s-thick, base_color)
-            cover_image.triangle(x, y+thick, x, y+s, x+s-thick, y + s, base_color)
-        elif c == ",":
-            cover_image.rect(x+(s/2), y+(s/2), s/2, s/2, shape_color)
-        elif c == ";":
-            cover_image.rect(x, y+(s/2), s/2, s/2, shape_color)
-        elif c == "?":
-            cover_image.rect(x, y, s/2, s/2, shape_color)
-            cover_image.rect(x+(s/2), y+(s/2), s/2, s/2, shape_color)
-        elif c == "<":
-            cover_image.rect(x+(s/2), y, s/2, s/2, shape_color)
-        elif c == ">":
-            cover_image.rect(x, y, s/2, s/2, shape_color)
-        elif c == "@":
-            cover_image.rect(x, y+(s/2)-(thick/2), s, thick, shape_color)
-        elif c == "[":
-            cover_image.rect(x+(s/2)-(thick/2), y, thick, s, shape_color)
-        elif c == "]":
-            cover_image.rect(x, y+(s/2)-(thick/2), s, thick, shape_color)
-            cover_image.rect(x+(s/2)-(thick/2), y, thick, s, shape_color)
-        elif c == "0":
-            cover_image.rect(x+(s/2)-(thick/2), y+(s/2)-(thick/2), thick, s/2+thick/2, shape_color)
-            cover_image.rect(x+(s/2)-(thick/2), y+(s/2)-(thick/2), s/2+thick/2, thick, shape_color)
-        elif c == "1":
-            cover_image.rect(x, y+(s/2)-(thick/2), s, thick, shape_color)
-            cover_image.rect(x+(s/2)-(thick/2), y, thick, s/2+thick/2, shape_color)
-        elif c == "2":
-            cover_image.rect(x, y+(s/2)-(thick/2), s, thick, shape_color)
-            cover_image.rect(x+(s/2)-(thick/2), y+(s/2)-(thick/2), thick, s/2+thick/2, shape_color)
-        elif c == "3":
-            cover_image.rect(x, y+(s/2)-(thick/2), s/2+thick/2, thick, shape_color)
-            cover_image.rect(x+(s/2)-(thick/2), y, thick, s, shape_color)
-        elif c == "4":
-            cover_image.rect(x, y, thick*2, s, shape_color)
-        elif c == "5":
-            cover_image.rect(x, y, thick*3, s, shape_color)
-        elif c == "6":
-            cover_image.rect(x+s-(thick*3), y, thick*3, s, shape_color)
-        elif c == "7":
-            cover_image.rect(x, y, s, thick*2, shape_color)
-        elif c == "8":
-            cover_image.rect(x, y, s, thick*3, shape_color)
-        elif c == "9":
-            cover_image.rect(x, y+s-(thick*3), s, thick*3, shape_color)
-        elif c == ".":
-            cover_image.rect(x+(s/2)-(thick/2), y+(s/2)-(thick/2), thick, s/2+thick/2, shape_color)
-            cover_image.rect(x, y+(s/2)-(thick/2), s/2+thick/2, thick, shape_color)
-        elif c == "=":
-            cover_image.rect(x+(s/2)-(thick/2), y, thick, s/2+thick/2, shape_color)
-            cover_image.rect(x, y+(s/2)-(thick/2), s/2, thick, shape_color)
-        elif c == "-":
-            cover_image.rect(x+(s/2)-(thick/2), y, thick, s/2+thick/2, shape_color)
-            cover_image.rect(x+(s/2)-(thick/2), y+(s/2)-(thick/2), s/2+thick/2, thick, shape_color)
-        elif c == "+":
-            cover_image.rect(x+(s/2)-(thick/2), y+(s/2)-(thick/2), s/2+thick/2, thick, shape_color)
-            cover_image.rect(x+(s/2)-(thick/2), y, thick, s, shape_color)
-        elif c == "*":
-            cover_image.rect(x+s-(thick*2), y, thick*2, s, shape_color)
-        elif c == "/":
-            cover_image.rect(x, y+s-(thick*2), s, thick*2, shape_color)
-        elif c == " ":
-            cover_image.rect(x, y, s, s, base_color)
-        else:
-            assert not "Implement."
-
     # If the text is long, use a smaller font size.
     def scale_font(text, font_name, font_properties):
         (font_size, font_slant, font_weight) = font_properties
@@ -616,9 +842,15 @@ def draw(dc, cover_width=400, cover_height=600, branding="Project Gutenberg"):
         y = cover_height * 0.9
         cover_image.text(branding, x, y, width / 2, height, white, branding_font)
 
-    # Create the new cover image.
+    # Create the new cover image, or reuse the given one.
     cover_margin = 2
-    cover_image = Image(cover_width, cover_height)
+    if cover_image is None:
+        cover_image = Image(cover_width, cover_height)
+    elif (cover_image.width, cover_image.height) != (cover_width, cover_height):
+        raise ValueError("cover_image is %dx%d, not %dx%d" % (
+            cover_image.width, cover_image.height, cover_width, cover_height))
+    else:
+        cover_image.clear()
 
     # Draw the book cover.
     shape_color, base_color = processColors()
@@ -630,6 +862,128 @@ def draw(dc, cover_width=400, cover_height=600, branding="Project Gutenberg"):
     return cover_image
 
 
+#
+# Batch rendering. Every worker process keeps one Image per cover size and
+# clears it between covers instead of allocating a new surface and context.
+#
+
+COVER_FILENAME = "pg{ebook}.cover.png"
+
+class RenderStats(collections.namedtuple("RenderStats", "count errors seconds")):
+    """
+    The number of covers rendered, how many of them failed and the time taken.
+    """
+    __slots__ = ()
+
+    @property
+    def rate(self):
+        """
+        Covers per second.
+        """
+        return self.count / self.seconds if self.seconds else 0.0
+
+_images = {}
+_cache = None
+
+
+def _init_worker(cache):
+    """
+    Set the CoverCache used by _render_job() in this process.
+    """
+    global _cache
+    _cache = cache
+
+
+def _pooled_image(width, height):
+    """
+    Return this process's Image of the given size, creating it on first use.
+    """
+    image = _images.get((width, height))
+    if image is None:
+        image = _images[(width, height)] = Image(width, height)
+    return image
+
+
+def _render_job(job):
+    """
+    Draw one cover described by a (filename, title, subtitle, author, width,
+    height, branding) tuple and write it as PNG, JPEG or WebP according to the
+    extension of filename, or copy it from the CoverCache of this process.
+    Runs in a worker process. Return a (filename, error) tuple, error is None
+    on success.
+    """
+    filename, title, subtitle, author, width, height, branding = job
+    _, ext = os.path.splitext(filename)
+    fmt = ext.lower().lstrip(".")
+    if fmt not in IMAGE_FORMATS:
+        return filename, "Unsupported image file format '" + ext + "', use PNG, JPEG or WebP"
+    try:
+        if _cache is not None:
+            data = _cache.render(title, subtitle, author, width, height, branding,
+                                 cover_image=_pooled_image(width, height), fmt=fmt)
+        else:
+            data = draw_cover(title, subtitle, author, width, height, branding,
+                              cover_image=_pooled_image(width, height)).encode(fmt)
+        with open(filename, "wb") as f:
+            f.write(data)
+    except Exception as what:  # pylint: disable=broad-except
+        return filename, str(what) or what.__class__.__name__
+    return filename, None
+
+
+def render_jobs(jobs, workers=None, chunksize=16, cache=None):
+    """
+    Render the covers described by jobs, tuples as taken by _render_job(), in
+    a pool of worker processes (one per cpu by default; workers=1 renders in
+    this process). With a CoverCache, only covers not in the cache are drawn.
+    Generate (filename, error) tuples in completion order.
+    """
+    if workers == 1:
+        _init_worker(cache)
+        try:
+            for job in jobs:
+                yield _render_job(job)
+        finally:
+            _init_worker(None)
+        return
+    with multiprocessing.Pool(workers, _init_worker, (cache,)) as pool:
+        for result in pool.imap_unordered(_render_job, jobs, chunksize=chunksize):
+            yield result
+
+
+def render_many(dcs, out_dir, workers=None, filename=COVER_FILENAME, cover_width=400,
+                cover_height=600, branding="Project Gutenberg", chunksize=16, cache=None):
+    """
+    Draw the covers of many DublinCore objects and save them in out_dir, named
+    by filename formatted with the ebook number; the extension of filename
+    selects PNG, JPEG or WebP. The strings
+    are pulled from the DublinCore objects in this process, only they are sent
+    to the workers. With a CoverCache, only the covers whose strings changed
+    are drawn. Covers that fail are logged as warnings. Return a RenderStats
+    tuple; its rate is in covers per second.
+    """
+    def _jobs():
+        for dc in dcs:
+            yield (
+                os.path.join(out_dir, filename.format(ebook=dc.project_gutenberg_id)),
+                dc.title_no_subtitle,
+                dc.subtitle,
+                dc.authors_short(),
+                cover_width,
+                cover_height,
+                branding,
+            )
+
+    count = errors = 0
+    start = time.time()
+    for path, error in render_jobs(_jobs(), workers, chunksize, cache):
+        count += 1
+        if error is not None:
+            errors += 1
+            warning("Cannot render %s: %s", path, error)
+    return RenderStats(count, errors, time.time() - start)
+
+
 #
 # The main function allows to run the cover generation to run as a standalone
 # command-line tool. Arguments can be passed, use -h or --help to get a list
@@ -644,23 +998,15 @@ def main():
     # Helper function.
     def _draw_and_save(title, subtitle, author, filename):
         """
-        Draw a cover and write it to a file. Note that only PNG is supported.
+        Draw a cover and write it to a file as PNG, JPEG or WebP.
         """
-        cover_image = draw(title, subtitle, author)
         if filename == "-":
             assert not "Implement."
-        else:
-            _, ext = os.path.splitext(os.path.basename(filename))
-            if ext.upper() == ".PNG":
-                try:
-                    with open(filename, "wb") as f:
-                        cover_image.save(f)
-                except FileNotFoundError:
-                    print("Error opening target file " + filename)
-                    return 1
-            else:
-                print("Unsupported image file format '" + ext + "', use PNG")
-                return 1
+        job = (filename, title, subtitle, author, 400, 600, "Project Gutenberg")
+        [(filename, error)] = render_jobs([job], 1, cache=cache)
+        if error:
+            print(error)
+            return 1
         return 0
 
     # Set up and parse the command line arguments passed to the program.
@@ -670,10 +1016,19 @@ def main():
     parser.add_argument("-t", "--title", dest="title", help="Book title")
     parser.add_argument("-s", "--subtitle", dest="subtitle", help="Book subtitle", default="")
     parser.add_argument("-a", "--author", dest="author", help="Author(s) of the book")
-    parser.add_argument("-o", "--cover", dest="outfile", help="Filename of the cover image in PNG format")
+    parser.add_argument("-o", "--cover", dest="outfile", help="Filename of the cover image in PNG, JPEG or WebP format")
     parser.add_argument("-j", "--json-covers", dest="json_covers", help="JSON file containing cover information")
+    parser.add_argument("-w", "--workers", dest="workers", type=int, default=None,
+                        help="Number of processes rendering the JSON covers (default: one per cpu)")
+    parser.add_argument("-c", "--cache", dest="cache", default=None,
+                        help="Directory of cached covers, only covers not in it are drawn")
     args = parser.parse_args()
 
+    cache = None
+    if args.cache:
+        from libgutenberg.CoverCache import CoverCache
+        cache = CoverCache(args.cache)
+
     # A JSON file is given as command line parameter; ignore the other ones.
     # Read the file line by line and use the given information to generate the
     # book covers. The file contains lines of JSON maps of the format
@@ -681,19 +1036,30 @@ def main():
     #   {"authors": "..", "identifier": "..", "subtitle": null, "title": "..",
     #    "identifier_type": "Gutenberg ID", "filename": ".."}
     if args.json_covers:
+        def _jobs(f):
+            for line in f:
+                data = json.loads(line)
+                yield (
+                    data["filename"],
+                    data["title"],
+                    data["subtitle"],
+                    data["authors"],
+                    400,
+                    600,
+                    "Project Gutenberg",
+                )
         try:
             with open(args.json_covers, "r") as f:
-                for line in f:
-                    data = json.loads(line)
-                    print("Generating cover for " + data["identifier"])
-                    status = _draw_and_save(
-                        data["title"],
-                        data["subtitle"],
-                        data["authors"],
-                        data["filename"]
-                    )
-                    if status:
-                        print("Error generating book cover image, skipping")
+                count = errors = 0
+                start = time.time()
+                for filename, error in render_jobs(_jobs(f), args.workers, cache=cache):
+                    count += 1
+                    if error:
+                        errors += 1
+                        print("Error generating book cover image " + filename + ": " + error)
+                stats = RenderStats(count, errors, time.time() - start)
+                print("%d covers (%d errors) in %.2f s, %.1f covers/s" % (
+                    stats.count, stats.errors, stats.seconds, stats.rate))
             return 0
         except ValueError:
             print("Error reading from JSON file, exiting")
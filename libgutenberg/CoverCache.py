@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+CoverCache.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Content-addressed cache of generated cover images.
+
+    from libgutenberg.CoverCache import cover_cache
+    cover_cache.configure(directory='/var/cache/covers', maxbytes=2 * 1024 ** 3)
+    png = cover_cache.cover(dc)
+    cover_cache.save(dc, 'pg2600.cover.png')
+
+A cover depends only on the title, subtitle and authors, its size and the
+branding. The key is a hash of those and Cover.RENDERER_VERSION, so a changed
+title gets a new entry and a rebuild only draws the covers whose metadata
+changed; bump RENDERER_VERSION when the drawing changes. Entries are written
+atomically and can be shared by several processes. When the directory grows
+beyond maxbytes, the least recently used entries are removed.
+
+"""
+
+import hashlib
+import os
+import threading
+
+from . import Cover
+from .Logger import debug, warning
+
+DEFAULT_MAXBYTES = 1024 ** 3
+
+
+def key(title, subtitle, author, cover_width=400, cover_height=600,
+        branding="Project Gutenberg", fmt='png'):
+    """ Return the hex digest identifying a cover. """
+    digest = hashlib.sha256()
+    for part in (Cover.RENDERER_VERSION, title, subtitle or '', author,
+                 cover_width, cover_height, branding, fmt):
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class CoverCache(object):
+    """ Encoded cover images, one file per key in directory. """
+
+    def __init__(self, directory=None, maxbytes=DEFAULT_MAXBYTES):
+        self.configure(directory, maxbytes)
+
+    def configure(self, directory=None, maxbytes=DEFAULT_MAXBYTES):
+        """ Set the cache directory; directory=None disables the cache. """
+        self.directory = directory
+        self.maxbytes = maxbytes
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._size = None  # bytes in directory, counted on the first put
+        self.hits = self.misses = 0
+
+    def __getstate__(self):
+        # what worker processes need; they count the size themselves
+        return (self.directory, self.maxbytes)
+
+    def __setstate__(self, state):
+        self.directory, self.maxbytes = state
+        self._size = None
+        self.hits = self.misses = 0
+
+    def _path(self, key_, fmt='png'):
+        return os.path.join(self.directory, key_[:2], '%s.%s' % (key_, fmt))
+
+    def _entries(self):
+        """ Generate (mtime, size, path) of all entries. """
+        for subdir in os.scandir(self.directory):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.is_file() and '.tmp.' not in entry.name:
+                    stat = entry.stat()
+                    yield stat.st_mtime, stat.st_size, entry.path
+
+    def get(self, key_, fmt='png'):
+        """ Return the cached image for key_ or None. """
+        if not self.directory:
+            return None
+        path = self._path(key_, fmt)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            # the mtime records the last use for the eviction
+            os.utime(path)
+        except OSError:
+            # evicted by another process since we read it
+            pass
+        return data
+
+    def put(self, key_, data, fmt='png'):
+        """ Store the image for key_ and evict old entries if the cache is too big. """
+        if not self.directory:
+            return
+        path = self._path(key_, fmt)
+        tmp = '%s.tmp.%d.%d' % (path, os.getpid(), threading.get_ident())
+        try:
+            old_size = os.stat(path).st_size
+        except OSError:
+            old_size = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as what:
+            warning("Cannot cache cover %s: %s", key_, what)
+            return
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += len(data) - old_size
+        if self._size > self.maxbytes:
+            self.evict()
+
+    def evict(self, maxbytes=None):
+        """ Remove the least recently used entries until the cache holds
+        at most maxbytes, by default 90% of self.maxbytes. """
+        if not self.directory:
+            return
+        if maxbytes is None:
+            maxbytes = self.maxbytes * 9 // 10
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= maxbytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                # removed by another process
+                pass
+            size -= entry_size
+            removed += 1
+        self._size = size
+        debug("Evicted %d covers, %d bytes left.", removed, size)
+
+    def clear(self):
+        """ Remove all entries. """
+        if self.directory:
+            self.evict(0)
+
+    def render(self, title, subtitle, author, cover_width=400, cover_height=600,
+               branding="Project Gutenberg", cover_image=None, fmt='png'):
+        """ Return the cover as PNG (or fmt, see Cover.IMAGE_FORMATS) bytes,
+        drawing it on a miss. """
+        key_ = key(title, subtitle, author, cover_width, cover_height, branding, fmt)
+        data = self.get(key_, fmt)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+        data = Cover.draw_cover(title, subtitle, author, cover_width, cover_height, branding,
+                                cover_image=cover_image).encode(fmt)
+        self.put(key_, data, fmt)
+        return data
+
+    def cover(self, dc, cover_width=400, cover_height=600, branding="Project Gutenberg",
+              fmt='png'):
+        """ Return the cover of a DublinCore object as PNG (or fmt) bytes. """
+        return self.render(dc.title_no_subtitle, dc.subtitle, dc.authors_short(),
+                           cover_width, cover_height, branding, fmt=fmt)
+
+    def save(self, dc, filename, cover_width=400, cover_height=600,
+             branding="Project Gutenberg"):
+        """ Write the cover of a DublinCore object to filename as PNG, JPEG or
+        WebP, according to its extension. """
+        fmt = os.path.splitext(filename)[1].lower().lstrip('.')
+        if fmt not in Cover.IMAGE_FORMATS:
+            raise ValueError("Unsupported image file format '%s', use PNG, JPEG or WebP"
+                             % filename)
+        data = self.cover(dc, cover_width, cover_height, branding, fmt)
+        with open(filename, 'wb') as f:
+            f.write(data)
+
+
+cover_cache = CoverCache()
@@ -2,28 +2,27 @@ from sqlalchemy import not_
 from sqlalchemy import select
 from sqlalchemy.sql import func
 
+from libgutenberg import DCCache
 from libgutenberg import Models
 from libgutenberg import GutenbergDatabase as gdb
 from libgutenberg.Logger import info, debug, warning, error, exception
-
-if gdb.db_exists:
-    OB = gdb.Objectbase(False)
-else:
-    OB = None
+from libgutenberg.Vocabulary import vocabularies
 
 def managed_session(func):
+    """ Pass a session from GutenbergDatabase.engines unless the caller passed one. """
     def sessionize(*args, session=None):
         new_session = session is None
         session = check_session(session)
-        result = func(*args, session=session)
-        if new_session:
-            session.close()
-        return result
+        try:
+            return func(*args, session=session)
+        finally:
+            if new_session:
+                session.close()
     return sessionize
 
 def check_session(session):
     if session is None:
-        session = OB.get_session()
+        session = gdb.engines.get_session()
     return session
 
 @managed_session
@@ -52,6 +51,7 @@ def remove_ebook(ebook, session=None):
     session.query(Models.File).where(Models.File.fk_books == ebook).delete()
     session.query(Models.Book).where(Models.Book.pk == ebook).delete()
     session.commit()
+    DCCache.invalidate(ebook)
 
 @managed_session
 def remove_author(author, session=None):
@@ -73,13 +73,8 @@ def filetype_books(filetype, session=None):
 def get_lang(language, session=None):
     """ get language object from db from Struct or str """
     language = language if isinstance(language, str) else language.language
-
-    lang = session.get(Models.Lang, language)
-    if lang:
-        return lang
-    # check for the language name
-    lang = session.query(Models.Lang).where(Models.Lang.language == language).first()
-    return lang
+    # the code or the language name
+    return vocabularies.find('langs', language, session)
 
 @managed_session
 def last_ebook(session=None):
@@ -99,3 +94,55 @@ def top_books(options_top, session=None):
     return session.execute(select(Models.Book.pk).order_by(
             Models.Book.downloads.desc()).limit(options_top)).scalars().all()
 
+def iter_books(since=None, chunk=1000, load_files=True, session=None):
+    """ generate fully loaded DublinCoreObjects for the whole catalog, in ebook order
+
+    since: only books with files modified since then, like recent_books.
+    Ebook numbers are streamed from a server-side cursor in their own session; each
+    chunk is loaded with DublinCoreObject.load_many and expunged from session when the
+    next chunk is requested, so memory stays flat whatever the size of the catalog.
+    """
+    # DublinCoreMapping imports this module
+    from .DublinCoreMapping import DublinCoreObject
+
+    if since is None:
+        query = select(Models.Book.pk).order_by(Models.Book.pk)
+    else:
+        query = select(Models.File.fk_books).where(
+            not_(Models.File.archive_path.regexp_match('^cache/')),
+            Models.File.modified >= since,
+        ).distinct().order_by(Models.File.fk_books)
+
+    id_session = check_session(None)
+    new_session = session is None
+    session = check_session(session)
+    try:
+        ebooks = id_session.execute(query.execution_options(yield_per=chunk)).scalars()
+        for partition in ebooks.partitions():
+            dcs = DublinCoreObject.load_many(partition, session=session,
+                                             load_files=load_files, chunk=chunk)
+            for dc in dcs.values():
+                yield dc
+            for dc in dcs.values():
+                expunge_book(dc.book, session)
+    finally:
+        id_session.close()
+        if new_session:
+            session.close()
+
+def expunge_book(book, session):
+    """ remove a book and the rows that belong only to it from the session """
+    for obj in [book] + list(book.attributes) + list(book.authors) + list(book.files):
+        if obj in session:
+            session.expunge(obj)
+
+
+
+def __getattr__(name):
+    """ DBUtils.OB, kept for callers of DBUtils.OB.get_session(): a pooled
+    Objectbase on GutenbergDatabase.engines, or None without a database. """
+    if name == 'OB':
+        ob = gdb.Objectbase(True) if gdb.db_exists else None
+        globals()['OB'] = ob
+        return ob
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+DCCache.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Read-through cache of fully loaded DublinCoreObjects, keyed by ebook number.
+
+    from libgutenberg.DCCache import dc_cache
+    dc = dc_cache.load(2600)
+
+Records are kept as Snapshot bytes in an in-process LRU and, if configured,
+in a directory shared by several processes:
+
+    dc_cache.configure(maxsize=4096, directory='/var/cache/dc', check_stale=True)
+
+Every hit deserializes a fresh DublinCoreObject, so callers may modify it
+freely. Cached objects have no session and no book, their authors, files etc.
+are Snapshot records: they are for reading, use
+DublinCoreObject.load_from_database to edit and save a book.
+
+DublinCoreObject.save, delete, register_coverpage and the GutenbergFiles
+functions that store or remove files invalidate the entries of the books they
+touch in this process and on disk. Other processes only see the disk
+invalidation; with check_stale each hit also compares the book's updatemode
+and the number and latest mtime of its files with the values stored with the
+record, a single cheap query.
+
+"""
+
+import marshal
+import os
+import threading
+from collections import OrderedDict
+
+from .Logger import debug, warning
+
+SUFFIX = '.dc'
+
+
+class MemoryBackend(object):
+    """ LRU of serialized records. """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ebook):
+        with self._lock:
+            data = self._data.get(ebook)
+            if data is not None:
+                self._data.move_to_end(ebook)
+            return data
+
+    def set(self, ebook, data):
+        with self._lock:
+            self._data[ebook] = data
+            self._data.move_to_end(ebook)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, ebook):
+        with self._lock:
+            self._data.pop(ebook, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DiskBackend(object):
+    """ One file per record in directory. """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, ebook):
+        return os.path.join(self.directory, '%d%s' % (ebook, SUFFIX))
+
+    def get(self, ebook):
+        try:
+            with open(self._path(ebook), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, ebook, data):
+        path = self._path(ebook)
+        tmp = '%s.%d.%d' % (path, os.getpid(), threading.get_ident())
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def delete(self, ebook):
+        try:
+            os.unlink(self._path(ebook))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for filename in os.listdir(self.directory):
+            if filename.endswith(SUFFIX):
+                self.delete(int(filename[:-len(SUFFIX)]))
+
+
+def dumps(dc, fingerprint_):
+    """ Serialize a loaded DublinCoreObject with its fingerprint. """
+    return marshal.dumps((fingerprint_, dc.to_bytes()))
+
+
+def loads(data):
+    """ Return fingerprint, snapshot of a serialized record. """
+    return marshal.loads(data)
+
+
+def fingerprint(ebook, session):
+    """ Return what changes when the record of ebook gets stale, or None if there is no such book. """
+    from sqlalchemy import func, select
+    from .Models import Book, File
+
+    row = session.execute(
+        select(Book.updatemode, func.count(File.id), func.max(File.modified))
+        .outerjoin(File, File.fk_books == Book.pk)
+        .where(Book.pk == ebook)
+        .group_by(Book.pk)).first()
+    if row is None:
+        return None
+    updatemode, count, modified = row
+    return (updatemode, count, modified.isoformat() if modified else None)
+
+
+class DCCache(object):
+    """ Read-through cache of DublinCoreObjects. """
+
+    def __init__(self, maxsize=1024, directory=None, check_stale=False):
+        self.configure(maxsize, directory, check_stale)
+
+    def configure(self, maxsize=1024, directory=None, check_stale=False):
+        """ Replace the backends. directory=None keeps records in memory only. """
+        self.check_stale = check_stale
+        self.backends = [MemoryBackend(maxsize)]
+        if directory:
+            self.backends.append(DiskBackend(directory))
+        self.hits = self.misses = 0
+
+    def _get(self, ebook):
+        """ Return the serialized record of ebook or None, promoting disk hits to memory. """
+        for i, backend in enumerate(self.backends):
+            data = backend.get(ebook)
+            if data is not None:
+                for upper in self.backends[:i]:
+                    upper.set(ebook, data)
+                return data
+        return None
+
+    def put(self, dc, fingerprint_):
+        """ Store a DublinCoreObject loaded by DublinCoreObject.load_many. """
+        data = dumps(dc, fingerprint_)
+        for backend in self.backends:
+            try:
+                backend.set(dc.project_gutenberg_id, data)
+            except OSError as what:
+                warning("Cannot cache ebook #%s: %s", dc.project_gutenberg_id, what)
+
+    def invalidate(self, ebook=None):
+        """ Forget the record of ebook, or all records. """
+        for backend in self.backends:
+            try:
+                if ebook is None:
+                    backend.clear()
+                else:
+                    backend.delete(int(ebook))
+            except OSError as what:
+                warning("Cannot invalidate cached ebook #%s: %s", ebook, what)
+
+    def get(self, ebook, session=None):
+        """ Return a DublinCoreObject for ebook from the cache, or None. """
+        from .DublinCoreMapping import DublinCoreObject
+
+        ebook = int(ebook)
+        data = self._get(ebook)
+        if data is None:
+            return None
+        try:
+            fingerprint_, snapshot = loads(data)
+        except (EOFError, TypeError, ValueError):
+            warning("Cannot read cached ebook #%d.", ebook)
+            self.invalidate(ebook)
+            return None
+        if self.check_stale and session is not None and fingerprint(ebook, session) != fingerprint_:
+            debug("Cached ebook #%d is stale.", ebook)
+            self.invalidate(ebook)
+            return None
+        try:
+            return DublinCoreObject.from_bytes(snapshot)
+        except ValueError as what:
+            # written by a newer version
+            warning("Cannot read cached ebook #%d: %s", ebook, what)
+            return None
+
+    def load(self, ebook, session=None):
+        """ Return the DublinCoreObject of ebook from the cache or the database, or None. """
+        from . import DBUtils
+        from .DublinCoreMapping import DublinCoreObject
+
+        ebook = int(ebook)
+        new_session = session is None and self.check_stale
+        if new_session:
+            session = DBUtils.check_session(None)
+        try:
+            dc = self.get(ebook, session=session)
+            if dc is not None:
+                self.hits += 1
+                return dc
+            self.misses += 1
+
+            if session is None:
+                new_session = True
+                session = DBUtils.check_session(None)
+            fingerprint_ = fingerprint(ebook, session)
+            if fingerprint_ is None:
+                return None
+            loaded = DublinCoreObject.load_many([ebook], session=session).get(ebook)
+            if loaded is None:
+                return None
+            self.put(loaded, fingerprint_)
+            return self.get(ebook)
+        finally:
+            if new_session:
+                session.close()
+
+
+dc_cache = DCCache()
+
+
+def invalidate(ebook=None):
+    """ Forget the cached record of ebook, or all records. """
+    dc_cache.invalidate(ebook)
@@ -15,19 +15,16 @@ DublinCore metadata swiss army knife.
 
 from __future__ import unicode_literals
 
+import codecs
 import datetime
+import functools
 import json
+import os
 import re
 import textwrap
 import unicodedata
 from gettext import gettext as _
 
-import six
-import lxml
-from lxml.builder import ElementMaker
-
-import pycountry
-
 from . import GutenbergGlobals as gg
 from .GutenbergGlobals import NS, Struct, xpath, ROLES, TITLE_SPLITTER as title_splitter
 from .Logger import critical, debug, error, exception, info, warning
@@ -56,6 +53,7 @@ class _HTML_Writer(object):
     """
 
     def __init__(self):
+        from lxml.builder import ElementMaker
         self.metadata = [
             ElementMaker().link(rel="schema.dc", href="http://purl.org/dc/elements/1.1/"),
             ElementMaker().link(rel="schema.dcterms", href="http://purl.org/dc/terms/"),
@@ -73,6 +71,7 @@ class _HTML_Writer(object):
         if literal is None:
             return
         literal = re.sub(r'\s*[\r\n]+\s*', '&#10;', literal)
+        from lxml.builder import ElementMaker
         params = {'name' : self._what(what), 'content': literal}
         self.metadata.append(ElementMaker().meta(**params))
 
@@ -80,6 +79,7 @@ class _HTML_Writer(object):
         """ Write <link rel=what href=uri> """
         if uri is None:
             return
+        from lxml.builder import ElementMaker
         self.metadata.append(ElementMaker().link(
                 rel = self._what(what), href = str(uri)))
 
@@ -129,6 +129,7 @@ class PubInfo(object):
         if self.place:
             place = self.place
         elif self.country:
+            import pycountry # slow, only needed here
             place = pycountry.countries.get(alpha_2=self.country)
             place = place.name if place else self.country
         else:
@@ -145,6 +146,12 @@ class PubInfo(object):
 
 # file extension we hope to be able to parse
 RE_MARC_SUBFIELD = re.compile(r"\$[a-z]")
+RE_NAME_PARTICLES = re.compile(r'\b(?:De|Le|La)\b')
+RE_NAME_SPACES = re.compile(r'\s\s+')
+RE_NAME_EMPTY_COMMA = re.compile(r'\s*,\s*,')
+RE_NAME_COMMAS = re.compile(r',+')
+RE_NAME_BRACKETS = re.compile(r'\s*\[.*?\]\s*')
+RE_NAME_LAST_WORD = re.compile(r'^(.+?)\s+([-\'\w]+)$', re.I)
 RE_MARC_SPSEP = re.compile(r"[\n ](,|:)([A-Za-z0-9])")
 
 
@@ -354,6 +361,8 @@ class DublinCore(object):
     def to_html(self):
         """ Return a <html:head> element with DC metadata. """
 
+        from lxml.builder import ElementMaker
+
         w = _HTML_Writer()
         self.feed_to_writer(w)
 
@@ -389,23 +398,22 @@ class DublinCore(object):
         # debug("%s: %s" % (role, names))
 
         # lowercase De Le La
-        for i in 'De Le La'.split():
-            name = re.sub(r'\b%s\b' % i, i.lower(), name)
+        name = RE_NAME_PARTICLES.sub(lambda m: m.group(0).lower(), name)
 
         name = name.replace('\\', '')   # remove \ (escape char in RST)
-        name = re.sub(r'\s\s+', ' ', name)
-        name = re.sub(r'\s*,\s*,', ',', name)
-        name = re.sub(r',+', ',', name)
+        name = RE_NAME_SPACES.sub(' ', name)
+        name = RE_NAME_EMPTY_COMMA.sub(',', name)
+        name = RE_NAME_COMMAS.sub(',', name)
         name = name.replace(',M.D.', '')
 
-        name = re.sub(r'\s*\[.*?\]\s*', ' ', name) # [pseud.]
+        name = RE_NAME_BRACKETS.sub(' ', name) # [pseud.]
         name = name.strip()
         if len(name) == 0:
             return
 
         # lastname, firstname middlename
         if ',' not in name:
-            m = re.match(r'^(.+?)\s+([-\'\w]+)$', name, re.I)
+            m = RE_NAME_LAST_WORD.match(name)
             if m:
                 name = "%s, %s" % (m.group(2), m.group(1))
 
@@ -523,6 +531,426 @@ def handle_dc_languages(dc, text):
                 pass
 
 
+RE_AUTHOR_NEWLINE = re.compile(r'\s*\n\s*')
+RE_AUTHOR_AND = re.compile(r'[,\s]+and\b')
+RE_AUTHOR_ET_UND = re.compile(r'\b(?:et|und)\b')
+RE_AUTHOR_JR = re.compile(r'[\s,]+Jr\.?(\s+|$)')
+RE_RELEASE_DATE = re.compile(r'^(.*?)\s*\[')
+RE_DATE_SEPARATORS = re.compile(r'[,\s]+')
+RE_EBOOK_NO = re.compile(r'#(\d+)\]')
+RE_LEADING_NUMBER = re.compile(r'(\d+)')
+
+def head_lines(data, n):
+    """ Return data.splitlines()[:n] without splitting all of data. """
+    pos = 0
+    for dummy_i in range(n):
+        pos = data.find('\n', pos) + 1
+        if pos == 0:
+            return data.splitlines()[:n]
+    # every \n ends a line, other line boundaries only make more lines
+    return data[:pos].splitlines()[:n]
+
+
+HEADER_CHUNK = 64 * 1024
+HEADER_MAX = 4 * 1024 * 1024  # characters to read before giving up on the end of a header
+
+def read_pgheader(fileobj, encoding='utf-8', errors='strict'):
+    """ Read the part of a PG file that load_from_pgheader looks at.
+
+    Reads fileobj (binary or text) in chunks: all of a json file, else from
+    <body (html only) to the START OF line or line 300, but no more than
+    HEADER_MAX characters. """
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    eof = False
+
+    def more():
+        nonlocal eof
+        chunk = fileobj.read(HEADER_CHUNK)
+        eof = not chunk
+        if isinstance(chunk, bytes):
+            return decoder.decode(chunk, final=eof)
+        return chunk
+
+    text = more()
+    while not text and not eof:
+        text = more()
+
+    if text[:1] == '{':
+        # json isn't line based
+        chunks = [text]
+        while not eof:
+            chunks.append(more())
+        return ''.join(chunks)
+
+    size = len(text)
+    if text.lstrip('\ufeff \t\r\n')[:1] == '<':
+        # only look in body; sometimes head is really long
+        chunks = [text]
+        window = text
+        pos = window.find('<body')
+        while pos < 0 and not eof and size < HEADER_MAX:
+            chunk = more()
+            size += len(chunk)
+            chunks.append(chunk)
+            window = window[-len('<body') + 1:] + chunk
+            pos = window.find('<body')
+        text = window[pos:] if pos >= 0 else ''.join(chunks)
+
+    chunks = [text]
+    window = text
+    newlines = text.count('\n')
+    while not eof and 'START OF' not in window and newlines < 300 and size < HEADER_MAX:
+        chunk = more()
+        size += len(chunk)
+        newlines += chunk.count('\n')
+        chunks.append(chunk)
+        window = window[-len('START OF') + 1:] + chunk
+    return ''.join(chunks)
+
+
+class PGHeaderParser(object):
+    """ Parse the metadata header of Project Gutenberg files into a GutenbergDublinCore.
+
+    The dispatch tables are built once; the parser keeps no state between
+    calls and may be shared between threads. Use the module instance:
+
+        pgheader_parser.parse(dc, data)
+        for dc in pgheader_parser.parse_many(texts):
+            ...
+    """
+
+    ALIASES = {
+        'language':               'languages',
+        'subject':                'subjects',
+        'loc class':              'loccs',
+        'loc classes':            'loccs',
+        'content':                'contents',
+        'note' :                  'notes',
+        'character set encoding': 'encoding',
+        'copyright':              'rights',
+        'alternate title':        'alt_title',
+        'created':                'source_publication_years',
+        'produced by':            'credit',
+        'publisher_place':        'place',
+    }
+
+    def __init__(self, inverse_role_map):
+        self.inverse_role_map = inverse_role_map
+        self.dispatcher = {
+            'title':        self.handle_title,
+            'subtitle':     self.handle_title,
+            'author':       self.handle_authors,
+            'release date': self.handle_release_date,
+            'languages':    self.handle_languages,
+            'subjects':     self.handle_subject,
+            'loccs':        self.handle_locc,
+            'edition':      self.store,
+            'contents':     self.store,
+            'notes':        self.store,
+            'encoding':     self.store,
+            'rights':       self.store,
+            'alt_title':    self.store,
+            'creator_role':  self.handle_creators,
+            'scans_archive_url': self.handle_scan_urls,
+            'credit':       self.store,
+            'publisher':    self.handle_pubinfo,
+            'publisher_country': self.handle_pubinfo,
+            'place':        self.handle_pubinfo,
+            'source_publication_years': self.handle_pubinfo,
+            'ebook_number': self.handle_ebook_no,
+            'request_key':  self.store,
+            'original publication': self.handle_pubinfo,
+        }
+        for role in inverse_role_map:
+            self.dispatcher[role] = self.handle_authors
+        # header keys repeat a lot; remember how they resolve
+        self.get_dispatcher = functools.lru_cache(maxsize=4096)(self._get_dispatcher)
+
+
+    @staticmethod
+    def handle_title(dc, key, value):
+        value = dc.format_title(value) # straighten quotes, make one line
+
+        if key == 'title' and ' : ' in value:
+            [value, dc.subtitle] = value.split(' : ', maxsplit=1)
+
+        setattr(dc, key, value)
+
+
+    @staticmethod
+    def handle_authors(dc, role, names):
+        """ Handle Author:, Illustrator: etc. line
+
+        Examples of lines we handle are:
+
+        Author: Lewis Carroll, Mark Twain and Chuck Norris
+        Illustrator: Jack Tenniel
+
+        """
+        try:
+            marcrel = dc.inverse_role_map[role]
+        except KeyError:
+            warning('%s is not a supported marc role', role)
+            return
+
+        # replace 'and' with ',' and remove
+        # superfluous white space around ','
+        names = RE_AUTHOR_NEWLINE.sub(',', names)
+        names = RE_AUTHOR_AND.sub(',', names)
+        names = RE_AUTHOR_ET_UND.sub(',', names)
+        # prevent authors names "Jr."
+        names = RE_AUTHOR_JR.sub(' Jr. ', names)
+
+        for name in names.split(','):
+            dc.add_author(name, marcrel)
+
+
+    @staticmethod
+    def handle_release_date(dc, dummy_prefix, date):
+        """ Scan Release date: line.
+        NOTE this field is now ignored; """
+
+        m = RE_RELEASE_DATE.match(date)
+        if m:
+            date = m.group(1)
+            date = date.strip()
+            date = RE_DATE_SEPARATORS.sub(' ', date)
+            for f in ('%B %d %Y', '%B %Y', '%b %d %Y', '%b %Y', '%Y-%m-%d'):
+                try:
+                    dc.release_date = datetime.datetime.strptime(date, f).date()
+                    break
+                except ValueError:
+                    pass
+
+            if dc.release_date == datetime.date.min:
+                error("Cannot understand date: %s", date)
+                return
+
+
+    @staticmethod
+    def handle_ebook_no(dc, key, text):
+        """ Scan ebook no. """
+
+        m = RE_EBOOK_NO.search(text)
+        m = m if m else RE_LEADING_NUMBER.match(text)
+        if m and not dc.project_gutenberg_id:
+            dc.project_gutenberg_id = int(m.group(1))
+
+
+    @staticmethod
+    def handle_languages(dc, dummy_prefix, text):
+        handle_dc_languages(dc, text)
+
+
+    @staticmethod
+    def handle_subject(dc, dummy_prefix, suffix):
+        """ Handle subject. """
+        subject = Struct()
+        subject.id = None
+        subject.subject = suffix
+        dc.subjects.append(subject)
+
+
+    @staticmethod
+    def handle_locc(dc, dummy_prefix, suffix):
+        """ Handle locc. """
+        locc = Struct()
+        locc.id = None
+        locc.locc = suffix
+        dc.loccs.append(locc)
+
+
+    @staticmethod
+    def handle_creators(dc, key, value):
+        if isinstance(value, dict):
+            value = [value]
+        elif isinstance(value, list):
+            pass
+        else:
+            error('%s is not a valid creator', value)
+            return
+        for creator in value:
+            try:
+                marcrel = dc.inverse_role_map[creator['role']]
+            except KeyError:
+                warning('%s is not a supported marc role', creator['role'])
+                marcrel = 'cre'
+            dc.add_author(creator['name'], marcrel)
+
+
+    @staticmethod
+    def handle_scan_urls(dc, key, value):
+        if isinstance(value, str):
+            value = [value]
+        elif isinstance(value, list):
+            pass
+        else:
+            error('%s is not a valid scanurl', value)
+            return
+        for scan_url in value:
+            dc.scan_urls.add(scan_url)
+
+
+    @staticmethod
+    def handle_pubinfo(dc, key, value):
+        if key == 'publisher':
+            dc.pubinfo.publisher = value
+        elif key == 'publisher_country':
+            dc.pubinfo.country = value
+        elif key == 'place':
+            dc.pubinfo.place = value
+        elif key == 'source_publication_years':
+            value = [value] if isinstance(value, str) else value
+            if not isinstance(value, list):
+                warning('%s is not a list of event:year pair', value)
+                return
+            for event_year in value:
+                if ':' in event_year:
+                    [event, year] = event_year.split(':')
+                    dc.pubinfo.years.append((event, year))
+                elif event_year:
+                    warning('assuming %s is a copyright year', event_year)
+                    dc.pubinfo.years.append(('copyright', event_year))
+        elif key == 'original publication':
+            dc.pubinfo.raw_info_str = value
+
+
+    @staticmethod
+    def nothandled(dc, key, value):
+        info('key %s, value %s not handled', key, value)
+
+
+    @staticmethod
+    def store(dc, prefix, suffix):
+        """ Store into attribute. """
+        # debug("store: %s %s" % (prefix, suffix))
+        setattr(dc, prefix, suffix)
+
+
+    def scan_txt(self, dc, data):
+        last_prefix = None
+        buf = ''
+
+        # only look in body; sometimes head is really long
+        pos = data.find("<body")
+        if pos > 0:
+            data = data[pos:]
+
+        for line in head_lines(data, 300):
+            line = line.strip(' %') # TeX comments
+            # debug("Line: %s" % line)
+
+            if dc.project_gutenberg_id is None:
+                self.handle_ebook_no(dc, None, line.strip())
+
+            if last_prefix and len(line) == 0:
+                self.dispatch(dc, last_prefix, buf)
+                last_prefix = None
+                buf = ''
+                continue
+
+            if 'START OF' in line:
+                if last_prefix:
+                    self.dispatch(dc, last_prefix, buf)
+                break
+
+            prefix, sep, suffix = line.partition(':')
+            if sep:
+                prefix, dispatcher = self.get_dispatcher(prefix)
+                if dispatcher != self.nothandled:
+                    if last_prefix:
+                        self.dispatch(dc, last_prefix, buf)
+                    last_prefix = prefix
+                    buf = suffix
+                    continue
+
+            buf += '\n' + line
+
+            line = line.lower()
+            if ('audiobooksforfree' in line or
+                'literalsystems' in line or
+                'librivox' in line or
+                'human reading of an ebook' in line):
+                if 'Sound' not in dc.categories:
+                    dc.categories.append('Sound')
+
+            if 'copyrighted project gutenberg' in line:
+                dc.rights = 'Copyrighted.'
+
+
+    def scan_json(self, dc, data):
+        pg_json = json.loads(data)
+        record = pg_json['DATA']
+        record = record[0] if isinstance(record, list) else record
+        self.store(dc, 'encoding', 'utf-8')
+        for key, val in record.items():
+            key = key.lower()
+            self.dispatch(dc, key, val)
+
+
+    def _get_dispatcher(self, key):
+        key = key.lower().strip()
+        key = 'creator_role' if key == "contributor" else key
+        aliases = self.ALIASES
+        dispatcher = self.dispatcher
+        key = aliases.get(key, key)
+        dispatcher_method = dispatcher.get(key, None)
+        if not dispatcher_method:
+            dispatcher_method = aliases.get(key.strip('s'), None)
+        if not dispatcher_method:
+            key = key.strip('s')
+            dispatcher_method = dispatcher.get(key, None)
+        if not dispatcher_method:
+            dispatcher_method = aliases.get(key.strip('s'), self.nothandled)
+        return key, dispatcher_method
+
+
+    def dispatch(self, dc, key, val):
+        val = unicodedata.normalize('NFC', val).strip() if isinstance(val, str) else val
+        key, dispatcher_method = self.get_dispatcher(key)
+        try:
+            dispatcher_method(dc, key, val)
+        except ValueError:
+            warning('This is not a valid Project Gutenberg metadata key: %s' % key)
+
+
+    def parse(self, dc, data):
+        """ Load the header in data (text, html or json) into dc. """
+        dc.publisher = 'Project Gutenberg'
+        dc.rights = 'Public Domain in the USA.'
+
+        if data and data[0] == '{':
+            #assume json
+            self.scan_json(dc, data)
+        else:
+            # scan this text file
+            self.scan_txt(dc, data)
+
+        if dc.project_gutenberg_id is None:
+            info('There is no  Project Gutenberg eBook number for this book in the source file.')
+            if not dc.title:
+                raise ValueError('This may not be a Project Gutenberg eBook file.')
+
+
+    def parse_many(self, datas, factory=None):
+        """ Generate a GutenbergDublinCore for each header in datas.
+
+        Generates None for data that is not a Project Gutenberg ebook. """
+        factory = factory or GutenbergDublinCore
+        for data in datas:
+            dc = factory()
+            try:
+                self.parse(dc, data)
+            except ValueError as what:
+                warning('%s', what)
+                dc = None
+            yield dc
+
+
+pgheader_parser = PGHeaderParser(DublinCore.inverse_role_map)
+
+
 class GutenbergDublinCore(DublinCore):
     """ Parse from PG files. """
 
@@ -550,6 +978,19 @@ class GutenbergDublinCore(DublinCore):
         self.canonical_url = re.sub(r'^http:', 'https:', self.is_format_of) + '/'
 
 
+    def to_bytes(self):
+        """ Return a compact snapshot of this object, see Snapshot. """
+        from . import Snapshot
+        return Snapshot.to_bytes(self)
+
+
+    @classmethod
+    def from_bytes(cls, data):
+        """ Return a new object loaded from a snapshot made by to_bytes. """
+        from . import Snapshot
+        return Snapshot.from_bytes(data, cls)
+
+
     def feed_to_writer(self, writer):
         """ Pipe metadata into writer. """
 
@@ -588,10 +1029,12 @@ class GutenbergDublinCore(DublinCore):
         ## Worst method. Use as last resort only.
         ## first strip markup, leaving only text
 
+        import lxml.etree
+
         for body in xpath(parser.xhtml, "//xhtml:body"):
             self.load_from_pgheader(lxml.etree.tostring(body,
-                                                          encoding = six.text_type,
-                                                          method = 'text'))
+                                                        encoding = str,
+                                                        method = 'text'))
 
 
     def load_from_rstheader(self, data):
@@ -677,304 +1120,33 @@ class GutenbergDublinCore(DublinCore):
         When a parser is supplied, data from the parser is used
 
         """
+        parser = pgheader_parser
+        if self.inverse_role_map is not parser.inverse_role_map:
+            parser = PGHeaderParser(self.inverse_role_map)
+        parser.parse(self, data)
 
-        def handle_title(self, key, value):
-            value = self.format_title(value) # straighten quotes, make one line
-
-            if key == 'title' and ' : ' in value:
-                [value, self.subtitle] = value.split(' : ', maxsplit=1)
-
-            setattr(self, key, value)
-
-
-        def handle_authors(self, role, names):
-            """ Handle Author:, Illustrator: etc. line
-
-            Examples of lines we handle are:
-
-            Author: Lewis Carroll, Mark Twain and Chuck Norris
-            Illustrator: Jack Tenniel
-
-            """
-            try:
-                marcrel = self.inverse_role_map[role]
-            except KeyError:
-                warning('%s is not a supported marc role', role)
-                return
-
-            # replace 'and' with ',' and remove
-            # superfluous white space around ','
-            names = re.sub(r'\s*\n\s*',  ',', names)
-            names = re.sub(r'[,\s]+and\b',   ',', names)
-            names = re.sub(r'\bet\b',    ',', names)
-            names = re.sub(r'\bund\b',   ',', names)
-            # prevent authors names "Jr."
-            names = re.sub(r'[\s,]+Jr\.?(\s+|$)', ' Jr. ', names)
-
-            for name in names.split(','):
-                self.add_author(name, marcrel)
-
-
-        def handle_release_date(self, dummy_prefix, date):
-            """ Scan Release date: line.
-            NOTE this field is now ignored; """
-
-            m = re.match(r'^(.*?)\s*\[', date)
-            if m:
-                date = m.group(1)
-                date = date.strip()
-                date = re.sub(r'[,\s]+', ' ', date)
-                for f in ('%B %d %Y', '%B %Y', '%b %d %Y', '%b %Y', '%Y-%m-%d'):
-                    try:
-                        self.release_date = datetime.datetime.strptime(date, f).date()
-                        break
-                    except ValueError:
-                        pass
-
-                if self.release_date == datetime.date.min:
-                    error("Cannot understand date: %s", date)
-                    return
-
-
-        def handle_ebook_no(self, key, text):
-            """ Scan ebook no. """
 
-            m = re.search(r'#(\d+)\]', text)
-            m = m if m else re.match(r'(\d+)', text)
-            if m and not self.project_gutenberg_id:
-                self.project_gutenberg_id = int(m.group(1))
-
-
-        def handle_languages(self, dummy_prefix, text):
-            handle_dc_languages(self, text)
-
-
-        def handle_subject(self, dummy_prefix, suffix):
-            """ Handle subject. """
-            subject = Struct()
-            subject.id = None
-            subject.subject = suffix
-            self.subjects.append(subject)
-
-
-        def handle_locc(self, dummy_prefix, suffix):
-            """ Handle locc. """
-            locc = Struct()
-            locc.id = None
-            locc.locc = suffix
-            self.loccs.append(locc)
-
-
-        def handle_creators(self, key, value):
-            if isinstance(value, dict):
-                value = [value]
-            elif isinstance(value, list):
-                pass
-            else:
-                error('%s is not a valid creator', value)
-                return
-            for creator in value:
-                try:
-                    marcrel = self.inverse_role_map[creator['role']]
-                except KeyError:
-                    warning('%s is not a supported marc role', creator['role'])
-                    marcrel = 'cre'
-                self.add_author(creator['name'], marcrel)
-
-
-        def handle_scan_urls(self, key, value):
-            if isinstance(value, str):
-                value = [value]
-            elif isinstance(value, list):
-                pass
-            else:
-                error('%s is not a valid scanurl', value)
-                return
-            for scan_url in value:
-                self.scan_urls.add(scan_url)
-
-
-        def handle_pubinfo(self, key, value):
-            if key == 'publisher':
-                self.pubinfo.publisher = value
-            elif key == 'publisher_country':
-                self.pubinfo.country = value
-            elif key == 'place':
-                self.pubinfo.place = value
-            elif key == 'source_publication_years':
-                value = [value] if isinstance(value, str) else value
-                if not isinstance(value, list):
-                    warning('%s is not a list of event:year pair', value)
-                    return
-                for event_year in value:
-                    if ':' in event_year:
-                        [event, year] = event_year.split(':')
-                        self.pubinfo.years.append((event, year))
-                    elif event_year:
-                        warning('assuming %s is a copyright year', event_year)
-                        self.pubinfo.years.append(('copyright', event_year))
-            elif key == 'original publication':
-                self.pubinfo.raw_info_str = value
-
-
-        def nothandled(self, key, value):
-            info('key %s, value %s not handled', key, value)
-
-
-        def store(self, prefix, suffix):
-            """ Store into attribute. """
-            # debug("store: %s %s" % (prefix, suffix))
-            setattr(self, prefix, suffix)
-
-
-        def scan_txt(self, data):
-            last_prefix = None
-            buf = ''
-
-            # only look in body; sometimes head is really long
-            pos = data.find("<body")
-            if pos > 0:
-                data = data[pos:]
-
-            for line in data.splitlines()[:300]:
-                line = line.strip(' %') # TeX comments
-                # debug("Line: %s" % line)
-
-                if self.project_gutenberg_id is None:
-                    handle_ebook_no(self, None, line.strip())
-
-                if last_prefix and len(line) == 0:
-                    dispatch(self, last_prefix, buf)
-                    last_prefix = None
-                    buf = ''
-                    continue
-
-                if re.search('START OF', line):
-                    if last_prefix:
-                        dispatch(self, last_prefix, buf)
-                    break
-
-                prefix, sep, suffix = line.partition(':')
-                if sep:
-                    prefix, dispatcher = get_dispatcher(prefix)
-                    if dispatcher != nothandled:
-                        if last_prefix:
-                            dispatch(self, last_prefix, buf)
-                        last_prefix = prefix
-                        buf = suffix
-                        continue
-
-                buf += '\n' + line
-
-                line = line.lower()
-                if ('audiobooksforfree' in line or
-                    'literalsystems' in line or
-                    'librivox' in line or
-                    'human reading of an ebook' in line):
-                    if 'Sound' not in self.categories:
-                        self.categories.append('Sound')
-
-                if 'copyrighted project gutenberg' in line:
-                    self.rights = 'Copyrighted.'
-
-
-        def scan_json(self, data):
-            pg_json = json.loads(data)
-            record = pg_json['DATA']
-            record = record[0] if isinstance(record, list) else record
-            store(self, 'encoding', 'utf-8')
-            for key, val in record.items():
-                key = key.lower()
-                dispatch(self, key, val)
-
-
-        def get_dispatcher(key):
-            key = key.lower().strip()
-            key = 'creator_role' if key == "contributor" else key
-            key = aliases.get(key, key)
-            dispatcher_method = dispatcher.get(key, None)
-            if not dispatcher_method:
-                dispatcher_method = aliases.get(key.strip('s'), None)
-            if not dispatcher_method:
-                key = key.strip('s')
-                dispatcher_method = dispatcher.get(key, None)
-            if not dispatcher_method:
-                dispatcher_method = aliases.get(key.strip('s'), nothandled)
-            return key, dispatcher_method
-
-
-        def dispatch(self, key, val):
-            val = unicodedata.normalize('NFC', val).strip() if isinstance(val, str) else val
-            key, dispatcher_method = get_dispatcher(key)
-            try:
-                dispatcher_method(self, key, val)
-            except ValueError:
-                warning('This is not a valid Project Gutenberg metadata key: %s' % key)
-
-
-        dispatcher = {
-            'title':        handle_title,
-            'subtitle':     handle_title,
-            'author':       handle_authors,
-            'release date': handle_release_date,
-            'languages':    handle_languages,
-            'subjects':     handle_subject,
-            'loccs':        handle_locc,
-            'edition':      store,
-            'contents':     store,
-            'notes':        store,
-            'encoding':     store,
-            'rights':       store,
-            'alt_title':    store,
-            'creator_role':  handle_creators,
-            'scans_archive_url': handle_scan_urls,
-            'credit':       store,
-            'publisher':    handle_pubinfo,
-            'publisher_country': handle_pubinfo,
-            'place':        handle_pubinfo,
-            'source_publication_years': handle_pubinfo,
-            'ebook_number': handle_ebook_no,
-            'request_key':  store,
-            'original publication': handle_pubinfo,
-            }
-
-        aliases = {
-            'language':               'languages',
-            'subject':                'subjects',
-            'loc class':              'loccs',
-            'loc classes':            'loccs',
-            'content':                'contents',
-            'note' :                  'notes',
-            'character set encoding': 'encoding',
-            'copyright':              'rights',
-            'alternate title':        'alt_title',
-            'created':                'source_publication_years',
-            'produced by':            'credit',
-            'publisher_place':        'place',
-            }
-
-        for role in list(self.inverse_role_map.keys()):
-            dispatcher[role] = handle_authors
-
-        self.publisher = 'Project Gutenberg'
-        self.rights = 'Public Domain in the USA.'
-
-        if data and data[0] == '{':
-            #assume json
-            scan_json(self, data)
+    def load_from_pgheader_file(self, path_or_fileobj, encoding='utf-8'):
+        """ Load DublinCore from a Project Gutenberg ebook file, reading only its header. """
+        if isinstance(path_or_fileobj, (str, os.PathLike)):
+            with open(path_or_fileobj, 'rb') as fileobj:
+                data = read_pgheader(fileobj, encoding)
         else:
-            # scan this text file
-            scan_txt(self, data)
+            data = read_pgheader(path_or_fileobj, encoding)
+        self.load_from_pgheader(data)
 
-        if self.project_gutenberg_id is None:
-            info('There is no  Project Gutenberg eBook number for this book in the source file.')
-            if not self.title:
-                raise ValueError('This may not be a Project Gutenberg eBook file.')
 
+def __getattr__(name):
+    """ Import PGDCObject on first use, it pulls in the ORM.
 
-# use PGDCObject if you want a DublinCoreObject that uses a database if available
-try:
-    from .DublinCoreMapping import DublinCoreObject as PGDCObject
-except ImportError:
-    # no database
-    PGDCObject = GutenbergDublinCore
+    Use PGDCObject if you want a DublinCoreObject that uses a database if available.
+    """
+    if name == 'PGDCObject':
+        try:
+            from .DublinCoreMapping import DublinCoreObject as pgdcobject
+        except ImportError:
+            # no database
+            pgdcobject = GutenbergDublinCore
+        globals()['PGDCObject'] = pgdcobject
+        return pgdcobject
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -20,8 +20,12 @@ from __future__ import unicode_literals
 import datetime
 import re
 import unicodedata
+from sqlalchemy import select
 from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import contains_eager, defer, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from . import DCCache
 from . import DublinCore
 from . import GutenbergGlobals as gg
 from . import GutenbergDatabase
@@ -30,13 +34,95 @@ from .DBUtils import get_lang
 from .GutenbergGlobals import Struct, PG_URL
 from .Logger import debug, error, info, warning
 from .GutenbergDatabase import DatabaseError, IntegrityError, Objectbase
-from .Models import (Alias, Attribute, Author, Book, BookAuthor, Category, File, Locc,
-    Role, Subject)
+from .Models import (Alias, Attribute, Author, Book, BookAuthor, Category, Encoding, File,
+                     Filetype, Role)
+from .Vocabulary import vocabularies
 
 RE_YEARS = re.compile(r'(.*)([12]\d\d\d)') # no years before 1000
 RE_CRLF = re.compile(r'[\n\r]+', flags=re.M)
 RE_PLACE = re.compile(r'^\[?([\w\. ]*):')
 
+def book_loader_options(files_and_authors=True):
+    """ eager loading options that fetch everything load_from_database needs
+
+    With these, a query for many books costs a fixed number of IN-list queries
+    instead of a couple of queries per book. files_and_authors=False leaves
+    Book.files and Book.authors to load_book_files and load_book_authors.
+    """
+    options = (
+        selectinload(Book.attributes).joinedload(Attribute.attribute_type),
+        selectinload(Book.langs),
+        selectinload(Book.subjects),
+        selectinload(Book.bookshelves),
+        selectinload(Book.loccs),
+        selectinload(Book.categories),
+    )
+    if files_and_authors:
+        options += (
+            selectinload(Book.authors).joinedload(BookAuthor.author).selectinload(Author.webpages),
+            selectinload(Book.files),
+        )
+    return options
+
+
+def book_files_select(ebooks):
+    """ select the files Book.files has, with the filetype and encoding sortorders by join
+
+    File.ftsortorder and File.encsortorder are correlated subqueries, run for
+    every row in the select list and again in the ORDER BY of the relationship.
+    """
+    return (
+        select(File, Filetype.sortorder, Encoding.sortorder)
+        .outerjoin(Filetype, Filetype.pk == File.fk_filetypes)
+        .outerjoin(Encoding, Encoding.pk == File.fk_encodings)
+        .where(File.fk_books.in_(ebooks), File.obsoleted == 0, File.diskstatus == 0)
+        .order_by(File.fk_books, Filetype.sortorder, Encoding.sortorder, File.fk_filetypes,
+                  File.fk_encodings, File.compression, File.archive_path)
+        .options(defer(File.ftsortorder), defer(File.encsortorder),
+                 contains_eager(File.file_type))
+    )
+
+
+def book_authors_select(ebooks):
+    """ select the rows Book.authors has, with role and name by join
+
+    BookAuthor.role and BookAuthor.name are correlated subqueries like the
+    File sortorders.
+    """
+    return (
+        select(BookAuthor, Role.role, Author.name)
+        .join(Role, Role.pk == BookAuthor.fk_roles)
+        .join(Author, Author.id == BookAuthor.fk_authors)
+        .where(BookAuthor.fk_books.in_(ebooks))
+        .order_by(BookAuthor.fk_books, BookAuthor.heading, Role.role, Author.name)
+        .options(defer(BookAuthor.role), defer(BookAuthor.name),
+                 contains_eager(BookAuthor.author).options(
+                     selectinload(Author.aliases), selectinload(Author.webpages)))
+    )
+
+
+def load_book_files(session, books):
+    """ load Book.files of books with one query, keeping the attribute API of File """
+    files = {book.pk: [] for book in books}
+    for file_, ftsortorder, encsortorder in session.execute(book_files_select(list(files))):
+        # populated like the loader does, set_committed_value costs more than the query
+        file_.__dict__['ftsortorder'] = ftsortorder
+        file_.__dict__['encsortorder'] = encsortorder
+        files[file_.fk_books].append(file_)
+    for book in books:
+        set_committed_value(book, 'files', files[book.pk])
+
+
+def load_book_authors(session, books):
+    """ load Book.authors of books with one query, keeping the attribute API of BookAuthor """
+    authors = {book.pk: [] for book in books}
+    for book_author, role, name in session.execute(book_authors_select(list(authors))):
+        book_author.__dict__['role'] = role
+        book_author.__dict__['name'] = name
+        authors[book_author.fk_books].append(book_author)
+    for book in books:
+        set_committed_value(book, 'authors', authors[book.pk])
+
 class DublinCoreObject(DublinCore.GutenbergDublinCore):
     """ Augment GutenbergDublinCore class. """
 
@@ -99,8 +185,46 @@ class DublinCoreObject(DublinCore.GutenbergDublinCore):
             session.commit()
         return self.book
 
+    @classmethod
+    def load_many(cls, ebooks, session=None, load_files=True, chunk=500):
+        """ Load many books with a fixed number of queries per chunk of ebook numbers.
+
+        Returns a dict ebook number -> DublinCoreObject, in the order of ebooks.
+        Ebooks not in the database are left out. All objects share one session.
+        """
+        if session is None:
+            session = cls().get_my_session()
+        ebooks = [int(ebook) for ebook in ebooks]
+        books = {}
+        for i in range(0, len(ebooks), chunk):
+            query = select(Book).where(Book.pk.in_(ebooks[i:i + chunk]))
+            query = query.options(*book_loader_options(files_and_authors=False))
+            loaded = session.execute(query).scalars().all()
+            load_book_authors(session, loaded)
+            if load_files:
+                load_book_files(session, loaded)
+            for book in loaded:
+                books[book.pk] = book
+
+        dcs = {}
+        for ebook in ebooks:
+            if ebook not in books:
+                warning('no book for %s', ebook)
+                continue
+            dc = cls(session=session)
+            dc.project_gutenberg_id = ebook
+            dc.book = books[ebook]
+            dc.load_from_book(load_files=load_files)
+            dcs[ebook] = dc
+        return dcs
+
     def load_from_database(self, ebook, load_files=True):
         """ loads book, then configure dc to match the legacy DublinCore API """
+        if self.load_book(ebook):
+            self.load_from_book(load_files=load_files)
+
+    def load_from_book(self, load_files=True):
+        """ configure dc from the already loaded self.book """
         def struct(**args):
             s = Struct()
             for key in args:
@@ -139,9 +263,8 @@ class DublinCoreObject(DublinCore.GutenbergDublinCore):
 
             return (place, publisher, years)
 
-        book = self.load_book(ebook)
-        if not book:
-            return
+        book = self.book
+        ebook = book.pk
 
         # Load DublinCore from PG database.
         if self.release_date == datetime.date.min:
@@ -276,6 +399,7 @@ class DublinCoreObject(DublinCore.GutenbergDublinCore):
                 filter(File.archive_path.startswith('cache')).\
                 delete(synchronize_session='fetch')
         session.commit()
+        DCCache.invalidate(id_)
 
     def remove_file_from_database(self, filename):
         """ Remove file from PG database. """
@@ -295,6 +419,7 @@ class DublinCoreObject(DublinCore.GutenbergDublinCore):
             session.add(Attribute(fk_books=id_, fk_attriblist=code,
                                   text=gg.archive2files(id_, url)))
             session.commit()
+            DCCache.invalidate(id_)
 
         except IntegrityError:  # Duplicate key
             session.rollback()
@@ -321,6 +446,7 @@ class DublinCoreObject(DublinCore.GutenbergDublinCore):
         if self.book.updatemode != updatemode:
             self.add_attribute(self.book, self.credit, marc=508)
             session.commit()
+            DCCache.invalidate(self.project_gutenberg_id)
             return
 
         # either 0=0 for fresh book updatemode or 1=1 for re-editing old book
@@ -339,12 +465,12 @@ class DublinCoreObject(DublinCore.GutenbergDublinCore):
                 self.book.langs.append(lang)
 
         for locc in self.loccs:
-            locc = session.query(Locc).filter_by(locc=locc.locc).first()
+            locc = vocabularies.lookup('loccs', locc.locc, session)
             if locc and locc not in self.book.loccs:
                 self.book.loccs.append(locc)
 
         for subject in self.subjects:
-            subject = session.query(Subject).filter_by(subject=subject.subject).first()
+            subject = vocabularies.lookup('subjects', subject.subject, session)
             if subject and subject not in self.book.subjects:
                 self.book.subjects.append(subject)
 
@@ -386,6 +512,7 @@ class DublinCoreObject(DublinCore.GutenbergDublinCore):
         self.book.updatemode = 1 # prevent non-cataloguer changes
 
         session.commit()
+        DCCache.invalidate(self.project_gutenberg_id)
 
 
     def add_authors(self, book):
@@ -406,10 +533,9 @@ class DublinCoreObject(DublinCore.GutenbergDublinCore):
                 author.birthdate = dc_author.birthdate
             if hasattr(dc_author, 'deathdate'):
                 author.deathdate = dc_author.deathdate
-            role_type = session.query(Role).where(
-                Role.role == dc_author.role).first()
+            role_type = vocabularies.lookup('roles', dc_author.role, session)
             if not role_type:
-                error("%s is not a valid role.", role_type.role)
+                error("%s is not a valid role.", dc_author.role)
                 continue
             book.authors.append(BookAuthor(
                 author=author,
@@ -509,9 +635,12 @@ class DublinCoreObject(DublinCore.GutenbergDublinCore):
         """ only delete the book! """
         session = self.get_my_session()
         if self.book:
+            ebook = self.book.pk
             session.delete(self.book)
             session.commit()
+            DCCache.invalidate(ebook)
             return
         if self.project_gutenberg_id:
             self.book = session.query(Book).filter_by(pk=self.project_gutenberg_id).delete()
             session.commit()
+            DCCache.invalidate(self.project_gutenberg_id)
@@ -12,16 +12,16 @@ Distributable under the GNU General Public License Version 3 or newer.
 
 from __future__ import unicode_literals
 
+import functools
 import logging
+import operator
 import os
+import threading
 
 
 from .CommonOptions import Options
 from .Logger import critical, debug, info, warning
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool.impl import QueuePool, NullPool
 try:
     import psycopg2
     import psycopg2.extensions
@@ -76,6 +76,47 @@ class xl(object):
         return default
 
 
+@functools.lru_cache(maxsize=256)
+def row_class(colnames):
+    """ Return a tuple subclass that reads like xl for rows with colnames.
+
+    The column map is built once per set of column names instead of once per
+    row, and the rows carry no __dict__.
+    """
+    colname_to_index = {colname: i for i, colname in enumerate(colnames)}
+
+    def __getitem__(self, column):
+        if isinstance(column, str):
+            column = colname_to_index[column]
+        return tuple.__getitem__(self, column)
+
+    def get(self, colname, default=None):
+        """ Get value from field in row. """
+        if colname in colname_to_index:
+            return tuple.__getitem__(self, colname_to_index[colname])
+        return default
+
+    namespace = {
+        '__slots__': (),
+        '__getitem__': __getitem__,
+        'get': get,
+        'colname_to_index': colname_to_index,
+        'row': property(tuple),
+    }
+    for colname, i in colname_to_index.items():
+        namespace.setdefault(colname, property(operator.itemgetter(i)))
+    return type('Row', (tuple,), namespace)
+
+
+def row_factory(cursor):
+    """ Return a function that wraps rows of the last query on cursor like xl.
+
+    >>> make_row = row_factory(cursor)
+    >>> rows = [make_row(row) for row in cursor.fetchall()]
+    """
+    return row_class(tuple(column[0] for column in cursor.description))
+
+
 def get_connection_params(args = None):
     """ Get connection parameters from environment. """
 
@@ -148,12 +189,108 @@ class Database(object):
         """ Return database cursor. """
         return self.conn.cursor()
 
+# defaults for the pooled engines, see EngineRegistry.configure
+POOL_SETTINGS = {
+    'pool_size': 5,         # connections kept open
+    'max_overflow': 10,     # extra connections when the pool is exhausted
+    'pool_timeout': 30,     # seconds to wait for a connection
+    'pool_pre_ping': True,  # test connections before handing them out
+    'pool_recycle': 3600,   # seconds before a connection is replaced
+}
+
+
+class EngineRegistry(object):
+    """ Process-wide registry of pooled SQLAlchemy engines, one per url.
+
+    Engines are created on first use, so callers can configure() pooling
+    before connecting:
+
+        GutenbergDatabase.engines.configure(pool_size=20, pool_recycle=600)
+        session = GutenbergDatabase.engines.get_session()
+
+    After a fork the child drops the inherited connections without closing
+    them and opens its own.
+    """
+
+    def __init__(self, **settings):
+        self.settings = dict(POOL_SETTINGS, **settings)
+        self._engines = {}   # url: (engine, sessionmaker)
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+
+    def configure(self, **settings):
+        """ Change the pool settings. Existing engines are disposed. """
+        with self._lock:
+            self.settings.update(settings)
+            self._dispose(close=True)
+
+
+    def _dispose(self, close):
+        for engine, dummy_session in self._engines.values():
+            engine.dispose(close=close)
+        self._engines.clear()
+
+
+    def _entry(self, url):
+        url = url or get_sqlalchemy_url()
+        with self._lock:
+            if self._pid != os.getpid():
+                # inherited from the parent process: keep the engines, replace their pools
+                for engine, dummy_session in self._engines.values():
+                    engine.dispose(close=False)
+                self._pid = os.getpid()
+            entry = self._engines.get(url)
+            if entry is None:
+                from sqlalchemy import create_engine
+                from sqlalchemy.orm import sessionmaker
+                from sqlalchemy.pool.impl import QueuePool
+
+                engine = create_engine(url, echo=False, poolclass=QueuePool, **self.settings)
+                entry = self._engines[url] = (engine, sessionmaker(bind=engine))
+                debug("Created engine with %s", self.settings)
+            return entry
+
+
+    def get_engine(self, url=None):
+        """ Return the engine for url, default from get_sqlalchemy_url(). """
+        return self._entry(url)[0]
+
+
+    def get_session(self, url=None):
+        """ Return a new session borrowing connections from the pool. """
+        return self._entry(url)[1]()
+
+
+    def dispose(self, close=True):
+        """ Drop all engines. close=False leaves the connections to another process. """
+        with self._lock:
+            self._dispose(close=close)
+
+
+engines = EngineRegistry()
+
+
 class Objectbase(object):
+    """ Session factory. pooled=True borrows connections from engines,
+    pooled=False opens a new connection for every session. """
+
     def __init__(self, pooled):
-        poolclass = QueuePool if pooled else NullPool
-        self.engine = create_engine(get_sqlalchemy_url(), echo=False, poolclass=poolclass)
+        self.pooled = pooled
+        if pooled:
+            return
+
+        # sqlalchemy is only needed by ORM users
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool.impl import NullPool
+
+        self._engine = create_engine(get_sqlalchemy_url(), echo=False, poolclass=NullPool)
+        self.Session = sessionmaker(bind=self._engine)
 
-        self.Session = sessionmaker(bind=self.engine)
+    @property
+    def engine(self):
+        return engines.get_engine() if self.pooled else self._engine
 
     def get_session(self):
-        return self.Session()
+        return engines.get_session() if self.pooled else self.Session()
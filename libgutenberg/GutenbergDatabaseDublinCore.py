@@ -21,9 +21,11 @@ import datetime
 
 from . import DublinCore
 from . import GutenbergGlobals as gg
-from .GutenbergGlobals import Struct, PG_URL
+from .GutenbergGlobals import PG_URL
 from .Logger import debug, info, warning, error
-from .GutenbergDatabase import xl, DatabaseError, IntegrityError
+from .GutenbergDatabase import row_factory, DatabaseError, IntegrityError
+from .Snapshot import (AliasRecord, AuthorRecord, BookshelfRecord, DcmitypeRecord, FileRecord,
+                       LangRecord, LoccRecord, MarcRecord, SubjectRecord, WebpageRecord)
 
 RE_FIRST_AZ = re.compile (r"^[a-z]")
 
@@ -59,195 +61,200 @@ class GutenbergDatabaseDublinCore(DublinCore.GutenbergDublinCore):
 
         """
 
-        conn = self.pool.connect()
-        c  = conn.cursor()
-        c2 = conn.cursor()
+        self.project_gutenberg_id = int(ebook)
+        self.load_records(self.pool, {self.project_gutenberg_id: self})
 
-        # id, copyright and release date
 
-        self.project_gutenberg_id = id_ = ebook
+    @classmethod
+    def load_many_from_database(cls, pool, ebooks, load_files=True, chunk=500):
+        """ Load DublinCore for many ebooks from PG database.
+
+        Every table is queried once per chunk of ebooks, so the number of round
+        trips does not depend on the number of authors.
+        Returns a dict ebook number -> GutenbergDatabaseDublinCore in the order
+        of ebooks. Ebooks not in the database are left out.
+
+        """
+
+        dcs = {}
+        for ebook in ebooks:
+            dc = cls(pool)
+            dc.project_gutenberg_id = int(ebook)
+            dcs[dc.project_gutenberg_id] = dc
+
+        found = set()
+        ebook_list = list(dcs.keys())
+        for i in range(0, len(ebook_list), chunk):
+            found |= cls.load_records(
+                pool, {ebook: dcs[ebook] for ebook in ebook_list[i:i + chunk]},
+                load_files=load_files)
+        for ebook in list(dcs.keys()):
+            if ebook not in found:
+                warning('no book for %s', ebook)
+                del dcs[ebook]
+        return dcs
+
 
-        c.execute("""
-select copyrighted, release_date, downloads from books where pk = %(ebook)s""",
-                   {'ebook': id_})
+    @staticmethod
+    def _fetch(cursor, sql, params):
+        """ Execute sql and return the rows, which read like xl. """
+        cursor.execute(sql, params)
+        return list(map(row_factory(cursor), cursor.fetchall()))
+
+
+    @classmethod
+    def load_records(cls, pool, dcs, load_files=True):
+        """ Load DublinCore into dcs, a dict ebook number -> dc.
+
+        Returns the set of ebook numbers found in the books table.
+
+        """
+
+        conn = pool.connect()
+        c  = conn.cursor()
+        params = {'ebooks': list(dcs.keys())}
+
+        # id, copyright and release date
 
-        for row in c.fetchall():
-            row = xl(c, row)
-            self.release_date = row.release_date
-            self.rights = ('Copyrighted. Read the copyright notice inside this book for details.'
-                           if row.copyrighted
-                           else 'Public domain in the USA.')
-            self.downloads = row.downloads
+        found = set()
+        for row in cls._fetch(c, """
+select pk, copyrighted, release_date, downloads from books where pk = ANY(%(ebooks)s)""",
+                               params):
+            dc = dcs[row.pk]
+            found.add(row.pk)
+            dc.release_date = row.release_date
+            dc.rights = ('Copyrighted. Read the copyright notice inside this book for details.'
+                         if row.copyrighted
+                         else 'Public domain in the USA.')
+            dc.downloads = row.downloads
 
 
         # authors
         # for a list of relator codes see:
         # http://www.loc.gov/loc.terms/relators/
 
-        c.execute("""
-SELECT authors.pk as pk, author, born_floor, born_ceil, died_floor, died_ceil, fk_roles, role, heading
+        authors = {}
+        for row in cls._fetch(c, """
+SELECT fk_books, authors.pk as pk, author, born_floor, born_ceil, died_floor, died_ceil,
+       fk_roles, role, heading
    FROM mn_books_authors
    JOIN authors ON mn_books_authors.fk_authors = authors.pk
    JOIN roles   ON mn_books_authors.fk_roles   = roles.pk
-WHERE mn_books_authors.fk_books = %(ebook)s
-ORDER BY heading, role, author""", {'ebook': id_})
-
-        for row in c.fetchall():
-            row = xl(c, row)
-
-            author = Struct()
-            author.id             = row.pk
-            author.name           = row.author
-            author.marcrel        = row.fk_roles
-            author.role           = row.role
-            author.heading        = row.heading
-            author.birthdate      = row.born_floor
-            author.deathdate      = row.died_floor
-            author.birthdate2     = row.born_ceil
-            author.deathdate2     = row.died_ceil
-            author.aliases        = []
-            author.webpages       = []
+WHERE mn_books_authors.fk_books = ANY(%(ebooks)s)
+ORDER BY fk_books, heading, role, author""", params):
+
+            author = AuthorRecord(row.pk, row.author, row.fk_roles, row.role, row.heading,
+                                  row.born_floor, row.died_floor, row.born_ceil, row.died_ceil,
+                                  None, None, [], [])
 
             author.name_and_dates = \
                 DublinCore.GutenbergDublinCore.format_author_date(author)
 
-            # used to link to authorlists on new PG site
+            # used to link to authorlists on new PG site (also as first_lettter)
             first_let_match = RE_FIRST_AZ.search(author.name_and_dates.lower())
-            author.first_lettter = first_let_match.group(0) if first_let_match  else  'other'
+            author.first_letter = first_let_match.group(0) if first_let_match  else  'other'
+
+            authors.setdefault(row.pk, []).append(author)
+            dcs[row.fk_books].authors.append(author)
 
-            c2.execute("SELECT alias, alias_heading from aliases where fk_authors = %d"
-                        % row.pk)
-            for row2 in c2.fetchall():
-                row2 = xl(c2, row2)
-                alias = Struct()
-                alias.alias = row2.alias
-                alias.heading = row2.alias_heading
-                author.aliases.append(alias)
+        if authors:
+            author_params = {'authors': list(authors.keys())}
 
-            c2.execute("""
-SELECT description, url from author_urls where fk_authors = %d""" % row.pk)
-            for row2 in c2.fetchall():
-                row2 = xl(c2, row2)
-                webpage = Struct()
-                webpage.description = row2.description
-                webpage.url = row2.url
-                author.webpages.append(webpage)
+            for row in cls._fetch(c, """
+SELECT fk_authors, alias, alias_heading from aliases where fk_authors = ANY(%(authors)s)""",
+                                   author_params):
+                for author in authors[row.fk_authors]:
+                    author.aliases.append(AliasRecord(row.alias, row.alias_heading))
 
-            self.authors.append(author)
+            for row in cls._fetch(c, """
+SELECT fk_authors, description, url from author_urls where fk_authors = ANY(%(authors)s)""",
+                                   author_params):
+                for author in authors[row.fk_authors]:
+                    author.webpages.append(WebpageRecord(row.description, row.url))
 
 
         # titles, notes
 
-        c.execute("""
-select attributes.text, attributes.nonfiling,
+        for row in cls._fetch(c, """
+select attributes.fk_books, attributes.text, attributes.nonfiling,
        attriblist.name, attriblist.caption
   from attributes, attriblist
- where attributes.fk_books = %(ebook)s
+ where attributes.fk_books = ANY(%(ebooks)s)
    and attributes.fk_attriblist = attriblist.pk
- order by attriblist.name""", {'ebook': id_})
-
-        for row in c.fetchall():
-            row = xl(c, row)
+ order by attributes.fk_books, attriblist.name""", params):
+            dc = dcs[row.fk_books]
 
-            marc = Struct()
-            marc.code = row.name.split(' ')[0]
-            marc.text = self.strip_marc_subfields(row.text)
-            marc.caption = row.caption
-            self.marcs.append(marc)
+            marc = MarcRecord(row.name.split(' ')[0], dc.strip_marc_subfields(row.text),
+                              row.caption)
+            dc.marcs.append(marc)
 
             if marc.code == '245':
-                self.title = marc.text
-                self.title_file_as = marc.text[row.nonfiling:]
-                self.title_file_as = self.title_file_as[0].upper() + self.title_file_as[1:]
+                dc.title = marc.text
+                dc.title_file_as = marc.text[row.nonfiling:]
+                dc.title_file_as = dc.title_file_as[0].upper() + dc.title_file_as[1:]
 
             elif marc.code == '508':
                 marc.text = DublinCore.RE_UPDATE.split(marc.text)[0].strip()
 
         # languages (datatype)
 
-        c.execute("""
-select pk, lang from langs, mn_books_langs
+        for row in cls._fetch(c, """
+select fk_books, pk, lang from langs, mn_books_langs
   where langs.pk = mn_books_langs.fk_langs
-    and mn_books_langs.fk_books = %(ebook)s""", {'ebook': id_})
-
-        rows = c.fetchall()
-
-        if not rows:
-            rows.append(('en', 'English' ) )
+    and mn_books_langs.fk_books = ANY(%(ebooks)s)""", params):
+            dcs[row.fk_books].languages.append(LangRecord(row.pk, row.lang))
 
-        for row in rows:
-            row = xl(c, row)
-            language = Struct()
-            language.id = row.pk
-            language.language = row.lang
-            self.languages.append(language)
+        for dc in dcs.values():
+            if not dc.languages:
+                dc.languages.append(LangRecord('en', 'English'))
 
 
         # subjects (vocabulary)
 
-        c.execute("""
-select pk, subject from subjects, mn_books_subjects
+        for row in cls._fetch(c, """
+select fk_books, pk, subject from subjects, mn_books_subjects
   where subjects.pk = mn_books_subjects.fk_subjects
-    and mn_books_subjects.fk_books = %(ebook)s""", {'ebook': id_})
-
-        for row in c.fetchall():
-            row = xl(c, row)
-            subject = Struct()
-            subject.id = row.pk
-            subject.subject = row.subject
-            self.subjects.append(subject)
+    and mn_books_subjects.fk_books = ANY(%(ebooks)s)""", params):
+            dcs[row.fk_books].subjects.append(SubjectRecord(row.pk, row.subject))
 
 
         # bookshelves (PG private vocabulary)
 
-        c.execute("""
-select pk, bookshelf from bookshelves, mn_books_bookshelves
+        for row in cls._fetch(c, """
+select fk_books, pk, bookshelf from bookshelves, mn_books_bookshelves
   where bookshelves.pk = mn_books_bookshelves.fk_bookshelves
-    and mn_books_bookshelves.fk_books = %(ebook)s""", {'ebook': id_})
-
-        for row in c.fetchall():
-            row = xl(c, row)
-            bookshelf = Struct()
-            bookshelf.id = row.pk
-            bookshelf.bookshelf = row.bookshelf
-            self.bookshelves.append(bookshelf)
+    and mn_books_bookshelves.fk_books = ANY(%(ebooks)s)""", params):
+            dcs[row.fk_books].bookshelves.append(BookshelfRecord(row.pk, row.bookshelf))
 
 
         # LoCC (vocabulary)
 
-        c.execute("""
-select pk, locc from loccs, mn_books_loccs
+        for row in cls._fetch(c, """
+select fk_books, pk, locc from loccs, mn_books_loccs
   where loccs.pk = mn_books_loccs.fk_loccs
-    and mn_books_loccs.fk_books = %(ebook)s""", {'ebook': id_})
-
-        for row in c.fetchall():
-            row = xl(c, row)
-            locc = Struct()
-            locc.id = row.pk
-            locc.locc = row.locc
-            self.loccs.append(locc)
+    and mn_books_loccs.fk_books = ANY(%(ebooks)s)""", params):
+            dcs[row.fk_books].loccs.append(LoccRecord(row.pk, row.locc))
 
 
         # categories (vocabulary)
 
-        c.execute("""
-select dcmitype, description from dcmitypes, mn_books_categories
+        for row in cls._fetch(c, """
+select fk_books, dcmitype, description from dcmitypes, mn_books_categories
   where dcmitypes.pk = mn_books_categories.fk_categories
-    and fk_books = %(ebook)s""", {'ebook': id_})
-        rows = c.fetchall()
+    and fk_books = ANY(%(ebooks)s)""", params):
+            dc = dcs[row.fk_books]
+            dc.categories.append(row.dcmitype)
+            dc.dcmitypes.append(DcmitypeRecord(row.dcmitype, row.description))
 
-        if not rows:
-            rows.append(('Text', 'Text') )
+        for dc in dcs.values():
+            if not dc.dcmitypes:
+                dc.categories.append('Text')
+                dc.dcmitypes.append(DcmitypeRecord('Text', 'Text'))
 
-        for row in rows:
-            row = xl(c, row)
-            self.categories.append(row.dcmitype)
-            dcmitype = Struct()
-            dcmitype.id = row.dcmitype
-            dcmitype.description = row.description
-            self.dcmitypes.append(dcmitype)
+        if load_files:
+            cls.load_file_records(pool, dcs)
 
-        self.load_files_from_database(ebook)
+        return found
 
 
     def load_files_from_database(self, id_):
@@ -257,60 +264,58 @@ select dcmitype, description from dcmitypes, mn_books_categories
 
         """
 
-        self.new_filesystem = False
-        self.mediatypes = set()
-        self.filetypes = set()
-        self.files = []
-        self.generated_files = []
+        self.load_file_records(self.pool, {int(id_): self})
 
-        conn = self.pool.connect()
+
+    @classmethod
+    def load_file_records(cls, pool, dcs):
+        """ Load files into dcs, a dict ebook number -> dc. """
+
+        for dc in dcs.values():
+            dc.new_filesystem = False
+            dc.mediatypes = set()
+            dc.filetypes = set()
+            dc.files = []
+            dc.generated_files = []
+
+        conn = pool.connect()
         c  = conn.cursor()
 
         # files (not strictly DublinCore but useful)
 
-        c.execute(
-"""select files.pk as pk, filename, filetype, mediatype, filesize, filemtime,
+        for row in cls._fetch(c,
+"""select fk_books, files.pk as pk, filename, filetype, mediatype, filesize, filemtime,
           fk_filetypes, fk_encodings, fk_compressions, generated
 from files
   left join filetypes on (files.fk_filetypes = filetypes.pk)
   left join encodings on (files.fk_encodings = encodings.pk)
-where fk_books = %(ebook)s
+where fk_books = ANY(%(ebooks)s)
   and obsoleted = 0
   and diskstatus = 0
-order by filetypes.sortorder, encodings.sortorder, fk_filetypes,
-         fk_encodings, fk_compressions, filename""",  {'ebook': id_})
-
-        for row in c.fetchall():
-            row = xl(c, row)
+order by fk_books, filetypes.sortorder, encodings.sortorder, fk_filetypes,
+         fk_encodings, fk_compressions, filename""",  {'ebooks': list(dcs.keys())}):
+            id_ = row.fk_books
+            dc = dcs[id_]
 
-            file_ = Struct()
             fn = row.filename
-            file_.archive_path = fn
 
             adir = gg.archive_dir(id_)
             if fn.startswith(adir):
                 fn = fn.replace(adir, 'files/%d' % id_)
-                self.new_filesystem = True
+                dc.new_filesystem = True
             ## elif fn.startswith('dirs/%s' % adir):
             ##     fn = fn.replace('dirs/%s' % adir, 'files/%d' % id_)
             ##     self.new_filesystem = True
             elif fn.startswith('etext'):
                 fn = 'dirs/' + fn
 
-            file_.filename    = fn
-            file_.url         = PG_URL + fn
-            file_.id          = row.pk
-            file_.extent      = row.filesize
-            file_.hr_extent   = self.human_readable_size(row.filesize)
-            file_.modified    = row.filemtime
-            file_.filetype    = row.fk_filetypes
-            file_.hr_filetype = row.filetype
-            file_.encoding    = row.fk_encodings
-            file_.compression = row.fk_compressions
-            file_.generated   = row.generated
+            file_ = FileRecord(row.pk, row.filename, fn, PG_URL + fn, row.filesize,
+                               dc.human_readable_size(row.filesize), row.filemtime,
+                               row.fk_filetypes, row.filetype, row.fk_encodings,
+                               row.fk_compressions, row.generated, row.mediatype, None, 0, 0)
 
             if row.filetype:
-                self.filetypes.add(row.filetype)
+                dc.filetypes.add(row.filetype)
 
             # internet media type (vocabulary)
 
@@ -321,10 +326,10 @@ order by filetypes.sortorder, encodings.sortorder, fk_filetypes,
             if file_.generated and not row.fk_filetypes.startswith('cover.'):
                 file_.url = "%sebooks/%d.%s" % (PG_URL, id_, row.fk_filetypes)
 
-            self.files.append(file_)
+            dc.files.append(file_)
 
             if row.mediatype:
-                self.mediatypes.add(row.mediatype)
+                dc.mediatypes.add(row.mediatype)
 
 
     def remove_filetype_from_database(self, id_, type_):
@@ -3,13 +3,18 @@
 import datetime
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError as SQLIntegrityError, OperationalError
 
 from . import DBUtils
+from . import DCCache
 from .GutenbergDatabase import IntegrityError
 from .Logger import info, warning, error
-from .Models import Compression, File, Filetype
+from .Models import File
+from .Vocabulary import vocabularies
 
 FTP   = '/public/ftp/pub/docs/books/gutenberg/'
 PUBLIC  = os.getenv ('PUBLIC')  or ''
@@ -22,27 +27,111 @@ EXTENSION_ALIASES = {
     'midi': 'mid',
     'epub': 'epub.dp' # hand-crafted
 }
-FILETYPES = []
 ENC_CASES = {"": "us-ascii", "8": "iso-8859-1", "0": "utf-8", "5": "big5"}
-COMPRESSIONS = []
 
+# threads used to stat files in store_files_in_database
+STAT_WORKERS = 8
+
+# per-file status reported by store_files_in_database
+STORED = 'stored'
+MISSING = 'missing'
+BADTYPE = 'badtype'
+FAILED = 'failed'
+
+@DBUtils.managed_session
 def get_filetypes(session=None):
-    @DBUtils.managed_session
-    def fts(session=None):
-        return [ft.pk for ft in session.query(Filetype.pk)]
-    global FILETYPES
-    if not FILETYPES:
-        FILETYPES = fts(session=session)
-    return FILETYPES
+    return vocabularies.pks('filetypes', session)
 
+@DBUtils.managed_session
 def get_compressions(session=None):
-    @DBUtils.managed_session
-    def comps(session=None):
-        return [comp.pk for comp in session.query(Compression.pk)]
-    global COMPRESSIONS
-    if not COMPRESSIONS:
-        COMPRESSIONS = comps(session=session)
-    return COMPRESSIONS
+    return vocabularies.pks('compressions', session)
+
+
+class FilenameClassifier(object):
+    """ Classify archive paths without the database.
+
+    filetypes and compressions are the primary keys of those tables:
+
+        classifier = FilenameClassifier(get_filetypes(), get_compressions())
+        classifier.classify_many(paths)
+    """
+
+    # special filetypes: page-images anywhere wins over the suffixes. It can't
+    # start inside a suffix, so it is always the leftmost match if present.
+    SPECIAL = re.compile(r'(?P<pageimages>page-images)|(?:(?P<index>[-_]index\.html?)'
+                         r'|(?P<readme>readme\.txt)|(?P<license>license\.txt))$', re.I)
+
+    def __init__(self, filetypes, compressions):
+        self.filetypes = frozenset(filetypes)
+        self.compressions = frozenset(compressions)
+        self._dirs = {}  # filedir: ebook number, obsoleted
+
+
+    def guess_filetype(self, filename):
+        """ Return filetype, encoding guessed from filename. See guess_filetype. """
+        filetype = enc = None
+        base, dot, ext = filename.rpartition('.')
+        base = base.lower()
+        ext = ext.lower() if dot else ''
+
+        # guess filetype from file extension
+        ext = EXTENSION_ALIASES.get(ext, ext)
+        if ext in self.filetypes:
+            filetype = ext
+        special = self.SPECIAL.search(filename)
+        if special:
+            filetype = special.lastgroup
+
+        # guess encoding from file name
+        if ext == 'txt':
+            # post 10k file names: 12345.txt, 12345-8.txt
+            if base[:5].isdecimal() and (len(base) == 5 or base[5] == '-'):
+                enc = ENC_CASES.get(base.partition('-')[2])
+            if enc is None:
+                enc = 'utf-8'
+        return filetype, enc
+
+
+    def get_compression(self, filename):
+        """ Return the compression of filename.ext.zip, or 'none'. """
+        base, dot, ext = filename.rpartition('.')
+        ext = ext.lower()
+        return ext if dot and ext in self.compressions else 'none'
+
+
+    def classify(self, path, id_=None):
+        """ Return filetype, encoding, compression, diskstatus, obsoleted of an archive path.
+
+        id_ defaults to the ebook number of the directory. """
+        filedir, filename = os.path.split(path)
+        directory = self._dirs.get(filedir)
+        if directory is None:
+            if len(self._dirs) > 100000:
+                self._dirs.clear()
+            directory = self._dirs[filedir] = (get_ebook_id(filedir), get_obsoleted(filedir))
+        filetype, enc = self.guess_filetype(path)
+        return (filetype, enc, self.get_compression(filename),
+                get_diskstatus(directory[0] if id_ is None else id_, filedir, filetype),
+                directory[1])
+
+
+    def classify_many(self, paths):
+        """ Return a list of classify() tuples. """
+        return [self.classify(path) for path in paths]
+
+
+_classifier = None
+
+@DBUtils.managed_session
+def get_classifier(session=None):
+    """ Return a FilenameClassifier for the filetypes and compressions in the database. """
+    global _classifier
+    filetypes = vocabularies.pks('filetypes', session)
+    compressions = vocabularies.pks('compressions', session)
+    if (_classifier is None or _classifier.filetypes != frozenset(filetypes)
+            or _classifier.compressions != frozenset(compressions)):
+        _classifier = FilenameClassifier(filetypes, compressions)
+    return _classifier
 
 
 def guess_filetype(filename):
@@ -53,41 +142,7 @@ def guess_filetype(filename):
     $filetypes:    'txt'   => 'Plain text'
     $encodings:    'us-ascii' """
 
-    filetype = enc = None
-    base =  ext = ""
-    base_after_hyphen = ""
-
-    matches = re.search(r'^(.*)\.(.*)$', filename)
-    if matches:
-        base = matches.group(1).lower()
-        ext  = matches.group(2).lower()
-
-    post10k = re.search(r'^\d{5}(-|$)', base)
-    matches = re.search(r"-(.*)$", base)
-    if matches:
-        base_after_hyphen = matches.group(1)
-
-    # guess filetype from file extension
-    ext = EXTENSION_ALIASES.get(ext, ext)
-
-    if ext in get_filetypes():
-        filetype = ext
-    if re.search(r'[-_]index\.html?$', filename, flags=re.I):
-        filetype = "index"
-    if re.search(r'readme\.txt$', filename, flags=re.I):
-        filetype = "readme"
-    if re.search(r'license\.txt$', filename, flags=re.I):
-        filetype = "license"
-    if re.search(r'page-images', filename, flags=re.I):
-        filetype = "pageimages"
-
-    # guess encoding from file name
-    if ext == "txt":
-        if post10k:
-            enc = ENC_CASES.get(base_after_hyphen, enc)
-        if enc is None:
-            enc = "utf-8"
-    return filetype, enc
+    return get_classifier().guess_filetype(filename)
 
 
 def get_diskstatus(id_, filedir, type_):
@@ -109,16 +164,13 @@ def get_diskstatus(id_, filedir, type_):
 
 def get_compression(filename):
     """ compression from filename.ext.zip """
-    compression = 'none'
+    return get_classifier().get_compression(filename)
 
-    compression_match = re.search(r"^(.*)\.(.*)$", filename)
-    if compression_match and (compression_match.group(2).lower() in get_compressions()):
-        compression = compression_match.group(2).lower()
-    return compression
 
+OBSOLETED = re.compile(r'old(/|$)')
 
 def get_obsoleted(filedir):
-    if re.search("old(/|$)", filedir):
+    if OBSOLETED.search(filedir):
         return 1
     if "-src" in filedir:
         return 1
@@ -132,9 +184,15 @@ def remove_file_from_database(filename, session=None):
 
     session = DBUtils.check_session(session)
     with session.begin_nested():
+        # cache/epub/N and etext paths don't tell the ebook, the rows do
+        ebooks = set(session.execute(select(File.fk_books).where(
+            File.archive_path == archivepath)).scalars())
         session.query(File).filter(File.archive_path == archivepath).\
                             delete(synchronize_session='fetch')
     session.commit()
+    for ebook in ebooks:
+        if ebook:
+            DCCache.invalidate(ebook)
 
 
 def parse_filename(filename):
@@ -150,56 +208,175 @@ def parse_filename(filename):
     return filedir, filename_nopath, archive_path
 
 
-@DBUtils.managed_session
-def store_file_in_database(id_, filename, type_, encoding=None, session=None):
-    """ Store file in PG database. filename absolute or relative to FILES"""
+def get_ebook_id(filedir):
+    """ Return the ebook number of an archive directory, or None.
+
+    Understands both 1/2/3/4/12345/12345-h and 12345/12345-h paths. The
+    intermediate directories of the ftp tree, like 1/2/3, have no ebook. """
+    parts = filedir.split('/')
+    ebook = None
+    for i, part in enumerate(parts):
+        if not part.isdigit():
+            break
+        # in the ftp tree 12345 sits in 1/2/3/4/ and 1 to 9 in 0/
+        if (len(part) > 1 and parts[:i] == list(part[:-1])) or (
+                len(part) == 1 and parts[:i] == ['0']):
+            ebook = int(part)
+    if (ebook is None and len(parts[0]) > 1 and parts[0].isdigit()
+            and (len(parts) == 1 or not parts[1].isdigit())):
+        # a top-level 12345/ directory
+        ebook = int(parts[0])
+    return ebook or None
+
 
-    filedir, filename_nopath, archive_path = parse_filename(filename)
+def resolve_filetype(filename, type_, encoding):
+    """ Return type_, encoding, check_type for a file to be stored.
 
+    check_type is True if type_ was given by the caller and must be validated. """
     if type_ == 'txt' and encoding is None:
-        type_ = 'txt.utf-8'
-        encoding = 'utf-8'
-        check_type = False
+        return 'txt.utf-8', 'utf-8', False
+    guess_type, guess_enc = guess_filetype(filename)
+    type_, check_type = (type_, True) if type_ else (guess_type, False)
+    encoding = encoding if encoding else guess_enc
+    return type_, encoding, check_type
+
+
+def file_values(id_, filename, type_, encoding, statinfo, filedir=None):
+    """ Return the File attributes for filename as a dict.
+
+    Pass filedir, as returned by parse_filename, to save resolving it again. """
+    if filedir is None:
+        filedir, filename_nopath, archive_path = parse_filename(filename)
     else:
-        guess_type, guess_enc = guess_filetype(filename)
-        type_, check_type = (type_, True) if type_ else (guess_type, False)
-        encoding = encoding if encoding else guess_enc
+        filename_nopath = os.path.basename(filename)
+        archive_path = os.path.join(filedir, filename_nopath)
+    return {
+        'fk_books': id_,
+        'archive_path': archive_path,
+        'extent': statinfo.st_size,
+        'modified': datetime.datetime.fromtimestamp(statinfo.st_mtime).isoformat(),
+        'fk_filetypes': type_,
+        'fk_encodings': encoding,
+        'compression': get_compression(filename_nopath),
+        'diskstatus': get_diskstatus(id_, filedir, type_),
+        'obsoleted': get_obsoleted(filedir),
+    }
+
+
+@DBUtils.managed_session
+def store_file_in_database(id_, filename, type_, encoding=None, session=None):
+    """ Store file in PG database. filename absolute or relative to FILES"""
+
+    type_, encoding, check_type = resolve_filetype(filename, type_, encoding)
 
     try:
         statinfo = os.stat(filename)
 
         # check good filetype if not from guesser
         try:
-            if check_type and not session.query(Filetype).filter(Filetype.pk == type_).count():
+            if check_type and not vocabularies.get('filetypes', type_, session):
                 warning("%s is not a valid filetype, didn't store %s", type_, filename)
                 return
         except OperationalError:
             error("network problem, didn't store %s", filename)
             return
 
-        diskstatus = get_diskstatus(id_, filedir, type_)
-        compression = get_compression(filename_nopath)
-        obsoleted = get_obsoleted(filedir)
+        values = file_values(id_, filename, type_, encoding, statinfo)
 
         # delete existing filename record
-        session.query(File).filter(File.archive_path == archive_path).\
+        session.query(File).filter(File.archive_path == values['archive_path']).\
                             delete(synchronize_session='fetch')
-        newfile = File(
-            fk_books=id_, archive_path=archive_path,
-            extent=statinfo.st_size,
-            modified=datetime.datetime.fromtimestamp(statinfo.st_mtime).isoformat(),
-            fk_filetypes=type_, fk_encodings=encoding,
-            compression=compression, diskstatus=diskstatus, obsoleted=obsoleted
-        )
-        session.add(newfile)
+        session.add(File(**values))
         session.commit()
+        DCCache.invalidate(id_)
 
     except OSError:
         error("Cannot stat %s", filename)
 
-    except IntegrityError:
+    except (IntegrityError, SQLIntegrityError):
+        error("Book number %s is not in database.", id_)
+        session.rollback()
+
+
+def _stat(filename):
+    try:
+        return os.stat(filename)
+    except OSError:
+        return None
+
+
+def upsert_files(rows, session):
+    """ Insert or update rows of the files table in one statement.
+
+    rows are dicts as returned by file_values; existing rows are matched on
+    the unique filename. Doesn't commit. """
+    columns = {key: File.__mapper__.get_property(key).columns[0].name for key in rows[0]}
+    stmt = insert(File.__table__).values(
+        [{columns[key]: value for key, value in row.items()} for row in rows])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[File.__table__.c.filename],
+        set_={column: stmt.excluded[column] for key, column in columns.items()
+              if key != 'archive_path'})
+    session.execute(stmt)
+
+
+@DBUtils.managed_session
+def store_files_in_database(id_, files, session=None):
+    """ Store several files of book id_ in one transaction.
+
+    files is a list of (filename, type_, encoding) tuples, with the same
+    meaning as the arguments of store_file_in_database. Returns a dict
+    filename -> STORED, MISSING (cannot stat), BADTYPE (not a valid filetype)
+    or FAILED (database error). Files with the same archive path are stored
+    once, from the last of them, and all get its status. """
+
+    report = {}
+    rows = {}
+    with ThreadPoolExecutor(max_workers=STAT_WORKERS) as pool:
+        stats = list(pool.map(_stat, [file_[0] for file_ in files]))
+
+    try:
+        for (filename, type_, encoding), statinfo in zip(files, stats):
+            if statinfo is None:
+                error("Cannot stat %s", filename)
+                report[filename] = MISSING
+                continue
+            type_, encoding, check_type = resolve_filetype(filename, type_, encoding)
+            if check_type and not vocabularies.get('filetypes', type_, session):
+                warning("%s is not a valid filetype, didn't store %s", type_, filename)
+                report[filename] = BADTYPE
+                continue
+            values = file_values(id_, filename, type_, encoding, statinfo)
+            # a statement can't update the same row twice; the last entry wins,
+            # but all filenames of the archive path get its status
+            filenames = rows.get(values['archive_path'], ([], None))[0]
+            filenames.append(filename)
+            rows[values['archive_path']] = (filenames, values)
+
+        if rows:
+            upsert_files([values for filenames, values in rows.values()], session)
+        session.commit()
+        DCCache.invalidate(id_)
+        status = STORED
+
+    except OperationalError:
+        error("network problem, didn't store files of %s", id_)
+        session.rollback()
+        status = FAILED
+
+    except (IntegrityError, SQLIntegrityError):
         error("Book number %s is not in database.", id_)
         session.rollback()
+        status = FAILED
+
+    for filenames, values in rows.values():
+        for filename in filenames:
+            report[filename] = status
+    if status == FAILED:
+        for filename, type_, encoding in files:
+            report.setdefault(filename, FAILED)
+    info("Stored %d of %d files of %s", list(report.values()).count(STORED), len(files), id_)
+    return report
 
 
 @DBUtils.managed_session
@@ -16,8 +16,7 @@ from __future__ import unicode_literals
 import os
 import re
 import datetime
-
-import pycountry
+import functools
 
 class Struct(object):
     """ handy class to pin attributes on
@@ -160,31 +159,67 @@ class language_map(object):
 
     @classmethod
     def get(cls, code, default=''):
-        lang = None
         if not code:
             return default
-        if len(code) == 2:
-            lang = pycountry.languages.get(alpha_2=code)
-        elif len(code) == 3:
-            lang = pycountry.languages.get(alpha_3=code)
-            if not lang:
-                lang = pycountry.language_families.get(alpha_3=code)
-        return lang.name if lang else default
+        return _language_name(code) or default
 
     @classmethod
     def inverse(cls, name, default='en'):
-        lang = None
         if not name:
             return default
         if name in cls.alt_names:
             return cls.alt_names[name]
+        return _language_code(name) or default
+
+
+@functools.lru_cache(maxsize=1)
+def _language_tables():
+    """ Return dicts code -> name and name -> code, lowercase keys like pycountry's indexes. """
+    from .LanguageTable import FAMILIES, LANGUAGES
+    names = {}
+    codes = {}
+    for line in FAMILIES.splitlines():
+        alpha_3, name = line.split('\t')
+        codes[alpha_3.lower()] = name
+    for line in LANGUAGES.splitlines():
+        alpha_2, alpha_3, name = line.split('\t')
+        # later entries win, as in pycountry
+        if alpha_2:
+            codes[alpha_2.lower()] = name
+        codes[alpha_3.lower()] = name
+        names[name.lower()] = alpha_2 or alpha_3
+    return codes, names
+
+
+@functools.lru_cache(maxsize=1024)
+def _language_name(code):
+    """ Return the name of ISO 639 language (family) code, or None. """
+    if len(code) not in (2, 3):
+        return None
+    name = _language_tables()[0].get(code.lower())
+    if name is None:
+        # not in the table; maybe pycountry has been upgraded
+        import pycountry
+        if len(code) == 2:
+            lang = pycountry.languages.get(alpha_2=code)
+        else:
+            lang = pycountry.languages.get(alpha_3=code)
+            if not lang:
+                lang = pycountry.language_families.get(alpha_3=code)
+        name = lang.name if lang else None
+    return name
+
+
+@functools.lru_cache(maxsize=1024)
+def _language_code(name):
+    """ Return the ISO 639 code of language name, or None. """
+    code = _language_tables()[1].get(name.lower())
+    if code is None:
+        import pycountry
         lang = pycountry.languages.get(name=name)
         if lang:
-            if hasattr(lang, 'alpha_2'):
-                return lang.alpha_2
-            if hasattr(lang, 'alpha_3'):
-                return lang.alpha_3
-        return default
+            code = getattr(lang, 'alpha_2', None) or getattr(lang, 'alpha_3', None)
+    return code
 
 
 class NameSpaceClark(object):
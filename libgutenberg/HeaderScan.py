@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+HeaderScan.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Extract the metadata headers of many ebook source files in parallel.
+
+    python -m libgutenberg.HeaderScan -j 8 /path/to/files '/other/**/*.rst' > books.jsonl
+
+Prints one JSON line per file with the ebook number, title, authors,
+languages, subjects and rights, the detected format and the time it took.
+Throughput is reported on stderr at the end.
+
+"""
+
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from . import Logger
+from .DublinCore import GutenbergDublinCore, read_pgheader
+
+EXTENSIONS = ('.txt', '.htm', '.html', '.xhtml', '.rst', '.json')
+
+RE_RST_FIELD = re.compile(r'^\s*:pg\.id:', re.M)
+
+
+def iter_paths(args, extensions=EXTENSIONS):
+    """ Generate the files named by args: files, directories (recursively) or globs. """
+    for arg in args:
+        if os.path.isdir(arg):
+            for dirpath, dirnames, filenames in os.walk(arg):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(extensions):
+                        yield os.path.join(dirpath, filename)
+        elif glob.has_magic(arg):
+            for path in sorted(glob.iglob(arg, recursive=True)):
+                if os.path.isfile(path):
+                    yield path
+        else:
+            yield arg
+
+
+def detect_format(path, data):
+    """ Return 'json', 'rst', 'html' or 'txt'. """
+    if data[:1] == '{':
+        return 'json'
+    if path.lower().endswith('.rst') or RE_RST_FIELD.search(data):
+        return 'rst'
+    if data.lstrip('\ufeff \t\r\n')[:1] == '<':
+        return 'html'
+    return 'txt'
+
+
+def scan_file(path):
+    """ Return the metadata of one file as a dict. Runs in a worker process. """
+    start = time.perf_counter()
+    result = {'path': path}
+    try:
+        with open(path, 'rb') as fileobj:
+            data = read_pgheader(fileobj, errors='replace')
+        result['format'] = detect_format(path, data)
+        dc = GutenbergDublinCore()
+        if result['format'] == 'rst':
+            dc.load_from_rstheader(data)
+        else:
+            dc.load_from_pgheader(data)
+        result.update({
+            'id': dc.project_gutenberg_id,
+            'title': dc.title,
+            'authors': [author.name for author in dc.authors],
+            'languages': [lang.id for lang in dc.languages],
+            'subjects': [subject.subject for subject in dc.subjects],
+            'rights': dc.rights,
+        })
+    except Exception as what:  # pylint: disable=broad-except
+        # one bad file must not end the scan
+        result['error'] = str(what) or what.__class__.__name__
+    result['seconds'] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def scan(paths, jobs=None, chunksize=16):
+    """ Generate scan_file(path) for all paths, in completion order. """
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap_unordered(scan_file, paths, chunksize=chunksize)
+
+
+def main():
+    """ Scan the files named on the command line and print JSON lines. """
+    parser = argparse.ArgumentParser(
+        description="Extract metadata from Project Gutenberg ebook files.")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help="file, directory or glob ('**' recurses)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="number of worker processes (default: one per cpu)")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="log info (-v) or debug (-vv) messages")
+    args = parser.parse_args()
+
+    Logger.setup(Logger.LOGFORMAT, loglevel=logging.WARNING)
+    Logger.set_log_level(args.verbose)
+
+    count = errors = 0
+    start = time.perf_counter()
+    for result in scan(iter_paths(args.paths), args.jobs):
+        count += 1
+        errors += 'error' in result
+        print(json.dumps(result, ensure_ascii=False))
+    elapsed = time.perf_counter() - start
+    sys.stdout.flush()
+    print("%d files (%d errors) in %.2f s, %.1f files/s" % (
+        count, errors, elapsed, count / elapsed if elapsed else 0.0), file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,444 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+OfflineCatalog.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Dump the catalog tables into a SQLite file and load DublinCore objects from
+it on machines without database access.
+
+    python -m libgutenberg.OfflineCatalog catalog.sqlite
+
+    catalog = OfflineCatalog('catalog.sqlite')
+    dc = catalog.load(2600)
+    for dc in catalog.iter_books():
+        ...
+
+The file holds books, attributes, authors, aliases, author_urls, langs,
+subjects, bookshelves, loccs, categories, files and the small tables they
+refer to, indexed by book. OfflineDublinCoreObject is a DublinCoreObject that
+loads from the file: load_from_book runs unchanged on Snapshot records that
+stand in for the ORM rows, so the metadata is the same as from the database,
+in the same order. Offline objects are read-only.
+
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import sqlite3
+import sys
+
+from . import DublinCore
+from . import Logger
+from .DublinCoreMapping import DublinCoreObject
+from .GutenbergGlobals import DCIMT
+from .Logger import debug, info, warning
+from .Snapshot import (RE_FIRST_AZ, AuthorRecord, AliasRecord, BookshelfRecord, FileRecord, LangRecord,
+                       LoccRecord, Record, SubjectRecord, WebpageRecord)
+
+VERSION = 1
+CHUNK = 500       # books per query when loading
+DUMP_CHUNK = 10000  # rows per insert when dumping
+
+# sqlite table: columns, index
+# rowid order is dump order, which keeps the order of the ORM relationships
+TABLES = {
+    'books': (('pk INTEGER PRIMARY KEY', 'copyrighted', 'updatemode', 'release_date',
+               'downloads'), None),
+    'attriblist': (('pk INTEGER PRIMARY KEY', 'name', 'caption'), None),
+    'attributes': (('fk_books', 'fk_attriblist', 'text', 'nonfiling'), 'fk_books'),
+    'authors': (('pk INTEGER PRIMARY KEY', 'author', 'born_floor', 'born_ceil', 'died_floor',
+                 'died_ceil'), None),
+    'aliases': (('fk_authors', 'alias', 'alias_heading'), 'fk_authors'),
+    'author_urls': (('fk_authors', 'description', 'url'), 'fk_authors'),
+    'roles': (('pk TEXT PRIMARY KEY', 'role'), None),
+    'mn_books_authors': (('fk_books', 'fk_authors', 'fk_roles', 'heading'), 'fk_books'),
+    'langs': (('pk TEXT PRIMARY KEY', 'lang'), None),
+    'mn_books_langs': (('fk_books', 'fk_langs'), 'fk_books'),
+    'subjects': (('pk INTEGER PRIMARY KEY', 'subject'), None),
+    'mn_books_subjects': (('fk_books', 'fk_subjects'), 'fk_books'),
+    'bookshelves': (('pk INTEGER PRIMARY KEY', 'bookshelf'), None),
+    'mn_books_bookshelves': (('fk_books', 'fk_bookshelves'), 'fk_books'),
+    'loccs': (('pk TEXT PRIMARY KEY', 'locc'), None),
+    'mn_books_loccs': (('fk_books', 'fk_loccs'), 'fk_books'),
+    'categories': (('pk INTEGER PRIMARY KEY', 'category'), None),
+    'mn_books_categories': (('fk_books', 'fk_categories'), 'fk_books'),
+    'filetypes': (('pk TEXT PRIMARY KEY', 'filetype', 'sortorder', 'mediatype', 'generated'),
+                  None),
+    'encodings': (('pk TEXT PRIMARY KEY', 'sortorder'), None),
+    'files': (('pk', 'fk_books', 'filename', 'filesize', 'filemtime',
+               'fk_filetypes', 'fk_encodings', 'fk_compressions', 'diskstatus', 'obsoleted'),
+              'fk_books'),
+}
+
+
+def _queries():
+    """ Return table name: select on the database, in the column order of TABLES.
+
+    Rows of many-to-many tables come in the order the ORM relationships use,
+    and the loader keeps it. """
+    from sqlalchemy import select
+    from . import Models
+    from .Models import (Alias, Attribute, Attriblist, Author, AuthorUrl, Book, BookAuthor,
+                         Bookshelf, Category, Encoding, File, Filetype, Lang, Locc, Role,
+                         Subject)
+
+    def mn(table, column):
+        return select(table.c.fk_books, table.c[column]).order_by(table.c.fk_books)
+
+    return {
+        'books': select(Book.pk, Book.copyrighted, Book.updatemode, Book.release_date,
+                        Book.downloads),
+        'attriblist': select(Attriblist.pk, Attriblist.name, Attriblist.caption),
+        'attributes': select(Attribute.fk_books, Attribute.fk_attriblist, Attribute.text,
+                             Attribute.nonfiling).order_by(
+                                 Attribute.fk_books, Attribute.fk_attriblist, Attribute.pk),
+        'authors': select(Author.id, Author.name, Author.birthdate, Author.birthdate2,
+                          Author.deathdate, Author.deathdate2),
+        'aliases': select(Alias.fk_authors, Alias.alias, Alias.heading).order_by(
+            Alias.fk_authors, Alias.pk),
+        'author_urls': select(AuthorUrl.fk_authors, AuthorUrl.description,
+                              AuthorUrl.url).order_by(AuthorUrl.fk_authors, AuthorUrl.pk),
+        'roles': select(Role.pk, Role.role),
+        'mn_books_authors': select(BookAuthor.fk_books, BookAuthor.fk_authors,
+                                   BookAuthor.fk_roles, BookAuthor.heading)
+                            .join(Role, Role.pk == BookAuthor.fk_roles)
+                            .join(Author, Author.id == BookAuthor.fk_authors)
+                            .order_by(BookAuthor.fk_books, BookAuthor.heading, Role.role,
+                                      Author.name),
+        'langs': select(Lang.id, Lang.language),
+        'mn_books_langs': mn(Models.t_mn_books_langs, 'fk_langs'),
+        'subjects': select(Subject.id, Subject.subject),
+        'mn_books_subjects': mn(Models.t_mn_books_subjects, 'fk_subjects'),
+        'bookshelves': select(Bookshelf.id, Bookshelf.bookshelf),
+        'mn_books_bookshelves': mn(Models.t_mn_books_bookshelves, 'fk_bookshelves'),
+        'loccs': select(Locc.id, Locc.locc),
+        'mn_books_loccs': mn(Models.t_mn_books_loccs, 'fk_loccs'),
+        'categories': select(Category.pk, Category.category),
+        'mn_books_categories': mn(Models.t_mn_books_categories, 'fk_categories'),
+        'filetypes': select(Filetype.pk, Filetype.filetype, Filetype.sortorder,
+                            Filetype.mediatype, Filetype.generated),
+        'encodings': select(Encoding.pk, Encoding.sortorder),
+        'files': select(File.id, File.fk_books, File.archive_path, File.extent, File.modified,
+                        File.fk_filetypes, File.fk_encodings, File.compression,
+                        File.diskstatus, File.obsoleted)
+                 .outerjoin(Filetype, Filetype.pk == File.fk_filetypes)
+                 .outerjoin(Encoding, Encoding.pk == File.fk_encodings)
+                 .order_by(File.fk_books, Filetype.sortorder, Encoding.sortorder,
+                           File.fk_filetypes, File.fk_encodings, File.compression,
+                           File.archive_path),
+    }
+
+
+def _plain(value):
+    """ Convert value to a type sqlite stores. """
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def dump(path, session=None):
+    """ Write the catalog tables to the SQLite file path, replacing it atomically. """
+    from . import DBUtils
+
+    tmp = path + '.tmp'
+    if os.path.exists(tmp):
+        os.unlink(tmp)
+    new_session = session is None
+    session = DBUtils.check_session(session)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value)')
+        conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('version', VERSION), ('created', datetime.datetime.now().isoformat())])
+        for table, query in _queries().items():
+            columns, index = TABLES[table]
+            conn.execute('CREATE TABLE %s (%s)' % (table, ', '.join(columns)))
+            insert = 'INSERT INTO %s VALUES (%s)' % (table, ', '.join('?' * len(columns)))
+            count = 0
+            result = session.execute(query.execution_options(yield_per=DUMP_CHUNK))
+            for rows in result.partitions():
+                conn.executemany(insert, [tuple(_plain(value) for value in row) for row in rows])
+                count += len(rows)
+            if index:
+                conn.execute('CREATE INDEX ix_%s_%s ON %s (%s)' % (table, index, table, index))
+            debug("Dumped %d rows of %s", count, table)
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.unlink(tmp)
+        raise
+    finally:
+        if new_session:
+            session.close()
+    conn.close()
+    os.replace(tmp, path)
+    info("Wrote catalog to %s", path)
+
+
+class AttriblistRecord(Record):
+    __slots__ = ('name', 'caption')
+
+
+class AttributeRecord(Record):
+    __slots__ = ('attribute_type', 'text', 'nonfiling')
+
+
+class CategoryRecord(Record):
+    __slots__ = ('pk',)
+
+    @property
+    def dcmitype(self):
+        return DublinCore.DCMITYPES[self.pk]
+
+
+class BookRecord(Record):
+    """ Stands in for Models.Book. """
+    __slots__ = ('pk', 'copyrighted', 'updatemode', 'release_date', 'downloads', 'authors',
+                 'attributes', 'langs', 'subjects', 'bookshelves', 'loccs', 'categories',
+                 'files')
+
+    @property
+    def rights(self):
+        if self.copyrighted:
+            return 'Copyrighted. Read the copyright notice inside this book for details.'
+        return 'Public domain in the USA.'
+
+    @property
+    def is_audiobook(self):
+        return any(category.pk in (1, 2) for category in self.categories)
+
+
+def human_readable_size(size):
+    """ Return human readable string of filesize, like File.hr_extent. """
+    if size is None or size < 0:
+        return ''
+    for (threshold, format_string) in DublinCore.DublinCore.SI_prefixes:
+        if size >= threshold:
+            return format_string % (float(size) / threshold)
+    return '%d B' % size
+
+
+class OfflineCatalog(object):
+    """ Read-only catalog in a SQLite file written by dump(). """
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.conn = sqlite3.connect('file:%s?mode=ro' % path, uri=True,
+                                    check_same_thread=False)
+        version = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None or int(version[0]) > VERSION:
+            raise ValueError('%s is not an offline catalog of version %d' % (path, VERSION))
+
+        # the small tables, for lookups in memory
+        self.attriblist = {pk: AttriblistRecord(name, caption) for pk, name, caption
+                           in self.conn.execute('SELECT pk, name, caption FROM attriblist')}
+        self.roles = dict(self.conn.execute('SELECT pk, role FROM roles'))
+        self.langs = {pk: LangRecord(pk, lang)
+                      for pk, lang in self.conn.execute('SELECT pk, lang FROM langs')}
+        self.subjects = {pk: SubjectRecord(pk, subject) for pk, subject
+                         in self.conn.execute('SELECT pk, subject FROM subjects')}
+        self.bookshelves = {pk: BookshelfRecord(pk, bookshelf) for pk, bookshelf
+                            in self.conn.execute('SELECT pk, bookshelf FROM bookshelves')}
+        self.loccs = {pk: LoccRecord(pk, locc)
+                      for pk, locc in self.conn.execute('SELECT pk, locc FROM loccs')}
+        self.filetypes = {row[0]: row[1:] for row in self.conn.execute(
+            'SELECT pk, filetype, mediatype, generated FROM filetypes')}
+
+
+    def close(self):
+        self.conn.close()
+
+
+    def ebooks(self):
+        """ Return all ebook numbers, in order. """
+        return [pk for pk, in self.conn.execute('SELECT pk FROM books ORDER BY pk')]
+
+
+    def _select(self, query, ebooks):
+        """ Run query with the placeholder {} replaced by the ebook numbers. """
+        return self.conn.execute(query.format(', '.join('?' * len(ebooks))), ebooks)
+
+
+    def _authors(self, ebooks):
+        """ Return ebook: [AuthorRecord] """
+        rows = self._select("""
+SELECT fk_books, authors.pk, author, fk_roles, heading, born_floor, died_floor, born_ceil, died_ceil
+  FROM mn_books_authors JOIN authors ON mn_books_authors.fk_authors = authors.pk
+ WHERE fk_books IN ({}) ORDER BY mn_books_authors.rowid""", ebooks).fetchall()
+        author_ids = list({row[1] for row in rows})
+        aliases = {}
+        webpages = {}
+        for i in range(0, len(author_ids), CHUNK):
+            chunk = author_ids[i:i + CHUNK]
+            for fk_authors, alias, heading in self._select(
+                    'SELECT fk_authors, alias, alias_heading FROM aliases '
+                    'WHERE fk_authors IN ({}) ORDER BY rowid', chunk):
+                aliases.setdefault(fk_authors, []).append(AliasRecord(alias, heading))
+            for fk_authors, description, url in self._select(
+                    'SELECT fk_authors, description, url FROM author_urls '
+                    'WHERE fk_authors IN ({}) ORDER BY rowid', chunk):
+                webpages.setdefault(fk_authors, []).append(WebpageRecord(description, url))
+
+        authors = {}
+        for (ebook, id_, name, marcrel, heading, birthdate, deathdate, birthdate2,
+             deathdate2) in rows:
+            author = AuthorRecord(id_, name, marcrel, self.roles.get(marcrel), heading,
+                                  birthdate, deathdate, birthdate2, deathdate2, None, None,
+                                  aliases.get(id_, []), webpages.get(id_, []))
+            author.name_and_dates = DublinCore.GutenbergDublinCore.format_author_date(author)
+            match = RE_FIRST_AZ.search(author.name_and_dates.lower())
+            author.first_letter = match.group(0) if match else 'other'
+            authors.setdefault(ebook, []).append(author)
+        return authors
+
+
+    def _files(self, ebooks):
+        """ Return ebook: [FileRecord] of the files the ORM relationship Book.files has """
+        files = {}
+        for (id_, ebook, archive_path, extent, modified, filetype, encoding,
+             compression) in self._select("""
+SELECT pk, fk_books, filename, filesize, filemtime, fk_filetypes, fk_encodings, fk_compressions
+  FROM files WHERE fk_books IN ({}) AND obsoleted = 0 AND diskstatus = 0
+ ORDER BY rowid""", ebooks):
+            hr_filetype, mediatype, generated = self.filetypes.get(filetype, (None, None, None))
+            if filetype:
+                mediatypes = [DCIMT(mediatype, encoding)]
+            else:
+                mediatypes = ['application/octet-stream']
+            if compression == 'zip':
+                mediatypes.append(DCIMT('application/zip'))
+            files.setdefault(ebook, []).append(FileRecord(
+                id_, archive_path, None, None, extent, human_readable_size(extent),
+                datetime.datetime.fromisoformat(modified) if modified else None,
+                filetype, hr_filetype if filetype else '', encoding, compression,
+                None if generated is None else bool(generated), mediatype, mediatypes, 0, 0))
+        return files
+
+
+    def books(self, ebooks):
+        """ Return a dict ebook number -> BookRecord for the ebooks in the catalog. """
+        ebooks = [int(ebook) for ebook in ebooks]
+        books = {}
+        for i in range(0, len(ebooks), CHUNK):
+            chunk = ebooks[i:i + CHUNK]
+            found = {}
+            for pk, copyrighted, updatemode, release_date, downloads in self._select(
+                    'SELECT pk, copyrighted, updatemode, release_date, downloads '
+                    'FROM books WHERE pk IN ({})', chunk):
+                found[pk] = BookRecord(
+                    pk, copyrighted, updatemode,
+                    datetime.date.fromisoformat(release_date) if release_date else None,
+                    downloads, [], [], [], [], [], [], [], [])
+
+            for ebook, fk_attriblist, text, nonfiling in self._select(
+                    'SELECT fk_books, fk_attriblist, text, nonfiling FROM attributes '
+                    'WHERE fk_books IN ({}) ORDER BY rowid', chunk):
+                found[ebook].attributes.append(
+                    AttributeRecord(self.attriblist[fk_attriblist], text, nonfiling))
+            for ebook, authors in self._authors(chunk).items():
+                found[ebook].authors = authors
+            for table, column, vocabulary, attr in (
+                    ('mn_books_langs', 'fk_langs', self.langs, 'langs'),
+                    ('mn_books_subjects', 'fk_subjects', self.subjects, 'subjects'),
+                    ('mn_books_bookshelves', 'fk_bookshelves', self.bookshelves, 'bookshelves'),
+                    ('mn_books_loccs', 'fk_loccs', self.loccs, 'loccs')):
+                for ebook, pk in self._select('SELECT fk_books, %s FROM %s WHERE fk_books IN ({}) '
+                                              'ORDER BY rowid' % (column, table), chunk):
+                    getattr(found[ebook], attr).append(vocabulary[pk])
+            for ebook, pk in self._select(
+                    'SELECT fk_books, fk_categories FROM mn_books_categories '
+                    'WHERE fk_books IN ({}) ORDER BY rowid', chunk):
+                found[ebook].categories.append(CategoryRecord(pk))
+            for ebook, files in self._files(chunk).items():
+                found[ebook].files = files
+
+            for ebook in chunk:
+                if ebook in found:
+                    books[ebook] = found[ebook]
+        return books
+
+
+    def book(self, ebook):
+        """ Return the BookRecord of ebook, or None. """
+        return self.books([ebook]).get(int(ebook))
+
+
+    def load_many(self, ebooks, load_files=True, chunk=CHUNK):
+        """ Return a dict ebook number -> OfflineDublinCoreObject, like DublinCoreObject.load_many. """
+        dcs = {}
+        ebooks = [int(ebook) for ebook in ebooks]
+        for i in range(0, len(ebooks), chunk):
+            books = self.books(ebooks[i:i + chunk])
+            for ebook in ebooks[i:i + chunk]:
+                if ebook not in books:
+                    debug('no book for %s', ebook)
+                    continue
+                dc = OfflineDublinCoreObject(self)
+                dc.project_gutenberg_id = ebook
+                dc.book = books[ebook]
+                dc.load_from_book(load_files=load_files)
+                dcs[ebook] = dc
+        return dcs
+
+
+    def load(self, ebook, load_files=True):
+        """ Return the OfflineDublinCoreObject of ebook, or None. """
+        return self.load_many([ebook], load_files=load_files).get(int(ebook))
+
+
+    def iter_books(self, chunk=1000, load_files=True):
+        """ Generate the OfflineDublinCoreObjects of all books, in ebook order. """
+        ebooks = self.ebooks()
+        for i in range(0, len(ebooks), chunk):
+            yield from self.load_many(ebooks[i:i + chunk], load_files=load_files,
+                                      chunk=chunk).values()
+
+
+class OfflineDublinCoreObject(DublinCoreObject):
+    """ A DublinCoreObject that loads from an OfflineCatalog. """
+
+    def __init__(self, catalog):
+        DublinCoreObject.__init__(self)
+        self.catalog = catalog
+
+    def get_my_session(self):
+        # everything comes from the catalog
+        return None
+
+    def load_book(self, ebook):
+        self.project_gutenberg_id = ebook
+        self.book = self.catalog.book(ebook)
+        if not self.book:
+            warning('no book for %s', ebook)
+        return self.book
+
+
+def main():
+    """ Dump the catalog from the database configured in the environment. """
+    parser = argparse.ArgumentParser(
+        description="Dump the Project Gutenberg catalog into a SQLite file.")
+    parser.add_argument('path', help="the SQLite file to write")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="log info (-v) or debug (-vv) messages")
+    args = parser.parse_args()
+
+    Logger.setup(Logger.LOGFORMAT, loglevel=logging.WARNING)
+    Logger.set_log_level(args.verbose)
+    dump(args.path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
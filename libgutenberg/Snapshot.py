@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+Snapshot.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Compact, versioned snapshots of DublinCore objects.
+
+    data = dc.to_bytes()
+    dc = DublinCoreObject.from_bytes(data)
+
+A snapshot holds the metadata of a loaded DublinCore object, from the ORM,
+from GutenbergDatabaseDublinCore or from a header parser, without session,
+book or database rows. Authors, languages, subjects, marcs, files etc. come
+back as the __slots__ records below, which GutenbergDatabaseDublinCore also
+builds from its rows; pubinfo comes back as a PubInfo.
+
+The format is MAGIC, a version byte and a marshal payload of tuples of
+primitives, laid out by the record __slots__ of that version. Snapshots of
+older versions stay readable; add fields at the end and bump VERSION.
+
+"""
+
+import datetime
+import marshal
+import re
+
+from . import GutenbergGlobals as gg
+from .DublinCore import PubInfo
+
+MAGIC = b'PGDC'
+VERSION = 1
+MARSHAL_VERSION = 4
+
+RE_FIRST_AZ = re.compile(r"^[a-z]")
+
+# plain attributes of the DublinCore classes, in snapshot order
+FIELDS = (
+    '_project_gutenberg_id', 'is_format_of', 'canonical_url',
+    'title', 'subtitle', 'alt_title', 'title_file_as', 'project_gutenberg_title',
+    'source', 'created', 'publisher', 'rights', 'release_date', 'update_date',
+    'edition', 'contents', 'encoding', 'notes', 'downloads', 'score', 'credit',
+    'request_key', 'scan_urls', 'categories', 'new_filesystem', 'filetypes',
+    'mediatypes', 'generated_files',
+)
+
+# dates are tagged, nothing else in a snapshot is a tuple of this shape
+DATE = '\0date'
+DATETIME = '\0datetime'
+
+
+class Record(object):
+    """ Base of the snapshot records: values in __slots__ order. """
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(
+            repr(getattr(self, name)) for name in self.__slots__))
+
+
+class AliasRecord(Record):
+    __slots__ = ('alias', 'heading')
+
+
+class WebpageRecord(Record):
+    __slots__ = ('description', 'url')
+
+
+class AuthorRecord(Record):
+    __slots__ = ('id', 'name', 'marcrel', 'role', 'heading', 'birthdate', 'deathdate',
+                 'birthdate2', 'deathdate2', 'name_and_dates', 'first_letter',
+                 'aliases', 'webpages')
+
+    @property
+    def first_lettter(self):
+        # spelling of GutenbergDatabaseDublinCore
+        return self.first_letter
+
+
+class LangRecord(Record):
+    __slots__ = ('id', 'language')
+
+
+class SubjectRecord(Record):
+    __slots__ = ('id', 'subject')
+
+
+class BookshelfRecord(Record):
+    __slots__ = ('id', 'bookshelf')
+
+
+class LoccRecord(Record):
+    __slots__ = ('id', 'locc')
+
+
+class DcmitypeRecord(Record):
+    __slots__ = ('id', 'description')
+
+
+class MarcRecord(Record):
+    __slots__ = ('code', 'text', 'caption')
+
+
+class FileRecord(Record):
+    __slots__ = ('id', 'archive_path', 'filename', 'url', 'extent', 'hr_extent', 'modified',
+                 'filetype', 'hr_filetype', 'encoding', 'compression', 'generated',
+                 'mediatype', 'mediatypes', 'diskstatus', 'obsoleted')
+
+    # names of the ORM File
+    @property
+    def fk_filetypes(self):
+        return self.filetype
+
+    @property
+    def fk_encodings(self):
+        return self.encoding
+
+
+def _pack(value):
+    """ Make value marshallable. """
+    if isinstance(value, datetime.datetime):
+        return (DATETIME, value.isoformat())
+    if isinstance(value, datetime.date):
+        return (DATE, value.toordinal())
+    return value
+
+
+def _unpack(value):
+    if type(value) is tuple and len(value) == 2:
+        if value[0] == DATE:
+            return datetime.date.fromordinal(value[1])
+        if value[0] == DATETIME:
+            return datetime.datetime.fromisoformat(value[1])
+    return value
+
+
+def _dcimt(mimetype):
+    """ A DCIMT for an already formatted mimetype. """
+    mediatype = gg.DCIMT.__new__(gg.DCIMT)
+    mediatype.mimetype = mimetype
+    return mediatype
+
+
+def _pairs(objs, names):
+    return tuple(tuple(getattr(obj, name, None) for name in names) for obj in objs)
+
+
+def _author(author):
+    name_and_dates = getattr(author, 'name_and_dates', None) or author.name
+    first_letter = getattr(author, 'first_letter', None) or getattr(author, 'first_lettter', None)
+    if first_letter is None:
+        match = RE_FIRST_AZ.search(name_and_dates.lower())
+        first_letter = match.group(0) if match else 'other'
+    return (
+        getattr(author, 'id', None), author.name, getattr(author, 'marcrel', None),
+        getattr(author, 'role', None), getattr(author, 'heading', None),
+        getattr(author, 'birthdate', None), getattr(author, 'deathdate', None),
+        getattr(author, 'birthdate2', None), getattr(author, 'deathdate2', None),
+        name_and_dates, first_letter,
+        _pairs(getattr(author, 'aliases', None) or (), AliasRecord.__slots__),
+        _pairs(getattr(author, 'webpages', None) or (), WebpageRecord.__slots__),
+    )
+
+
+def _file(file_):
+    mediatypes = getattr(file_, 'mediatypes', None) or ()
+    return (
+        getattr(file_, 'id', None), file_.archive_path, getattr(file_, 'filename', None),
+        getattr(file_, 'url', None), file_.extent, getattr(file_, 'hr_extent', None),
+        _pack(file_.modified), file_.filetype, getattr(file_, 'hr_filetype', None),
+        file_.encoding, file_.compression, getattr(file_, 'generated', None),
+        getattr(file_, 'mediatype', None), tuple(str(mediatype) for mediatype in mediatypes),
+        getattr(file_, 'diskstatus', 0), getattr(file_, 'obsoleted', 0),
+    )
+
+
+def to_bytes(dc):
+    """ Return the snapshot of a DublinCore object. """
+    pubinfo = dc.pubinfo
+    payload = (
+        tuple(_pack(getattr(dc, name, None)) for name in FIELDS),
+        tuple(_author(author) for author in dc.authors),
+        _pairs(dc.languages, LangRecord.__slots__),
+        _pairs(dc.subjects, SubjectRecord.__slots__),
+        _pairs(dc.bookshelves, BookshelfRecord.__slots__),
+        _pairs(dc.loccs, LoccRecord.__slots__),
+        _pairs(dc.dcmitypes, DcmitypeRecord.__slots__),
+        _pairs(getattr(dc, 'marcs', ()), MarcRecord.__slots__),
+        tuple(_file(file_) for file_ in getattr(dc, 'files', ())),
+        (pubinfo.publisher, [tuple(year) for year in pubinfo.years], pubinfo.place,
+         pubinfo.country, pubinfo.raw_info_str),
+    )
+    return MAGIC + bytes((VERSION,)) + marshal.dumps(payload, MARSHAL_VERSION)
+
+
+def from_bytes(data, cls=None):
+    """ Return a new cls, default GutenbergDublinCore, loaded from a snapshot. """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('not a DublinCore snapshot')
+    version = data[len(MAGIC)]
+    if version > VERSION:
+        raise ValueError('DublinCore snapshot version %d is newer than %d' % (version, VERSION))
+    (fields, authors, languages, subjects, bookshelves, loccs, dcmitypes, marcs, files,
+     pubinfo) = marshal.loads(data[len(MAGIC) + 1:])
+
+    if cls is None:
+        from .DublinCore import GutenbergDublinCore as cls
+    dc = cls()
+    state = dc.__dict__
+    for name, value in zip(FIELDS, fields):
+        state[name] = _unpack(value)
+
+    dc.authors = []
+    for author in authors:
+        record = AuthorRecord(*author)
+        record.aliases = [AliasRecord(*alias) for alias in record.aliases]
+        record.webpages = [WebpageRecord(*webpage) for webpage in record.webpages]
+        dc.authors.append(record)
+    dc.languages = [LangRecord(*values) for values in languages]
+    dc.subjects = [SubjectRecord(*values) for values in subjects]
+    dc.bookshelves = [BookshelfRecord(*values) for values in bookshelves]
+    dc.loccs = [LoccRecord(*values) for values in loccs]
+    dc.dcmitypes = [DcmitypeRecord(*values) for values in dcmitypes]
+    dc.marcs = [MarcRecord(*values) for values in marcs]
+    dc.files = []
+    for values in files:
+        record = FileRecord(*values)
+        record.modified = _unpack(record.modified)
+        record.mediatypes = [_dcimt(mimetype) for mimetype in record.mediatypes]
+        dc.files.append(record)
+
+    dc.pubinfo = PubInfo()
+    (dc.pubinfo.publisher, years, dc.pubinfo.place, dc.pubinfo.country,
+     dc.pubinfo.raw_info_str) = pubinfo
+    dc.pubinfo.years = [tuple(year) for year in years]
+    return dc
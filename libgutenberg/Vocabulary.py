@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+Vocabulary.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+Process-wide cache of the small lookup tables: langs, roles, filetypes,
+encodings, compressions, loccs and subjects.
+
+Each table is read once, indexed by primary key and by natural key, and kept
+until it is older than the ttl or invalidated. A key that isn't in the table
+is looked for in the database, and remembered if it isn't there either:
+
+    from libgutenberg.Vocabulary import vocabularies
+    lang = vocabularies.lookup('langs', 'German', session)
+    vocabularies.invalidate('subjects')
+
+Lookups return instances attached to the caller's session, so they can be
+appended to a book's relationships without further queries.
+
+"""
+
+import threading
+import time
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+
+from .Logger import debug
+from .Models import Compression, Encoding, Filetype, Lang, Locc, Role, Subject
+
+# name: (model, natural key attribute)
+VOCABULARIES = {
+    'langs':        (Lang, 'language'),
+    'roles':        (Role, 'role'),
+    'filetypes':    (Filetype, 'filetype'),
+    'encodings':    (Encoding, None),
+    'compressions': (Compression, 'compression'),
+    'loccs':        (Locc, 'locc'),
+    'subjects':     (Subject, 'subject'),
+}
+
+
+class Vocabulary(object):
+    """ One lookup table, indexed by primary key and natural key. """
+
+    def __init__(self, model, key):
+        self.model = model
+        self.key = key
+        self.pk = inspect(model).get_property_by_column(inspect(model).primary_key[0]).key
+        self.by_pk = {}
+        self.by_key = {}
+        self.missing = set()  # (attribute, value) not in the database
+        self.loaded_at = time.monotonic()
+
+    def add(self, obj):
+        self.by_pk[getattr(obj, self.pk)] = obj
+        if self.key:
+            # the first row wins, like query(...).first()
+            self.by_key.setdefault(getattr(obj, self.key), obj)
+
+
+class VocabularyCache(object):
+    """ Cache of lookup tables. ttl is in seconds, None to keep tables until invalidated. """
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._tables = {}
+        self._lock = threading.Lock()
+
+
+    def invalidate(self, name=None):
+        """ Forget one table, or all of them. """
+        with self._lock:
+            if name is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(name, None)
+
+
+    def _table(self, name, session):
+        """ Return the Vocabulary for name, loading it if missing or expired. """
+        with self._lock:
+            table = self._tables.get(name)
+            if table is None or (self.ttl is not None
+                                 and time.monotonic() - table.loaded_at > self.ttl):
+                model, key = VOCABULARIES[name]
+                table = Vocabulary(model, key)
+                for obj in self._query(session, select(model)):
+                    table.add(obj)
+                debug("Loaded %d %s.", len(table.by_pk), name)
+                self._tables[name] = table
+            return table
+
+
+    @staticmethod
+    def _query(session, query):
+        """ Run query in a private session on the caller's connection.
+
+        Instances come back detached, so the cache never holds on to the caller's
+        objects and may hand them out to any session.
+        """
+        private = Session(bind=session.connection())
+        try:
+            return private.execute(query).scalars().all()
+        finally:
+            private.close()
+
+
+    def _miss(self, table, attribute, value, session):
+        """ Look for a row added after the table was loaded.
+
+        Values that aren't in the database either are remembered until the
+        table expires or is invalidated. """
+        if (attribute, value) in table.missing:
+            return None
+        column = getattr(table.model, attribute)
+        obj = self._query(session, select(table.model).where(column == value).limit(1))
+        with self._lock:
+            if obj:
+                table.add(obj[0])
+                return obj[0]
+            table.missing.add((attribute, value))
+        return None
+
+
+    def get(self, name, pk, session):
+        """ Return the row with primary key pk attached to session, or None. """
+        table = self._table(name, session)
+        obj = table.by_pk.get(pk)
+        if obj is None:
+            obj = self._miss(table, table.pk, pk, session)
+        return session.merge(obj, load=False) if obj is not None else None
+
+
+    def lookup(self, name, key, session):
+        """ Return the row with natural key key attached to session, or None. """
+        table = self._table(name, session)
+        obj = table.by_key.get(key)
+        if obj is None:
+            obj = self._miss(table, table.key, key, session)
+        return session.merge(obj, load=False) if obj is not None else None
+
+
+    def find(self, name, value, session):
+        """ Return the row with primary key or natural key value attached to
+        session, or None. Both keys must have the same type, as in langs. """
+        table = self._table(name, session)
+        obj = table.by_pk.get(value)
+        if obj is None:
+            obj = table.by_key.get(value)
+        if obj is None:
+            obj = self._miss(table, table.pk, value, session)
+        if obj is None:
+            obj = self._miss(table, table.key, value, session)
+        return session.merge(obj, load=False) if obj is not None else None
+
+
+    def pks(self, name, session):
+        """ Return the list of primary keys of table name. """
+        return list(self._table(name, session).by_pk.keys())
+
+
+    def values(self, name, session):
+        """ Return the detached rows of table name, for read-only use. """
+        return list(self._table(name, session).by_pk.values())
+
+
+vocabularies = VocabularyCache()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import datetime
+import importlib.util
+import unittest
+
+from libgutenberg import DBUtils, GutenbergDatabase
+from libgutenberg.CommonOptions import Options
+
+db_exists = GutenbergDatabase.db_exists and importlib.util.find_spec('asyncpg') is not None
+options = Options()
+options.config = None
+if db_exists:
+    import psycopg2
+    try:
+        GutenbergDatabase.Database().connect()
+    except psycopg2.OperationalError:
+        db_exists = False
+        Warning("can't connect to database")
+
+if db_exists:
+    from libgutenberg import AsyncDBUtils
+    from libgutenberg.DublinCoreMapping import DublinCoreObject
+
+
+@unittest.skipIf(not db_exists, 'database or asyncpg not configured')
+class TestAsyncDBUtils(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncTearDown(self):
+        await AsyncDBUtils.engines.dispose()
+
+    async def test_lookups(self):
+        self.assertTrue(await AsyncDBUtils.ebook_exists(2600))
+        self.assertFalse(await AsyncDBUtils.ebook_exists(999999))
+        self.assertEqual(await AsyncDBUtils.last_ebook(), DBUtils.last_ebook())
+        self.assertEqual(await AsyncDBUtils.top_books(10), DBUtils.top_books(10))
+        since = datetime.date.today() - datetime.timedelta(days=30)
+        self.assertEqual(sorted(await AsyncDBUtils.recent_books(since)),
+                         sorted(DBUtils.recent_books(since)))
+        self.assertEqual(sorted(await AsyncDBUtils.filetype_books('epub.images')),
+                         sorted(DBUtils.filetype_books('epub.images')))
+        author = await AsyncDBUtils.author_exists('Tolstoy, Leo, graf')
+        self.assertEqual(author.name, 'Tolstoy, Leo, graf')
+
+    async def test_shared_session(self):
+        async with AsyncDBUtils.get_session() as session:
+            self.assertTrue(await AsyncDBUtils.ebook_exists(2600, session=session))
+            self.assertEqual(await AsyncDBUtils.last_ebook(session=session),
+                             DBUtils.last_ebook())
+
+    async def test_load_dc(self):
+        sync_dc = DublinCoreObject()
+        sync_dc.load_from_database(2600)
+        dc = await AsyncDBUtils.load_dc(2600)
+        self.assertEqual(dc.title, sync_dc.title)
+        self.assertEqual([author.name for author in dc.authors],
+                         [author.name for author in sync_dc.authors])
+        self.assertEqual(sorted(file_.archive_path for file_ in dc.files),
+                         sorted(file_.archive_path for file_ in sync_dc.files))
+        sync_dc.session.close()
+        self.assertIsNone(await AsyncDBUtils.load_dc(999999))
+
+    async def test_concurrent_loads(self):
+        ebooks = await AsyncDBUtils.top_books(10)
+        dcs = await asyncio.gather(*[AsyncDBUtils.load_dc(ebook) for ebook in ebooks])
+        self.assertEqual([dc.project_gutenberg_id for dc in dcs], ebooks)
+        many = await AsyncDBUtils.load_many(ebooks, load_files=False)
+        self.assertEqual(list(many.keys()), ebooks)
@@ -2,12 +2,38 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
 
+import importlib.util
+import io
 import os
+import shutil
+import tempfile
 import unittest
 
 from libgutenberg import Cover
 from libgutenberg.DublinCore import DublinCore as dc
 
+class TestPetscii(unittest.TestCase):
+
+    def test_shapes(self):
+        self.assertEqual(set(Cover.PETSCII_SHAPES), set(Cover.C64_LETTERS))
+        x, y, s, t = 40, 240, 40, 4
+        for c in Cover.C64_LETTERS:
+            for layer, kind, shape in Cover.PETSCII_SHAPES[c]:
+                self.assertIn(layer, (Cover.SHAPE, Cover.BASE))
+                args = shape(x, y, s, t)
+                if kind == Cover.TRIANGLE:
+                    xs, ys = args[0::2], args[1::2]
+                elif kind == Cover.ARC:
+                    # quarter circles with the center on a corner of the cell
+                    self.assertEqual(args[2:4], (2 * s, 2 * s))
+                    continue
+                else:
+                    self.assertIn(kind, (Cover.RECT, Cover.ELLIPSE))
+                    xs, ys = (args[0], args[0] + args[2]), (args[1], args[1] + args[3])
+                self.assertTrue(all(x <= v <= x + s for v in xs), c)
+                self.assertTrue(all(y <= v <= y + s for v in ys), c)
+
+
 @unittest.skipIf(not 'cairo' in dir(Cover), 'cover generator not configured')
 class TestMakeCovers(unittest.TestCase):
 
@@ -29,6 +55,69 @@ class TestMakeCovers(unittest.TestCase):
             print("OSError, probably Cairo not installed.")
             return None
 
+    def test_reuse_image(self):
+        fresh = Cover.draw(self.dc)
+        image = Cover.Image(400, 600)
+        Cover.draw_cover("Another Title", "", "Someone", cover_image=image)
+        reused = Cover.draw_cover(self.dc.title_no_subtitle, self.dc.subtitle,
+                                  self.dc.authors_short(), cover_image=image)
+        self.assertIs(reused, image)
+        self.assertEqual(bytes(reused.surface.get_data()), bytes(fresh.surface.get_data()))
+        with self.assertRaises(ValueError):
+            Cover.draw_cover("Title", "", "Someone", 200, 300, cover_image=image)
+
+    def test_text_layout(self):
+        image = Cover.Image(400, 600)
+        font = image.font('Noto Sans', (32, Cover.cairo.FONT_SLANT_NORMAL,
+                                        Cover.cairo.FONT_WEIGHT_BOLD))
+        scaled_font = image.scaled_font(font)
+        text = "The Life and Strange Surprizing Adventures of Robinson Crusoe, of York"
+        layout = Cover.TextLayout(scaled_font, text)
+        self.assertAlmostEqual(layout.width(0, len(text)), scaled_font.text_extents(text)[4])
+        lines = list(layout.lines(0.5))
+        self.assertGreater(len(lines), 1)
+        self.assertEqual(" ".join(text[start:end] for start, end, _ in lines), text)
+        for start, end, chopped in lines:
+            self.assertFalse(chopped)
+            self.assertLess(layout.width(start, end), 0.5)
+
+        layout = Cover.TextLayout(scaled_font, "紅樓夢一名石頭記又名情僧錄風月寶鑑" * 4)
+        [(start, end, chopped)] = layout.lines(0.5)
+        self.assertTrue(chopped)
+        self.assertEqual(start, 0)
+        self.assertLess(layout.width(start, end) + layout.ellipsis_width, 0.5)
+        self.assertEqual(len(layout.glyphs_at(start, end, 0, 0, chopped)), end + 1)
+
+    def test_formats(self):
+        outputs = [(400, 600, 'png'), (200, 300, 'png')]
+        if importlib.util.find_spec('PIL'):
+            outputs += [(200, 300, 'jpeg'), (100, 150, 'webp')]
+        images = Cover.draw_formats(self.dc, outputs)
+        self.assertEqual(sorted(images), sorted(outputs))
+        self.assertTrue(images[(400, 600, 'png')].startswith(b'\x89PNG'))
+        small = Cover.cairo.ImageSurface.create_from_png(io.BytesIO(images[(200, 300, 'png')]))
+        self.assertEqual((small.get_width(), small.get_height()), (200, 300))
+        if (200, 300, 'jpeg') in images:
+            self.assertTrue(images[(200, 300, 'jpeg')].startswith(b'\xff\xd8'))
+            self.assertTrue(images[(100, 150, 'webp')].startswith(b'RIFF'))
+        with self.assertRaises(ValueError):
+            Cover.Image(10, 10).encode('gif')
+
+    def test_render_many(self):
+        out_dir = tempfile.mkdtemp()
+        try:
+            self.dc.project_gutenberg_id = 99999
+            stats = Cover.render_many([self.dc], out_dir, workers=1)
+            self.assertEqual((stats.count, stats.errors), (1, 0))
+            self.assertTrue(os.path.exists(os.path.join(out_dir, 'pg99999.cover.png')))
+            with self.assertLogs(level='WARNING') as logs:
+                stats = Cover.render_many([self.dc], out_dir, workers=1,
+                                          filename='pg{ebook}.cover.gif')
+            self.assertEqual((stats.count, stats.errors), (1, 1))
+            self.assertIn('pg99999.cover.gif', logs.output[0])
+        finally:
+            shutil.rmtree(out_dir)
+
     def tearDown(self):
         if os.path.exists(self.test_path):
             os.remove(self.test_path)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+from libgutenberg import Cover
+from libgutenberg.CoverCache import CoverCache, key
+from libgutenberg.DublinCore import DublinCore as dc
+
+
+class TestCoverCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = CoverCache(os.path.join(self.directory, 'covers'), maxbytes=1000)
+
+    def test_key(self):
+        self.assertEqual(key('Title', None, 'Author'), key('Title', '', 'Author'))
+        self.assertNotEqual(key('Title', '', 'Author'), key('Title', '', 'Other Author'))
+        self.assertNotEqual(key('Title', '', 'Author'), key('Title', '', 'Author', 200, 300))
+        self.assertNotEqual(key('Ti', 'tle', 'Author'), key('Title', '', 'Author'))
+        version = Cover.RENDERER_VERSION
+        try:
+            old = key('Title', '', 'Author')
+            Cover.RENDERER_VERSION = version + 1
+            self.assertNotEqual(key('Title', '', 'Author'), old)
+        finally:
+            Cover.RENDERER_VERSION = version
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get('ab12'))
+        self.cache.put('ab12', b'png')
+        self.assertEqual(self.cache.get('ab12'), b'png')
+        self.cache.put('ab12', b'png2')
+        self.assertEqual(self.cache.get('ab12'), b'png2')
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('ab12'))
+
+    def test_evict(self):
+        self.cache.maxbytes = 1600
+        for i in range(5):
+            self.cache.put('%02d' % i, b'x' * 300)
+            os.utime(self.cache._path('%02d' % i), (i, i))
+        self.cache.get('00')
+        self.cache.maxbytes = 1000
+        self.cache.put('05', b'x' * 300)
+        # 0 was used recently, 1 to 3 went to get down to 90% of maxbytes
+        self.assertEqual([i for i in range(6) if self.cache.get('%02d' % i)], [0, 4, 5])
+        self.assertLessEqual(self.cache._size, 1000)
+
+    def test_overwrite(self):
+        self.cache.maxbytes = 10 ** 6
+        for dummy in range(10):
+            self.cache.put('ab12', b'x' * 300)
+        self.assertEqual(self.cache._size, 300)
+        self.assertEqual(self.cache.get('ab12'), b'x' * 300)
+
+    def test_get_evicted(self):
+        self.cache.put('ab12', b'png')
+        utime = os.utime
+        def evicted(path, *args):
+            os.unlink(path)
+            utime(path, *args)
+        os.utime = evicted
+        try:
+            self.assertEqual(self.cache.get('ab12'), b'png')
+        finally:
+            os.utime = utime
+        self.assertIsNone(self.cache.get('ab12'))
+
+    def test_disabled(self):
+        cache = CoverCache()
+        cache.put('ab12', b'png')
+        self.assertIsNone(cache.get('ab12'))
+
+    @unittest.skipIf(not 'cairo' in dir(Cover), 'cover generator not configured')
+    def test_cover(self):
+        book = dc()
+        book.add_author("Duck, Donald")
+        book.title = "A truly amazing book"
+        self.cache.maxbytes = 10 ** 7
+        png = self.cache.cover(book)
+        self.assertEqual(self.cache.cover(book), png)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(png, Cover.draw(book).save())
+        with self.assertRaises(ValueError):
+            self.cache.save(book, os.path.join(self.directory, 'cover.gif'))
+        if not importlib.util.find_spec('PIL'):
+            return
+        filename = os.path.join(self.directory, 'cover.jpg')
+        self.cache.save(book, filename)
+        with open(filename, 'rb') as f:
+            self.assertTrue(f.read().startswith(b'\xff\xd8'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
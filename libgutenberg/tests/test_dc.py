@@ -2,13 +2,14 @@
 # -*- coding: utf-8 -*-
 
 import datetime
+import io
 import os
 import unittest
 
 
 from libgutenberg.CommonOptions import Options
 from libgutenberg import GutenbergDatabase, GutenbergDatabaseDublinCore, DummyConnectionPool
-from libgutenberg import DBUtils, DublinCoreMapping
+from libgutenberg import DBUtils, DublinCore, DublinCoreMapping
 from libgutenberg.Logger import debug, warning
 from libgutenberg.Models import Attribute, Book
 
@@ -89,6 +90,57 @@ class TestDC(unittest.TestCase):
         self.assertEqual(dc2.dcmitypes[0].id, 'Text')
 
 
+    def test_load_many(self):
+        dcs = DublinCoreMapping.DublinCoreObject.load_many([self.ebook, self.ebook2, 199])
+        self.assertEqual(list(dcs.keys()), [self.ebook, self.ebook2])
+        self.assertEqual(dcs[self.ebook].title, self.title)
+        dc = DublinCoreMapping.DublinCoreObject()
+        dc.load_from_database(self.ebook2)
+        dc2 = dcs[self.ebook2]
+        self.assertEqual([a.name for a in dc.authors], [a.name for a in dc2.authors])
+        self.assertEqual([m.text for m in dc.marcs], [m.text for m in dc2.marcs])
+        self.assertEqual([f.url for f in dc.files], [f.url for f in dc2.files])
+        self.assertEqual(dc.mediatypes, dc2.mediatypes)
+
+    def test_join_loaders(self):
+        session = DBUtils.check_session(None)
+        ebooks = [self.ebook, self.ebook2]
+        books = session.query(Book).filter(Book.pk.in_(ebooks)).order_by(Book.pk).all()
+        expected = [([(f.archive_path, f.ftsortorder, f.encsortorder) for f in book.files],
+                     [(a.name, a.role, a.heading, a.name_and_dates) for a in book.authors])
+                    for book in books]
+        session.close()
+
+        session = DBUtils.check_session(None)
+        books = session.query(Book).filter(Book.pk.in_(ebooks)).order_by(Book.pk).all()
+        DublinCoreMapping.load_book_files(session, books)
+        DublinCoreMapping.load_book_authors(session, books)
+        self.assertEqual([([(f.archive_path, f.ftsortorder, f.encsortorder) for f in book.files],
+                           [(a.name, a.role, a.heading, a.name_and_dates) for a in book.authors])
+                          for book in books], expected)
+        self.assertFalse(session.dirty)
+        session.close()
+
+    def test_load_many_from_database(self):
+        dcs = GutenbergDatabaseDublinCore.GutenbergDatabaseDublinCore.load_many_from_database(
+            self.dummypool, [self.ebook, self.ebook2, 199])
+        self.assertEqual(list(dcs.keys()), [self.ebook, self.ebook2])
+        self.assertEqual(dcs[self.ebook].title, self.title)
+        dc = GutenbergDatabaseDublinCore.GutenbergDatabaseDublinCore(self.dummypool)
+        dc.load_from_database(self.ebook2)
+        dc2 = dcs[self.ebook2]
+        self.assertEqual([a.name for a in dc.authors], [a.name for a in dc2.authors])
+        self.assertEqual([[alias.alias for alias in a.aliases] for a in dc.authors],
+                         [[alias.alias for alias in a.aliases] for a in dc2.authors])
+        self.assertEqual([f.url for f in dc.files], [f.url for f in dc2.files])
+        # ebook numbers as strings, as the baseline accepted them
+        dcs = GutenbergDatabaseDublinCore.GutenbergDatabaseDublinCore.load_many_from_database(
+            self.dummypool, [str(self.ebook)])
+        self.assertEqual(list(dcs.keys()), [self.ebook])
+        dc = GutenbergDatabaseDublinCore.GutenbergDatabaseDublinCore(self.dummypool)
+        dc.load_from_database(str(self.ebook))
+        self.assertEqual(dc.title, self.title)
+
     def test_files(self):
         dc = GutenbergDatabaseDublinCore.GutenbergDatabaseDublinCore(self.dummypool)
         self.files_test1(dc)
@@ -229,6 +281,52 @@ class TestDC(unittest.TestCase):
     def tearDown(self):
         pass
 
+class TestPGHeaderParser(unittest.TestCase):
+    def test_parse_many(self):
+        datas = []
+        for name in ('99999-h.htm', '99999.json'):
+            with open(os.path.join(os.path.dirname(__file__), name), 'r') as f:
+                datas.append(f.read())
+        datas.append('Title: Foo\n\n')
+        dcs = list(DublinCore.pgheader_parser.parse_many(datas))
+        self.assertEqual(dcs[0].title, 'The Fake EBook of "Testing"')
+        self.assertEqual(len(dcs[0].authors), 6)
+        self.assertEqual(dcs[1].project_gutenberg_id, 99999)
+        self.assertEqual(dcs[2].title, 'Foo')
+        self.assertEqual(dcs[2].project_gutenberg_id, None)
+
+        dc = DublinCore.GutenbergDublinCore()
+        dc.load_from_pgheader(datas[0])
+        self.assertEqual([a.name for a in dc.authors], [a.name for a in dcs[0].authors])
+
+    def test_load_from_pgheader_file(self):
+        for name in ('99999-h.htm', '99999.json'):
+            path = os.path.join(os.path.dirname(__file__), name)
+            dc = DublinCore.GutenbergDublinCore()
+            dc.load_from_pgheader_file(path)
+            with open(path, 'r') as f:
+                expected = DublinCore.GutenbergDublinCore()
+                expected.load_from_pgheader(f.read())
+            self.assertEqual(dc.title, expected.title)
+            self.assertEqual([a.name for a in dc.authors], [a.name for a in expected.authors])
+            self.assertEqual(dc.project_gutenberg_id, expected.project_gutenberg_id)
+
+        # stops reading at the START OF line
+        data = 'Title: Foo\n\n*** START OF THE PROJECT GUTENBERG EBOOK ***\n' + 'x' * 10000000
+        fileobj = io.BytesIO(data.encode('utf-8'))
+        dc = DublinCore.GutenbergDublinCore()
+        dc.load_from_pgheader_file(fileobj)
+        self.assertEqual(dc.title, 'Foo')
+        self.assertTrue(fileobj.tell() <= DublinCore.HEADER_CHUNK)
+
+        # minified html without a START OF line
+        data = '<html><body>' + '<p>Title: Foo</p>' * 1000000
+        fileobj = io.BytesIO(data.encode('utf-8'))
+        header = DublinCore.read_pgheader(fileobj)
+        self.assertTrue(header.startswith('<body>'))
+        self.assertTrue(fileobj.tell() <= DublinCore.HEADER_MAX + DublinCore.HEADER_CHUNK)
+
+
 @unittest.skipIf(not db_exists, 'database not configured')
 class TestDCLoader(unittest.TestCase):
     def setUp(self):
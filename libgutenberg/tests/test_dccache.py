@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from libgutenberg import GutenbergDatabase
+from libgutenberg.CommonOptions import Options
+from libgutenberg.DCCache import DCCache, DiskBackend, MemoryBackend
+
+db_exists = GutenbergDatabase.db_exists
+options = Options()
+options.config = None
+if db_exists:
+    import psycopg2
+    try:
+        GutenbergDatabase.Database().connect()
+    except psycopg2.OperationalError:
+        db_exists = False
+        Warning("can't connect to database")
+
+
+class TestBackends(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def test_memory(self):
+        backend = MemoryBackend(maxsize=2)
+        backend.set(1, b'one')
+        backend.set(2, b'two')
+        self.assertEqual(backend.get(1), b'one')
+        backend.set(3, b'three')
+        # 2 was least recently used
+        self.assertEqual(backend.get(2), None)
+        self.assertEqual(backend.get(1), b'one')
+        backend.delete(1)
+        self.assertEqual(backend.get(1), None)
+        backend.clear()
+        self.assertEqual(backend.get(3), None)
+
+    def test_disk(self):
+        backend = DiskBackend(os.path.join(self.directory, 'dc'))
+        backend.set(1, b'one')
+        backend.set(1, b'uno')
+        self.assertEqual(backend.get(1), b'uno')
+        self.assertEqual(backend.get(2), None)
+        backend.set(2, b'two')
+        backend.delete(1)
+        backend.delete(1)
+        self.assertEqual(backend.get(1), None)
+        backend.clear()
+        self.assertEqual(os.listdir(backend.directory), [])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+@unittest.skipIf(not db_exists, 'database not configured')
+class TestDCCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = DCCache(directory=self.directory)
+
+    def test_read_through(self):
+        dc = self.cache.load(2600)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        cached = self.cache.load(2600)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertFalse(cached is dc)
+        self.assertEqual(cached.title, dc.title)
+        self.assertEqual([author.name_and_dates for author in cached.authors],
+                         [author.name_and_dates for author in dc.authors])
+        self.assertEqual([file_.url for file_ in cached.files], [file_.url for file_ in dc.files])
+        self.assertTrue(cached.book is None)
+        self.assertEqual(self.cache.load(999999), None)
+
+        # served from disk by a process with a cold memory cache
+        other = DCCache(directory=self.directory)
+        self.assertEqual(other.load(2600).title, dc.title)
+        self.assertEqual((other.hits, other.misses), (1, 0))
+
+    def test_stale(self):
+        self.cache.load(2600)
+        self.cache.put(self.cache.get(2600), ('outdated',))
+        self.assertTrue(self.cache.get(2600) is not None)
+        self.cache.check_stale = True
+        self.assertTrue(self.cache.load(2600) is not None)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+
+    def test_invalidate(self):
+        from libgutenberg import DCCache as module
+        from libgutenberg.DublinCoreMapping import DublinCoreObject
+
+        module.dc_cache.configure(directory=self.directory)
+        module.dc_cache.load(2600)
+        self.assertTrue(module.dc_cache.get(2600) is not None)
+        dc = DublinCoreObject()
+        dc.remove_filetype_from_database(2600, 'no.such.type')
+        dc.session.close()
+        self.assertTrue(module.dc_cache.get(2600) is None)
+        self.assertEqual(os.listdir(self.directory), [])
+        module.dc_cache.configure()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
@@ -1,8 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
+import tempfile
 import unittest
 
+from libgutenberg import ArchiveScanner
 from libgutenberg import GutenbergDatabase
 from libgutenberg import GutenbergFiles
 from libgutenberg.DublinCoreMapping import DublinCoreObject 
@@ -13,6 +16,74 @@ from libgutenberg.Models import Book, File
 global db_exists
 db_exists = GutenbergDatabase.db_exists
 
+class TestFilenameClassifier(unittest.TestCase):
+    def setUp(self):
+        self.classifier = GutenbergFiles.FilenameClassifier(
+            ['txt', 'html', 'md', 'jpg', 'index', 'readme', 'license', 'pageimages'],
+            ['none', 'zip'])
+
+    def test_guess_filetype(self):
+        guess = self.classifier.guess_filetype
+        self.assertEqual(guess('99999-0.txt'), ('txt', 'utf-8'))
+        self.assertEqual(guess('99999.txt'), ('txt', 'us-ascii'))
+        self.assertEqual(guess('99999-8.TXT'), ('txt', 'iso-8859-1'))
+        self.assertEqual(guess('2600/2600-5.txt'), ('txt', 'utf-8'))
+        self.assertEqual(guess('readme.md'), ('md', None))
+        self.assertEqual(guess('99999-h.htm'), ('html', None))
+        self.assertEqual(guess('99999-index.HTML'), ('index', None))
+        self.assertEqual(guess('README.txt'), ('readme', 'utf-8'))
+        self.assertEqual(guess('99999/page-images/readme.txt'), ('pageimages', 'utf-8'))
+        self.assertEqual(guess('notes.doc'), (None, None))
+        self.assertEqual(guess('noext'), (None, None))
+
+    def test_classify_many(self):
+        self.assertEqual(self.classifier.classify_many([
+            '9/9/9/9/99999/99999-0.txt',
+            '99999/99999-h/images/cover.jpg',
+            '99999/99999-h.zip',
+            '9/9/9/9/99999/old/99999.txt',
+            '99999/LICENSE.txt',
+        ]), [
+            ('txt', 'utf-8', 'none', 0, 0),
+            ('jpg', None, 'none', 1, 0),
+            (None, None, 'zip', 0, 0),
+            ('txt', 'utf-8', 'none', 0, 1),
+            ('license', 'utf-8', 'none', 1, 0),
+        ])
+
+    def test_get_ebook_id(self):
+        get = GutenbergFiles.get_ebook_id
+        self.assertEqual(get('1/2/3/4/12345'), 12345)
+        self.assertEqual(get('1/2/3/4/12345/12345-h/images'), 12345)
+        self.assertEqual(get('12345/12345-h'), 12345)
+        self.assertEqual(get('0/5'), 5)
+        self.assertEqual(get('1/10'), 10)
+        self.assertIsNone(get('1'))
+        self.assertIsNone(get('1/2/3'))
+        self.assertIsNone(get('etext90'))
+        self.assertIsNone(get('cache/epub/12345'))
+
+
+class TestArchiveScannerScope(unittest.TestCase):
+    def test_legacy_directory(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = os.path.join(os.path.realpath(tmpdir), 'files')
+            os.makedirs(os.path.join(root, 'etext90'))
+            with open(os.path.join(root, 'etext90', 'when11.txt'), 'w') as f:
+                f.write('test')
+            files = GutenbergFiles.FILES
+            GutenbergFiles.FILES = root + '/'
+            try:
+                scanner = ArchiveScanner.ArchiveScanner([root], full=True)
+                scanner.scan()
+            finally:
+                GutenbergFiles.FILES = files
+            # no ebook number: the rows of etext90/ are left alone
+            self.assertIn('etext90', scanner.visited)
+            self.assertNotIn('etext90', scanner.examined)
+            self.assertFalse(scanner._in_scope('etext90/when11.txt'))
+
+
 class TestGutenbergFiles(unittest.TestCase):
     def setUp(self):
         self.dc = DublinCoreObject()
@@ -41,8 +112,82 @@ class TestGutenbergFiles(unittest.TestCase):
             session=self.dc.session)
         self.assertEqual(book.files[0].archive_path, '99999/99999.txt')
 
+    @unittest.skipIf(not db_exists, 'database not configured')
+    def test_store_files_in_database(self):
+        book = self.dc.load_or_create_book(99999)
+        tmpdir = tempfile.TemporaryDirectory()
+        txt = os.path.join(tmpdir.name, '99999-0.txt')
+        html = os.path.join(tmpdir.name, '99999-h.htm')
+        other = os.path.join(tmpdir.name, '99999.xyz')
+        for filename in (txt, html, other):
+            with open(filename, 'w') as f:
+                f.write('test')
+        missing = os.path.join(tmpdir.name, '99999.epub')
+        same = os.path.join(tmpdir.name, '.', '99999-0.txt')
+        files = [(txt, None, None), (html, 'html', None), (missing, None, None),
+                 (other, 'nosuchtype', None), (same, None, None)]
+        report = GutenbergFiles.store_files_in_database(99999, files, session=self.dc.session)
+        self.assertEqual(len(report), len(files))
+        self.assertEqual(report[txt], GutenbergFiles.STORED)
+        self.assertEqual(report[same], GutenbergFiles.STORED)
+        self.assertEqual(report[missing], GutenbergFiles.MISSING)
+        self.assertEqual(report[html], GutenbergFiles.STORED)
+        self.assertEqual(report[other], GutenbergFiles.BADTYPE)
+
+        # again, as an update
+        report = GutenbergFiles.store_files_in_database(99999, files[:1], session=self.dc.session)
+        self.assertEqual(report[txt], GutenbergFiles.STORED)
+        self.paths = [GutenbergFiles.parse_filename(f)[2] for f in (txt, html)]
+        self.dc.session.expire_all()
+        self.assertEqual(sorted(f.archive_path for f in book.files), sorted(self.paths))
+        tmpdir.cleanup()
+
+    @unittest.skipIf(not db_exists, 'database not configured')
+    def test_archive_scanner(self):
+        self.dc.load_or_create_book(99999)
+        session = self.dc.session
+        tmpdir = tempfile.TemporaryDirectory()
+        root = os.path.join(os.path.realpath(tmpdir.name), 'files')
+        files = GutenbergFiles.FILES
+        GutenbergFiles.FILES = root + '/'
+        try:
+            os.makedirs(os.path.join(root, '99999', '99999-h'))
+            paths = {}
+            for name in ('99999-0.txt', '99999-h/99999-h.htm', 'gone.txt'):
+                paths[name] = os.path.join(root, '99999', name)
+                with open(paths[name], 'w') as f:
+                    f.write('test')
+            GutenbergFiles.store_files_in_database(
+                99999, [(paths['99999-0.txt'], None, None), (paths['gone.txt'], None, None)],
+                session=session)
+            self.paths = ['99999/99999-0.txt', '99999/99999-h/99999-h.htm', '99999/gone.txt']
+            os.remove(paths['gone.txt'])
+            with open(paths['99999-0.txt'], 'a') as f:
+                f.write('more')
+
+            index = os.path.join(tmpdir.name, 'index.json')
+            scanner = ArchiveScanner.ArchiveScanner([root], index_path=index)
+            changes = scanner.reconcile(session=session)
+            self.assertEqual([row['archive_path'] for row in changes.inserts],
+                             ['99999/99999-h/99999-h.htm'])
+            self.assertEqual([row['archive_path'] for row in changes.updates],
+                             ['99999/99999-0.txt'])
+            self.assertEqual([path for id_, path in changes.deletes], ['99999/gone.txt'])
+            scanner.apply(changes, session=session)
+
+            scanner = ArchiveScanner.ArchiveScanner([root], full=True)
+            self.assertEqual(len(scanner.reconcile(session=session)), 0)
+            scanner = ArchiveScanner.ArchiveScanner([root], index_path=index)
+            self.assertEqual(len(scanner.reconcile(session=session)), 0)
+            self.assertFalse(scanner.examined)
+        finally:
+            GutenbergFiles.FILES = files
+            tmpdir.cleanup()
+
     def tearDown(self):
         session = self.dc.session
         session.query(File).filter(File.archive_path == '99999/99999.txt').delete()
+        for path in getattr(self, 'paths', []):
+            session.query(File).filter(File.archive_path == path).delete()
         session.query(Book).filter(Book.pk == 99999).delete()
         session.commit()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from libgutenberg.GutenbergGlobals import language_map
+
+
+class TestLanguageMap(unittest.TestCase):
+    def test_get(self):
+        self.assertEqual(language_map.get('en'), 'English')
+        self.assertEqual(language_map.get('DE'), 'German')
+        self.assertEqual(language_map.get('grc'), 'Ancient Greek (to 1453)')
+        self.assertEqual(language_map.get('nai'), 'North American Indian languages')
+        self.assertEqual(language_map.get('xx'), '')
+        self.assertEqual(language_map.get('english', default='?'), '?')
+        self.assertEqual(language_map.get(None), '')
+
+    def test_inverse(self):
+        self.assertEqual(language_map.inverse('English'), 'en')
+        self.assertEqual(language_map.inverse('french'), 'fr')
+        self.assertEqual(language_map.inverse('Middle English (1100-1500)'), 'enm')
+        self.assertEqual(language_map.inverse('Farsi'), 'fa')
+        self.assertEqual(language_map.inverse('Klingonish'), 'en')
+        self.assertEqual(language_map.inverse('Klingonish', default=None), None)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+
+from libgutenberg import HeaderScan
+
+TESTS = os.path.dirname(__file__)
+
+
+class TestHeaderScan(unittest.TestCase):
+    def test_scan_file(self):
+        result = HeaderScan.scan_file(os.path.join(TESTS, '99999-h.htm'))
+        self.assertEqual(result['format'], 'html')
+        self.assertEqual(result['title'], 'The Fake EBook of "Testing"')
+        self.assertEqual(len(result['authors']), 6)
+        result = HeaderScan.scan_file(os.path.join(TESTS, '99999.json'))
+        self.assertEqual(result['format'], 'json')
+        self.assertEqual(result['id'], 99999)
+        result = HeaderScan.scan_file(os.path.join(TESTS, 'no such file.txt'))
+        self.assertTrue('error' in result)
+
+    def test_scan(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, '123.rst'), 'w') as f:
+                f.write(':pg.id: 123\n:dc.title: Foo\n:dc.language: en\n\nText\n')
+            with open(os.path.join(tmpdir, 'notes.doc'), 'w') as f:
+                f.write('not scanned')
+            with open(os.path.join(tmpdir, 'bad.json'), 'w') as f:
+                f.write('{"no": "data"}')
+            paths = list(HeaderScan.iter_paths([tmpdir, os.path.join(TESTS, '*.json')]))
+            self.assertEqual([os.path.basename(path) for path in paths],
+                             ['123.rst', 'bad.json', '99999.json'])
+            results = {os.path.basename(result['path']): result
+                       for result in HeaderScan.scan(paths, jobs=2)}
+        self.assertEqual(results['123.rst']['format'], 'rst')
+        self.assertEqual(results['123.rst']['id'], 123)
+        self.assertEqual(results['123.rst']['title'], 'Foo')
+        self.assertEqual(results['99999.json']['id'], 99999)
+        self.assertIn('error', results['bad.json'])
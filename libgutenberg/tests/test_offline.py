@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from libgutenberg import GutenbergDatabase
+from libgutenberg.CommonOptions import Options
+from libgutenberg.tests.test_snapshot import metadata
+
+db_exists = GutenbergDatabase.db_exists
+options = Options()
+options.config = None
+if db_exists:
+    import psycopg2
+    try:
+        GutenbergDatabase.Database().connect()
+    except psycopg2.OperationalError:
+        db_exists = False
+        Warning("can't connect to database")
+
+
+# a tiny catalog, in the column order of OfflineCatalog.TABLES
+ROWS = {
+    'books': [(2600, 0, 0, '1996-04-01', 4000)],
+    'attriblist': [(245, '245', 'Title')],
+    'attributes': [(2600, 245, 'War and Peace', 0)],
+    'authors': [(35, 'Tolstoy, Leo, graf', 1828, None, 1910, None),
+                (2000, 'Maude, Louise', 1855, None, 1939, None)],
+    'aliases': [(35, 'Tolstoi, Lev', None)],
+    'author_urls': [(35, 'Wikipedia', 'https://en.wikipedia.org/wiki/Leo_Tolstoy')],
+    'roles': [('aut', 'Author'), ('trl', 'Translator')],
+    'mn_books_authors': [(2600, 35, 'aut', 1), (2600, 2000, 'trl', 2)],
+    'langs': [('en', 'English'), ('ru', 'Russian')],
+    'mn_books_langs': [(2600, 'en')],
+    'subjects': [(1, 'Napoleonic Wars, 1800-1815 -- Campaigns -- Russia -- Fiction')],
+    'mn_books_subjects': [(2600, 1)],
+    'bookshelves': [],
+    'mn_books_bookshelves': [],
+    'loccs': [('PG', 'Language and Literatures: Slavic')],
+    'mn_books_loccs': [(2600, 'PG')],
+    'categories': [(1, 'Audio Book, human-read')],
+    'mn_books_categories': [(2600, 1)],
+    'filetypes': [('txt', 'Plain Text UTF-8', 10, 'text/plain', 0),
+                  ('epub.images', 'EPUB3 (E-readers incl. Send-to-Kindle)', 20,
+                   'application/epub+zip', 1)],
+    'encodings': [('utf-8', 1)],
+    'files': [(1, 2600, '2/6/0/2600/2600-0.txt', 3359630, '2020-06-01T10:00:00', 'txt',
+               'utf-8', None, 0, 0),
+              (2, 2600, 'cache/epub/2600/pg2600-images.epub', 2072143, '2024-01-01T00:00:00',
+               'epub.images', None, None, 0, 0),
+              (3, 2600, '2/6/0/2600/2600.txt', 3200000, '2004-01-01T00:00:00', 'txt',
+               'us-ascii', None, 0, 1)],
+}
+
+
+def write_catalog(path):
+    """ Write ROWS to path like OfflineCatalog.dump does. """
+    from libgutenberg import OfflineCatalog
+
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value)')
+    conn.execute("INSERT INTO meta VALUES ('version', ?)", (OfflineCatalog.VERSION,))
+    for table, (columns, dummy_index) in OfflineCatalog.TABLES.items():
+        conn.execute('CREATE TABLE %s (%s)' % (table, ', '.join(columns)))
+        conn.executemany('INSERT INTO %s VALUES (%s)' % (table, ', '.join('?' * len(columns))),
+                         ROWS[table])
+    conn.commit()
+    conn.close()
+
+
+class TestOfflineCatalogFile(unittest.TestCase):
+    def setUp(self):
+        from libgutenberg.OfflineCatalog import OfflineCatalog
+
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, 'catalog.sqlite')
+        write_catalog(path)
+        self.catalog = OfflineCatalog(path)
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_load(self):
+        from libgutenberg.DublinCoreMapping import PG_URL
+
+        dc = self.catalog.load(2600)
+        self.assertEqual(dc.title, 'War and Peace')
+        self.assertEqual([author.name_and_dates for author in dc.authors],
+                         ['Tolstoy, Leo, graf, 1828-1910', 'Maude, Louise, 1855-1939'])
+        self.assertEqual([author.marcrel for author in dc.authors], ['aut', 'trl'])
+        self.assertEqual([lang.id for lang in dc.languages], ['en'])
+        self.assertEqual([subject.subject for subject in dc.subjects],
+                         ['Napoleonic Wars, 1800-1815 -- Campaigns -- Russia -- Fiction'])
+        self.assertEqual([dcmitype.id for dcmitype in dc.dcmitypes], ['Sound'])
+        self.assertEqual([file_.url for file_ in dc.files],
+                         [PG_URL + 'files/2600/2600-0.txt', PG_URL + 'ebooks/2600.epub.images'])
+        self.assertEqual(self.catalog.ebooks(), [2600])
+        self.assertIsNone(self.catalog.load(99999))
+        self.assertIsNone(dc.session)
+
+
+@unittest.skipIf(not db_exists, 'database not configured')
+class TestOfflineCatalog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from libgutenberg import OfflineCatalog
+
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmpdir, 'catalog.sqlite')
+        OfflineCatalog.dump(cls.path)
+        cls.catalog = OfflineCatalog.OfflineCatalog(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.catalog.close()
+        shutil.rmtree(cls.tmpdir)
+
+    def test_same_as_database(self):
+        from libgutenberg.DublinCoreMapping import DublinCoreObject
+
+        ebooks = [2600, 20050]
+        offline = self.catalog.load_many(ebooks)
+        for ebook, dc in DublinCoreObject.load_many(ebooks).items():
+            self.assertEqual(metadata(offline[ebook]), metadata(dc))
+            self.assertEqual([a.first_letter for a in offline[ebook].authors],
+                             [a.first_letter for a in dc.authors])
+
+    def test_lookups(self):
+        from libgutenberg.OfflineCatalog import OfflineDublinCoreObject
+
+        self.assertIn(2600, self.catalog.ebooks())
+        self.assertIsNone(self.catalog.load(99999999))
+        self.assertEqual(self.catalog.load(2600, load_files=False).files, [])
+        dc = OfflineDublinCoreObject(self.catalog)
+        dc.load_from_database(2600)
+        self.assertEqual(dc.title, 'War and Peace')
+        self.assertIsNone(dc.session)
+        self.assertEqual(sum(1 for _ in self.catalog.iter_books(chunk=7)),
+                         len(self.catalog.ebooks()))
+
+    def test_not_a_catalog(self):
+        from libgutenberg.OfflineCatalog import OfflineCatalog
+
+        with self.assertRaises(FileNotFoundError):
+            OfflineCatalog(os.path.join(self.tmpdir, 'missing.sqlite'))
@@ -1,17 +1,19 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import datetime
 import unittest
 
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.sql import func
 
 
 
-from libgutenberg import GutenbergDatabase
+from libgutenberg import CatalogExport, DBUtils, GutenbergDatabase
 from libgutenberg.CommonOptions import Options
 from libgutenberg.Logger import warning
-from libgutenberg.Models import Book
+from libgutenberg.Models import Book, Lang
+from libgutenberg.Vocabulary import vocabularies
 
 global db_exists
 
@@ -26,6 +28,17 @@ if db_exists:
         db_exists = False
         Warning("can't connect to database")
 
+def export_title(dc):
+    return dc.title
+
+def fail_range(load_many):
+    """ make load_many fail for the books from 2550 """
+    def load(ebooks, **kwargs):
+        if ebooks and ebooks[0] >= 2550:
+            raise ValueError('lost connection')
+        return load_many(ebooks, **kwargs)
+    return load
+
 @unittest.skipIf(not db_exists, 'database not configured')
 class TestORM(unittest.TestCase):
 
@@ -37,5 +50,107 @@ class TestORM(unittest.TestCase):
         num_books = self.session.query(Book).count()
         mx = self.session.execute(select(func.max(Book.pk))).scalars().first()
 
+    def test_iter_books(self):
+        since = datetime.date.today() - datetime.timedelta(days=30)
+        recent = sorted(DBUtils.recent_books(since))
+        dcs = list(DBUtils.iter_books(since=since, chunk=10, session=self.session))
+        self.assertEqual([dc.project_gutenberg_id for dc in dcs], recent)
+        # chunks are expunged once consumed
+        for dc in dcs:
+            self.assertFalse(dc.book in self.session)
+
+    def test_export_catalog(self):
+        titles = dict(CatalogExport.export_catalog(export_title, workers=2,
+                                                   first=2500, last=2700, chunk=50))
+        self.assertTrue(2600 in titles)
+        self.assertEqual(sorted(titles.keys()),
+                         self.session.execute(select(Book.pk).where(
+                             Book.pk >= 2500, Book.pk <= 2700).order_by(Book.pk)).scalars().all())
+
+    def test_export_catalog_error(self):
+        load_many = CatalogExport.DublinCoreObject.__dict__['load_many']
+        CatalogExport.DublinCoreObject.load_many = fail_range(
+            CatalogExport.DublinCoreObject.load_many)
+        titles = {}
+        try:
+            with self.assertRaisesRegex(RuntimeError, r'2550 to 2599 \(ValueError'):
+                for ebook, title in CatalogExport.export_catalog(
+                        export_title, workers=2, first=2500, last=2599, chunk=50):
+                    titles[ebook] = title
+        finally:
+            CatalogExport.DublinCoreObject.load_many = load_many
+        self.assertTrue(titles)
+        self.assertTrue(all(ebook < 2550 for ebook in titles))
+
+    def test_vocabulary(self):
+        vocabularies.invalidate()
+        english = vocabularies.lookup('langs', 'English', self.session)
+        self.assertEqual(english.id, 'en')
+        self.assertTrue(english in self.session)
+        self.assertTrue(vocabularies.get('langs', 'en', self.session) is english)
+        self.assertTrue(self.session.get(Lang, 'en') is english)
+        self.assertTrue('txt' in vocabularies.pks('filetypes', self.session))
+        self.assertEqual(vocabularies.lookup('roles', 'no such role', self.session), None)
+
+    def test_get_lang(self):
+        vocabularies.invalidate()
+        self.assertEqual(DBUtils.get_lang('en', session=self.session).id, 'en')
+        queries = []
+        def count(*args):
+            queries.append(args)
+        event.listen(self.session.get_bind(), 'before_cursor_execute', count)
+        try:
+            for dummy in range(3):
+                self.assertEqual(DBUtils.get_lang('English', session=self.session).id, 'en')
+                self.assertEqual(DBUtils.get_lang('en', session=self.session).id, 'en')
+            self.assertEqual(queries, [])
+            self.assertEqual(DBUtils.get_lang('Klingon', session=self.session), None)
+            self.assertEqual(len(queries), 2)
+            self.assertEqual(DBUtils.get_lang('Klingon', session=self.session), None)
+            self.assertEqual(len(queries), 2)
+        finally:
+            event.remove(self.session.get_bind(), 'before_cursor_execute', count)
+
+    def test_engine_registry(self):
+        registry = GutenbergDatabase.EngineRegistry(pool_size=2, max_overflow=0)
+        engine = registry.get_engine()
+        self.assertTrue(registry.get_engine() is engine)
+        self.assertEqual(engine.pool.size(), 2)
+
+        # sessions borrow and return the same connections
+        for dummy in range(5):
+            session = registry.get_session()
+            session.execute(select(func.max(Book.pk)))
+            session.close()
+        self.assertEqual(engine.pool.checkedin(), 1)
+
+        # a forked child gets a fresh pool on the same engine
+        registry._pid = -1
+        self.assertTrue(registry.get_engine() is engine)
+        self.assertEqual(engine.pool.checkedin(), 0)
+
+        registry.configure(pool_recycle=60)
+        self.assertFalse(registry.get_engine() is engine)
+        self.assertEqual(registry.get_engine().pool._recycle, 60)
+        registry.dispose()
+
+    def test_managed_session(self):
+        engine = GutenbergDatabase.engines.get_engine()
+        self.assertTrue(DBUtils.ebook_exists(2600))
+        checkedin = engine.pool.checkedin()
+        for dummy in range(10):
+            DBUtils.ebook_exists(2600)
+            DBUtils.author_exists('Tolstoy, Leo, graf')
+        self.assertEqual(engine.pool.checkedin(), checkedin)
+        self.assertEqual(engine.pool.checkedout(), 0)
+
+    def test_ob_alias(self):
+        self.assertTrue(DBUtils.OB.pooled)
+        session = DBUtils.OB.get_session()
+        try:
+            self.assertTrue(session.get(Book, 2600))
+        finally:
+            session.close()
+
     def tearDown(self):
         pass
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from libgutenberg.GutenbergDatabase import row_class, row_factory, xl
+
+
+class Cursor(object):
+    description = [('pk', None), ('get', None), ('count', None), ('author', None)]
+
+
+class TestRows(unittest.TestCase):
+    def setUp(self):
+        self.cursor = Cursor()
+        self.data = (7, 'a', 3, 'Twain, Mark')
+
+    def test_like_xl(self):
+        row = row_factory(self.cursor)(self.data)
+        old = xl(self.cursor, self.data)
+        for column in ('pk', 'author', 0, 3):
+            self.assertEqual(row[column], old[column])
+        self.assertEqual(row.author, old.author)
+        self.assertEqual(row.count, old.count)
+        self.assertEqual(row.get('author'), old.get('author'))
+        self.assertEqual(row.get('missing', 1), old.get('missing', 1))
+        self.assertEqual(tuple(row.row), tuple(old.row))
+        with self.assertRaises(KeyError):
+            row['missing']
+
+    def test_one_class_per_columns(self):
+        self.assertIs(row_factory(self.cursor), row_factory(Cursor()))
+        self.assertIs(row_factory(self.cursor), row_class(('pk', 'get', 'count', 'author')))
+        self.assertFalse(hasattr(row_factory(self.cursor)(self.data), '__dict__'))
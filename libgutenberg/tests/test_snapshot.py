@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+import os
+import pickle
+import unittest
+
+from libgutenberg import GutenbergDatabase, Snapshot
+from libgutenberg.CommonOptions import Options
+from libgutenberg.DublinCore import GutenbergDublinCore
+from libgutenberg.GutenbergGlobals import DCIMT, Struct
+
+db_exists = GutenbergDatabase.db_exists
+options = Options()
+options.config = None
+if db_exists:
+    import psycopg2
+    try:
+        GutenbergDatabase.Database().connect()
+    except psycopg2.OperationalError:
+        db_exists = False
+        Warning("can't connect to database")
+
+
+def struct(**kwargs):
+    s = Struct()
+    s.__dict__.update(kwargs)
+    return s
+
+
+def metadata(dc):
+    """ the attributes of dc the templates use """
+    return (
+        dc.project_gutenberg_id, dc.canonical_url, dc.is_format_of, dc.title, dc.subtitle,
+        dc.title_file_as, dc.release_date, dc.downloads, dc.rights, dc.credit, dc.scan_urls,
+        str(dc.pubinfo), dc.pubinfo.years, dc.authors_short(),
+        [(a.name, a.role, a.marcrel, getattr(a, 'heading', None), getattr(a, 'birthdate', None),
+          getattr(a, 'deathdate', None), a.name_and_dates,
+          [(alias.alias, alias.heading) for alias in getattr(a, 'aliases', [])],
+          [(page.description, page.url) for page in getattr(a, 'webpages', [])])
+         for a in dc.authors],
+        [(lang.id, lang.language) for lang in dc.languages],
+        [(subject.id, subject.subject) for subject in dc.subjects],
+        [(locc.id, locc.locc) for locc in dc.loccs],
+        [(shelf.id, shelf.bookshelf) for shelf in dc.bookshelves],
+        [(t.id, t.description) for t in dc.dcmitypes],
+        [(marc.code, marc.text, marc.caption) for marc in dc.marcs],
+        [(f.archive_path, f.filename, f.url, f.extent, f.hr_extent, f.modified, f.filetype,
+          f.hr_filetype, f.encoding, f.compression, f.generated,
+          [str(mt) for mt in f.mediatypes]) for f in dc.files],
+        dc.filetypes, dc.mediatypes,
+    )
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        dc = GutenbergDublinCore()
+        with open(os.path.join(os.path.dirname(__file__), '99999-h.htm')) as fakebook:
+            dc.load_from_pgheader(fakebook.read())
+        dc.downloads = 12
+        dc.credit = 'Produced by someone'
+        dc.pubinfo.publisher = 'Macmillan'
+        dc.pubinfo.years = [('copyright', '1904')]
+        dc.authors[0].id = 7
+        dc.authors[0].heading = 1
+        dc.authors[0].birthdate = 1835
+        dc.authors[0].deathdate = 1910
+        dc.authors[0].aliases = [struct(alias='Twain, Mark', heading=1)]
+        dc.authors[0].webpages = [struct(description='Wikipedia', url='https://en.wikipedia.org/')]
+        dc.subjects = [struct(id=1, subject='Fiction')]
+        dc.loccs = [struct(id='PS', locc='American literature')]
+        dc.bookshelves = [struct(id=2, bookshelf='Best Books Ever')]
+        dc.dcmitypes = [struct(id='Text', description='Text')]
+        dc.marcs = [struct(code='245', text=dc.title, caption='Title')]
+        dc.files = [struct(archive_path='9/9/9/9/99999/99999-0.txt', filename='files/99999/99999-0.txt',
+                           url='https://www.gutenberg.org/files/99999/99999-0.txt', extent=2048,
+                           hr_extent='2 kB', modified=datetime.datetime(2021, 7, 21, 12, 30),
+                           filetype='txt', hr_filetype='Plain Text', encoding='utf-8',
+                           compression='none', generated=False,
+                           mediatypes=[DCIMT('text/plain', 'utf-8')])]
+        dc.filetypes = {'Plain Text'}
+        dc.mediatypes = {'text/plain'}
+        self.dc = dc
+
+    def test_round_trip(self):
+        data = self.dc.to_bytes()
+        self.assertTrue(data.startswith(Snapshot.MAGIC))
+        dc = GutenbergDublinCore.from_bytes(data)
+        self.assertEqual(metadata(dc), metadata(self.dc))
+        self.assertEqual(dc.to_bytes(), data)
+
+        author = dc.authors[0]
+        self.assertTrue(isinstance(author, Snapshot.AuthorRecord))
+        self.assertFalse(hasattr(author, '__dict__'))
+        self.assertEqual(author.first_letter, author.name_and_dates[0].lower())
+        self.assertEqual(author.first_lettter, author.first_letter)
+        self.assertEqual(dc.files[0].fk_filetypes, 'txt')
+        self.assertEqual(str(dc.files[0].mediatypes[0]), 'text/plain; charset=utf-8')
+        self.assertEqual(dc.release_date, datetime.date(2021, 7, 21))
+
+    def test_smaller_than_pickle(self):
+        self.assertLess(len(self.dc.to_bytes()), len(pickle.dumps(self.dc)))
+
+    def test_bad_data(self):
+        data = self.dc.to_bytes()
+        with self.assertRaises(ValueError):
+            GutenbergDublinCore.from_bytes(b'nonsense')
+        newer = Snapshot.MAGIC + bytes((Snapshot.VERSION + 1,)) + data[len(Snapshot.MAGIC) + 1:]
+        with self.assertRaises(ValueError):
+            GutenbergDublinCore.from_bytes(newer)
+
+
+@unittest.skipIf(not db_exists, 'database not configured')
+class TestSnapshotDB(unittest.TestCase):
+    def test_orm(self):
+        from libgutenberg.DublinCoreMapping import DublinCoreObject
+
+        for ebook, dc in DublinCoreObject.load_many([2600, 20050]).items():
+            copy = DublinCoreObject.from_bytes(dc.to_bytes())
+            self.assertEqual(metadata(copy), metadata(dc))
+            self.assertTrue(copy.session is None and copy.book is None)
+
+    def test_raw(self):
+        from libgutenberg import DummyConnectionPool
+        from libgutenberg.GutenbergDatabaseDublinCore import GutenbergDatabaseDublinCore
+
+        GutenbergDatabase.DB = GutenbergDatabase.Database()
+        GutenbergDatabase.DB.connect()
+        dc = GutenbergDatabaseDublinCore(DummyConnectionPool.ConnectionPool())
+        dc.load_from_database(2600)
+        copy = GutenbergDublinCore.from_bytes(dc.to_bytes())
+        self.assertEqual(metadata(copy), metadata(dc))
+        self.assertEqual([a.first_lettter for a in copy.authors],
+                         [a.first_lettter for a in dc.authors])
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+import unittest
+
+# modules that must not be loaded by a plain import, they load on first use
+HEAVY = ('sqlalchemy', 'psycopg2', 'lxml', 'pycountry', 'cairocffi', 'six',
+         'libgutenberg.Models', 'libgutenberg.DublinCoreMapping')
+
+# cumulative import time in microseconds, generous to allow for slow machines
+# and a cold bytecode cache; the eager imports used to take 700 ms
+BUDGET = 300000
+
+
+def importtime(module):
+    """ Import module in a fresh interpreter, return {module: cumulative µs} and the report. """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times, result.stderr
+
+
+class TestStartup(unittest.TestCase):
+    def check(self, module):
+        times, report = importtime(module)
+        self.assertIn(module, times, report)
+        loaded = [name for name in HEAVY if name in times]
+        self.assertEqual(loaded, [], report)
+        self.assertLess(times[module], BUDGET, report)
+
+    def test_dublincore(self):
+        self.check('libgutenberg.DublinCore')
+
+    def test_cover(self):
+        self.check('libgutenberg.Cover')
+
+    def test_headerscan(self):
+        self.check('libgutenberg.HeaderScan')
+
+    def test_lazy_attributes(self):
+        from libgutenberg import DublinCore
+        self.assertTrue(issubclass(DublinCore.PGDCObject, DublinCore.GutenbergDublinCore))
+        with self.assertRaises(AttributeError):
+            DublinCore.no_such_attribute
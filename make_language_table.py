@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+"""
+
+make_language_table.py
+
+Copyright 2026 by Project Gutenberg
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+
+Generate libgutenberg/LanguageTable.py from the installed pycountry, so
+language_map can resolve codes and names without loading pycountry.
+
+Run after upgrading pycountry:
+
+    python make_language_table.py
+
+"""
+
+import os
+from importlib.metadata import version
+
+import pycountry
+
+TARGET = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      'libgutenberg', 'LanguageTable.py')
+
+HEADER = '''#  -*- mode: python; indent-tabs-mode: nil; -*- coding: UTF8 -*-
+
+"""
+
+LanguageTable.py
+
+Generated by make_language_table.py from pycountry %s. Do not edit.
+
+Distributable under the GNU General Public License Version 3 or newer.
+
+LANGUAGES holds alpha_2, alpha_3 and name of the ISO 639-3 languages,
+FAMILIES alpha_3 and name of the ISO 639-5 language families, tab
+separated, one per line, in pycountry order. A string is much cheaper to
+compile and load than the equivalent tuples.
+
+"""
+
+PYCOUNTRY_VERSION = %r
+'''
+
+
+def main():
+    languages = [(getattr(lang, 'alpha_2', ''), lang.alpha_3, lang.name)
+                 for lang in pycountry.languages]
+    families = [(family.alpha_3, family.name) for family in pycountry.language_families]
+
+    with open(TARGET, 'w', encoding='utf-8') as f:
+        pycountry_version = version('pycountry')
+        f.write(HEADER % (pycountry_version, pycountry_version))
+        for name, rows in (('LANGUAGES', languages), ('FAMILIES', families)):
+            f.write("\n" + name + " = '''\\\n")
+            for row in rows:
+                line = '\t'.join(row)
+                assert "'''" not in line and '\\' not in line and '\n' not in line
+                f.write(line + '\n')
+            f.write("'''\n")
+    print('%d languages, %d families written to %s' % (len(languages), len(families), TARGET))
+
+
+if __name__ == '__main__':
+    main()
@@ -23,11 +23,18 @@ setup (
     ],
     extras_require = {
         'postgres':  ['psycopg2',],
-        'covers': ['cairocffi>1.7.0'],
+        'covers': ['cairocffi>1.7.0', 'Pillow'],
+        'async': ['asyncpg', 'sqlalchemy[asyncio]>=2.0'],
     },
     packages = [
         'libgutenberg'
     ],
+    entry_points = {
+        'console_scripts': [
+            'pg-header-scan = libgutenberg.HeaderScan:main',
+            'pg-catalog-dump = libgutenberg.OfflineCatalog:main',
+        ],
+    },
 
     # metadata for upload to PyPI
 